@@ -0,0 +1,146 @@
+from __future__ import annotations
+
+import os
+import threading
+import weakref
+from typing import TYPE_CHECKING, Any, Callable, Dict, Hashable, List, Mapping, Sequence, Tuple, TypeVar
+
+from core.money import dollars_array
+from db.repository import Repository
+from services.portfolio import Portfolio
+
+# pandas, plotly and numpy are imported by the builders that need them, so importing this module is cheap.
+if TYPE_CHECKING:
+    import pandas as pd
+    from plotly.graph_objects import Figure
+
+
+T = TypeVar("T")
+
+RISK_BINS = [0, 20, 40, 60, 80, 100]
+RISK_LABELS = ["Low", "Guarded", "Elevated", "High", "Critical"]
+# Line charts send at most this many points per chart, whatever the length of the series behind them.
+CHART_POINTS = int(os.environ.get("MYFIN_CHART_POINTS", "400"))
+
+_memo: Dict[int, Dict[str, Tuple[Hashable, object]]] = {}
+_memo_lock = threading.Lock()
+
+
+def _forget(owner_id: int) -> None:
+    with _memo_lock:
+        _memo.pop(owner_id, None)
+
+
+def memoized(owner: object, name: str, token: Hashable, build: Callable[[], T]) -> T:
+    # Entries live as long as their owner, so an id is never reused while its entries exist.
+    owner_id = id(owner)
+    with _memo_lock:
+        entry = _memo.get(owner_id, {}).get(name)
+    if entry is not None and entry[0] == token:
+        return entry[1]
+    value = build()
+    with _memo_lock:
+        if owner_id not in _memo:
+            _memo[owner_id] = {}
+            weakref.finalize(owner, _forget, owner_id)
+        _memo[owner_id][name] = (token, value)
+    return value
+
+
+def risk_frame(portfolio: Portfolio) -> pd.DataFrame:
+    import pandas as pd
+
+    return memoized(
+        portfolio,
+        "risk_frame",
+        None,
+        lambda: pd.DataFrame(
+            [{"Account": s.debt.lender_name, "Risk": s.risk_score, "Type": "Debt"} for s in portfolio.debts]
+            + [{"Account": s.card.card_name, "Risk": s.risk_score, "Type": "Card"} for s in portfolio.cards]
+        ),
+    )
+
+
+def risk_heatmap(portfolio: Portfolio) -> Figure:
+    import plotly.express as px
+
+    return memoized(
+        portfolio,
+        "risk_heatmap",
+        None,
+        lambda: px.bar(risk_frame(portfolio), x="Account", y="Risk", color="Type", range_y=[0, 100]),
+    )
+
+
+def _risk_distribution(portfolio: Portfolio) -> Figure:
+    import pandas as pd
+    import plotly.express as px
+
+    buckets = pd.cut(risk_frame(portfolio)["Risk"], bins=RISK_BINS, labels=RISK_LABELS, include_lowest=True)
+    dist_df = pd.DataFrame({"Bucket": buckets}).value_counts().reset_index()
+    dist_df.columns = ["Bucket", "Count"]
+    return px.bar(dist_df, x="Bucket", y="Count")
+
+
+def risk_distribution(portfolio: Portfolio) -> Figure:
+    return memoized(portfolio, "risk_distribution", None, lambda: _risk_distribution(portfolio))
+
+
+def debt_breakdown(portfolio: Portfolio, column: str) -> Figure:
+    attribute = {"Type": "debt_type", "Currency": "original_currency"}[column]
+
+    def build() -> Figure:
+        import pandas as pd
+        import plotly.express as px
+
+        frame = pd.DataFrame(
+            {
+                column: [getattr(d.debt, attribute) for d in portfolio.debts],
+                "Balance": [d.debt.principal_outstanding_cad for d in portfolio.debts],
+            }
+        )
+        return px.pie(frame, names=column, values="Balance", hole=0.35)
+
+    return memoized(portfolio, f"debt_by_{attribute}", None, build)
+
+
+def line_chart(
+    x_label: str, x: Sequence[Any], series: Mapping[str, Sequence[float]], max_points: int = CHART_POINTS
+) -> Figure:
+    import numpy as np
+    import pandas as pd
+    import plotly.express as px
+
+    from core.downsample import downsample_indices
+
+    x = np.asarray(x)
+    if x.dtype == object:
+        # datetime.date values, as produced by the simulator
+        x = x.astype("datetime64[D]")
+    order = np.argsort(x, kind="stable")
+    keep = order[downsample_indices(x[order], [np.asarray(y)[order] for y in series.values()], max_points)]
+    frame = pd.DataFrame({x_label: x[keep], **{name: np.asarray(y)[keep] for name, y in series.items()}})
+    return px.line(frame, x=x_label, y=list(series))
+
+
+def _balance_history(repo: Repository) -> Figure:
+    snapshots = repo.monthly_snapshot_columns()
+    return line_chart(
+        "Date",
+        snapshots["snapshot_date"],
+        {
+            "Debt": dollars_array(snapshots["total_debt_cad"]),
+            "Savings": dollars_array(snapshots["total_savings_cad"]),
+        },
+    )
+
+
+def strategy_comparison(rows: List[Dict[str, Any]]) -> Figure:
+    import pandas as pd
+    import plotly.express as px
+
+    return px.bar(pd.DataFrame(rows), x="Strategy", y="Total Interest Paid")
+
+
+def balance_history(repo: Repository) -> Figure:
+    return memoized(repo, "balance_history", repo.table_versions("monthly_snapshots"), lambda: _balance_history(repo))
@@ -1,11 +1,20 @@
 from datetime import date
+from typing import Any, Callable
 
-import pandas as pd
 import streamlit as st
 
-from app.state import format_money, get_repo, load_card_snapshots, load_debt_snapshots
+from app.state import (
+    conflict_rows,
+    format_money,
+    get_portfolio,
+    get_repo,
+    remember_version,
+    shown_version,
+)
 from core.fx import convert_to_cad
+from core.money import format_cents_array
 from core.utils import next_due_date
+from db.repository import ConcurrentUpdateError
 from models.types import CreditCard, Debt, SavingsAccount
 
 
@@ -17,6 +26,30 @@ st.set_page_config(
 
 repo = get_repo()
 today = date.today()
+SEARCH_LIMIT = 50
+
+
+def save_edit(update: Callable[[Any], int], submitted: Any, current: Any, form_key: str, message: str) -> None:
+    try:
+        version = update(submitted)
+    except ConcurrentUpdateError as exc:
+        if exc.current_version is None:
+            st.error("This record was deleted by another session. Your edits were not saved.")
+            return
+        st.error(
+            "This record was changed by another session after you opened it. "
+            "Your edits were not saved; the form now shows the saved values."
+        )
+        changed = conflict_rows(submitted, current)
+        if changed:
+            st.dataframe(
+                [{key: str(value) for key, value in row.items()} for row in changed],
+                use_container_width=True,
+                hide_index=True,
+            )
+    else:
+        remember_version(form_key, version)
+        st.success(message)
 
 st.title("Debts & Credit Cards")
 st.caption("Add, view, and manage loans, credit cards, and savings.")
@@ -70,11 +103,14 @@ with st.form("add_debt"):
 st.divider()
 
 st.subheader("Edit Debt")
-all_debts = repo.list_debts()
-if all_debts:
-    debt_options = {f"{d.lender_name} (ID {d.id})": d for d in all_debts}
+debt_query = st.text_input("Search Debts", placeholder="Lender name", key="debt_search")
+debt_matches = repo.search_accounts(debt_query, tables=["debts"], limit=SEARCH_LIMIT)
+if debt_matches:
+    debt_options = {f"{m.name} (ID {m.account_id})": m.account_id for m in debt_matches}
     selected_label = st.selectbox("Select Debt", list(debt_options.keys()))
-    selected_debt = debt_options[selected_label]
+    selected_debt = repo.get_debt(debt_options[selected_label])
+    debt_key = f"debt-{selected_debt.id}"
+    debt_version = shown_version(debt_key, selected_debt.version)
     fx_for_edit = repo.get_fx_rate(selected_debt.original_currency) if selected_debt.original_currency != "CAD" else None
     if fx_for_edit and fx_for_edit.rate_to_cad > 0:
         default_balance_original = selected_debt.principal_outstanding_cad / fx_for_edit.rate_to_cad
@@ -162,9 +198,11 @@ if all_debts:
                 installment_due_day=installment_date.day,
                 last_payment_date=selected_debt.last_payment_date,
                 status=status,
+                version=debt_version,
             )
-            repo.update_debt(updated)
-            st.success("Debt updated.")
+            save_edit(repo.update_debt, updated, selected_debt, debt_key, "Debt updated.")
+elif debt_query:
+    st.info("No debts match that search.")
 else:
     st.info("No debts available to edit.")
 
@@ -206,11 +244,14 @@ with st.form("add_card"):
 st.divider()
 
 st.subheader("Edit Credit Card")
-all_cards = repo.list_credit_cards()
-if all_cards:
-    card_options = {f"{c.card_name} (ID {c.id})": c for c in all_cards}
+card_query = st.text_input("Search Credit Cards", placeholder="Card or bank name", key="card_search")
+card_matches = repo.search_accounts(card_query, tables=["credit_cards"], limit=SEARCH_LIMIT)
+if card_matches:
+    card_options = {f"{m.name} (ID {m.account_id})": m.account_id for m in card_matches}
     selected_label = st.selectbox("Select Credit Card", list(card_options.keys()))
-    selected_card = card_options[selected_label]
+    selected_card = repo.get_credit_card(card_options[selected_label])
+    card_key = f"card-{selected_card.id}"
+    card_version = shown_version(card_key, selected_card.version)
 
     with st.form("edit_card"):
         col1, col2, col3 = st.columns(3)
@@ -249,9 +290,11 @@ if all_cards:
                 last_payment_date=selected_card.last_payment_date,
                 flat_late_fee_cad=late_fee,
                 status=status,
+                version=card_version,
             )
-            repo.update_credit_card(updated)
-            st.success("Credit card updated.")
+            save_edit(repo.update_credit_card, updated, selected_card, card_key, "Credit card updated.")
+elif card_query:
+    st.info("No credit cards match that search.")
 else:
     st.info("No credit cards available to edit.")
 
@@ -281,11 +324,14 @@ with st.form("add_savings"):
         repo.add_savings_account(savings_name, savings_currency, balance_cad)
         st.success("Savings account added.")
 
-savings_accounts = repo.list_savings()
-if savings_accounts:
-    savings_options = {f"{s.account_name} (ID {s.id})": s for s in savings_accounts}
+savings_query = st.text_input("Search Savings Accounts", placeholder="Account name", key="savings_search")
+savings_matches = repo.search_accounts(savings_query, tables=["savings"], limit=SEARCH_LIMIT)
+if savings_matches:
+    savings_options = {f"{m.name} (ID {m.account_id})": m.account_id for m in savings_matches}
     selected_label = st.selectbox("Select Savings Account", list(savings_options.keys()))
-    selected_savings = savings_options[selected_label]
+    selected_savings = repo.get_savings_account(savings_options[selected_label])
+    savings_key = f"savings-{selected_savings.id}"
+    savings_version = shown_version(savings_key, selected_savings.version)
     fx_savings = repo.get_fx_rate(selected_savings.currency) if selected_savings.currency != "CAD" else None
     if fx_savings and fx_savings.rate_to_cad > 0:
         savings_balance_default = selected_savings.balance_cad / fx_savings.rate_to_cad
@@ -321,26 +367,28 @@ if savings_accounts:
                 account_name=savings_name,
                 currency=savings_currency,
                 balance_cad=balance_cad,
+                version=savings_version,
             )
-            repo.update_savings(updated)
-            st.success("Savings updated.")
-
-    savings_rows = [
-        {
-            "Account": s.account_name,
-            "Currency": s.currency,
-            "Balance (CAD)": format_money(s.balance_cad),
-        }
-        for s in savings_accounts
-    ]
-    st.dataframe(pd.DataFrame(savings_rows), use_container_width=True)
+            save_edit(repo.update_savings, updated, selected_savings, savings_key, "Savings updated.")
+elif savings_query:
+    st.info("No savings accounts match that search.")
+
+savings_columns = repo.savings_columns()
+if len(savings_columns["id"]):
+    savings_table = {
+        "Account": savings_columns["account_name"],
+        "Currency": savings_columns["currency"],
+        "Balance (CAD)": format_cents_array(savings_columns["balance_cad"]),
+    }
+    st.dataframe(savings_table, use_container_width=True)
 else:
     st.info("No savings accounts yet.")
 
 st.divider()
 
 st.subheader("Current Debts")
-debt_snapshots = load_debt_snapshots(repo, today)
+portfolio = get_portfolio(repo, today)
+debt_snapshots = portfolio.debts
 if debt_snapshots:
     debt_rows = []
     for snap in debt_snapshots:
@@ -359,12 +407,12 @@ if debt_snapshots:
                 "Risk Score": round(snap.risk_score, 1),
             }
         )
-    st.dataframe(pd.DataFrame(debt_rows), use_container_width=True)
+    st.dataframe(debt_rows, use_container_width=True)
 else:
     st.info("No active debts.")
 
 st.subheader("Current Credit Cards")
-card_snapshots = load_card_snapshots(repo, today)
+card_snapshots = portfolio.cards
 if card_snapshots:
     card_rows = [
         {
@@ -379,6 +427,6 @@ if card_snapshots:
         }
         for snap in card_snapshots
     ]
-    st.dataframe(pd.DataFrame(card_rows), use_container_width=True)
+    st.dataframe(card_rows, use_container_width=True)
 else:
     st.info("No active credit cards.")
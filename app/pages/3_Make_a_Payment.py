@@ -1,11 +1,11 @@
 from datetime import date
 
-import pandas as pd
 import streamlit as st
 
-from app.state import format_money, get_repo, load_card_snapshots, load_debt_snapshots
+from app.state import format_money, get_portfolio, get_repo
 from core.fx import convert_to_cad
-from core.payments import apply_payment_waterfall, recommend_payment_allocations
+from core.payments import STRATEGIES, apply_payment_waterfall, recommend_payment_allocations
+from services.portfolio import allocation_items
 
 
 st.set_page_config(
@@ -20,8 +20,9 @@ today = date.today()
 st.title("Make a Payment")
 st.caption("Record a payment and allocate automatically.")
 
-debt_snaps = load_debt_snapshots(repo, today)
-card_snaps = load_card_snapshots(repo, today)
+portfolio = get_portfolio(repo, today)
+debt_snaps = portfolio.debts
+card_snaps = portfolio.cards
 
 options = {}
 for snap in debt_snaps:
@@ -40,7 +41,7 @@ with st.form("make_payment"):
         payment_amount = st.number_input("Payment Amount", min_value=0.0)
         payment_currency = st.selectbox("Payment Currency", ["CAD", "INR"])
     with col3:
-        strategy = st.selectbox("Recommendation Strategy", ["risk", "avalanche", "snowball"])
+        strategy = st.selectbox("Recommendation Strategy", STRATEGIES)
 
     submitted = st.form_submit_button("Apply Payment")
     if submitted:
@@ -105,27 +106,7 @@ with st.form("make_payment"):
 st.divider()
 
 st.subheader("Recommended Allocation")
-items = []
-for snap in debt_snaps:
-    items.append(
-        {
-            "target_type": "loan",
-            "target_id": snap.debt.id,
-            "balance_cad": snap.debt.principal_outstanding_cad,
-            "interest_rate_annual": snap.debt.interest_rate_annual,
-            "risk_score": snap.risk_score,
-        }
-    )
-for snap in card_snaps:
-    items.append(
-        {
-            "target_type": "credit_card",
-            "target_id": snap.card.id,
-            "balance_cad": snap.card.statement_balance_cad,
-            "interest_rate_annual": snap.card.interest_rate_annual,
-            "risk_score": snap.risk_score,
-        }
-    )
+items = allocation_items(portfolio)
 
 if items:
     available_cad = payment_amount
@@ -142,7 +123,7 @@ if items:
         strategy=strategy,
     )
     if allocations:
-        st.dataframe(pd.DataFrame(allocations), use_container_width=True)
+        st.dataframe(allocations, use_container_width=True)
     else:
         st.info("No allocation available.")
 else:
@@ -1,11 +1,12 @@
+from dataclasses import replace
 from datetime import date
 
-import pandas as pd
-import plotly.express as px
 import streamlit as st
 
-from app.state import format_money, get_repo
-from core.simulator import simulate_payoff
+from app.charts import line_chart, strategy_comparison
+from app.state import format_money, get_repo, get_simulation_runner
+from core.payments import STRATEGIES
+from db.repository import SANDBOX_TABLES
 
 
 st.set_page_config(
@@ -19,12 +20,75 @@ repo = get_repo()
 st.title("What-If Simulator")
 st.caption("Simulate payoff strategies without changing real data.")
 
+if "whatif_sandbox" not in st.session_state:
+    st.session_state["whatif_seq"] = repo.latest_change_seq(SANDBOX_TABLES)
+    st.session_state["whatif_sandbox"] = repo.sandbox()
+    st.session_state["whatif_edits"] = []
+sandbox = st.session_state["whatif_sandbox"]
+edits = st.session_state["whatif_edits"]
+
+
+def reset_sandbox(seq: int) -> None:
+    # The position is read before copying, so a write that lands during the copy triggers another refresh.
+    sandbox.copy_from(repo)
+    edits.clear()
+    st.session_state["whatif_seq"] = seq
+
+
+# An unedited sandbox follows the live account tables; once edited it is kept until reset.
+live_seq = repo.latest_change_seq(SANDBOX_TABLES)
+live_changed = live_seq != st.session_state["whatif_seq"]
+if live_changed and not edits:
+    reset_sandbox(live_seq)
+    live_changed = False
+
+with st.expander("Hypothetical Edits", expanded=bool(edits)):
+    st.caption("Edits apply to an in-memory copy of your data and are used by the simulation below.")
+    sandbox_cards = sandbox.list_credit_cards(status="active")
+    sandbox_debts = sandbox.list_debts(status="active")
+
+    col1, col2 = st.columns(2)
+    with col1:
+        with st.form("sandbox_close_card"):
+            card_options = {f"{c.card_name} (ID {c.id})": c for c in sandbox_cards}
+            card_label = st.selectbox("Card", list(card_options.keys())) if card_options else None
+            if st.form_submit_button("Close Card") and card_label:
+                card = card_options[card_label]
+                sandbox.update_credit_card(replace(card, status="closed"))
+                edits.append(f"Closed {card.card_name}")
+                st.rerun()
+    with col2:
+        with st.form("sandbox_refinance"):
+            debt_options = {f"{d.lender_name} (ID {d.id})": d for d in sandbox_debts}
+            debt_label = st.selectbox("Loan", list(debt_options.keys())) if debt_options else None
+            new_rate = st.number_input("New Interest Rate (Annual)", min_value=0.0)
+            new_balance = st.number_input("New Balance (CAD, 0 keeps current)", min_value=0.0)
+            if st.form_submit_button("Refinance Loan") and debt_label:
+                debt = debt_options[debt_label]
+                sandbox.update_debt(
+                    replace(
+                        debt,
+                        interest_rate_annual=new_rate,
+                        principal_outstanding_cad=new_balance or debt.principal_outstanding_cad,
+                    )
+                )
+                edits.append(f"Refinanced {debt.lender_name} at {new_rate:.2%}")
+                st.rerun()
+
+    if edits:
+        st.markdown("\n".join(f"- {edit}" for edit in edits))
+    if live_changed:
+        st.warning("Your data has changed since these edits were made. Reset to simulate against current balances.")
+    if st.button("Reset Sandbox"):
+        reset_sandbox(live_seq)
+        st.rerun()
+
 with st.form("simulator"):
     col1, col2, col3 = st.columns(3)
     with col1:
         monthly_payment = st.number_input("Monthly Payment (CAD)", min_value=0.0)
     with col2:
-        strategy = st.selectbox("Strategy", ["risk", "avalanche", "snowball"])
+        strategy = st.selectbox("Strategy", STRATEGIES)
     with col3:
         start_date = st.date_input("Start Date", value=date.today())
 
@@ -33,52 +97,71 @@ with st.form("simulator"):
 st.divider()
 
 if submitted:
-    debts = repo.list_debts(status="active")
-    cards = repo.list_credit_cards(status="active")
-    if not debts and not cards:
-        st.info("No active accounts.")
-    else:
-        result = simulate_payoff(
-            debts=debts,
-            cards=cards,
-            start_date=start_date,
-            monthly_payment_cad=monthly_payment,
-            strategy=strategy,
+    debts = sandbox.list_debts(status="active")
+    cards = sandbox.list_credit_cards(status="active")
+    previous = st.session_state.pop("whatif_jobs", {})
+    if debts or cards:
+        # The selected strategy is one of the compared ones, so the runner deduplicates it to a single run.
+        st.session_state["whatif_jobs"] = get_simulation_runner().submit_all(
+            debts, cards, start_date, monthly_payment, STRATEGIES
         )
+        st.session_state["whatif_strategy"] = strategy
+    # Handles are per submit, so releasing the previous ones never stops a run the new submit shares.
+    for job in previous.values():
+        job.cancel()
+
+jobs = st.session_state.get("whatif_jobs")
+if jobs:
+    polling = not all(job.done() for job in jobs.values())
+
+    # Runs happen on the runner's worker pool; while any is in flight this section polls for new timeline rows.
+    @st.fragment(run_every=0.5 if polling else None)
+    def simulation_results() -> None:
+        if polling and all(job.done() for job in jobs.values()):
+            st.rerun()
+
+        selected = jobs[st.session_state["whatif_strategy"]]
+        rows = selected.rows()
+
+        if not selected.done():
+            col1, col2 = st.columns([3, 1])
+            with col1:
+                st.caption(f"Simulating {selected.scenario.strategy}: {len(rows)} months so far")
+            with col2:
+                if st.button("Cancel Simulation"):
+                    for job in jobs.values():
+                        job.cancel()
+                    st.rerun()
 
         st.subheader("Payoff Timeline")
-        if result.timeline:
-            timeline_df = pd.DataFrame(
-                {
-                    "Date": [row.as_of for row in result.timeline],
-                    "Total Debt (CAD)": [row.total_debt_cad for row in result.timeline],
-                    "Total Interest Paid (CAD)": [
-                        row.total_interest_paid_cad for row in result.timeline
-                    ],
-                }
+        if rows:
+            fig = line_chart(
+                "Date",
+                [row.as_of for row in rows],
+                {"Total Debt (CAD)": [row.total_debt_cad for row in rows]},
             )
-            fig = px.line(timeline_df, x="Date", y="Total Debt (CAD)")
             st.plotly_chart(fig, use_container_width=True)
-        else:
+        elif selected.done():
             st.info("No simulation output.")
 
-        st.subheader("Summary")
-        debt_free = result.debt_free_date.isoformat() if result.debt_free_date else "Not paid off"
-        st.write(
-            f"Debt-free date: {debt_free} | Total interest paid: {format_money(result.total_interest_paid_cad)}"
-        )
+        if selected.status == "cancelled":
+            st.warning("Simulation cancelled.")
+        elif selected.status == "failed":
+            st.error("Simulation failed.")
+        elif selected.status == "succeeded":
+            result = selected.result()
+            st.subheader("Summary")
+            debt_free = result.debt_free_date.isoformat() if result.debt_free_date else "Not paid off"
+            st.write(
+                f"Debt-free date: {debt_free} | Total interest paid: {format_money(result.total_interest_paid_cad)}"
+            )
 
         st.subheader("Strategy Comparison")
-        strategies = ["risk", "avalanche", "snowball"]
         comparison_rows = []
-        for strat in strategies:
-            comp = simulate_payoff(
-                debts=debts,
-                cards=cards,
-                start_date=start_date,
-                monthly_payment_cad=monthly_payment,
-                strategy=strat,
-            )
+        for strat, job in jobs.items():
+            if job.status != "succeeded":
+                continue
+            comp = job.result()
             comparison_rows.append(
                 {
                     "Strategy": strat,
@@ -86,8 +169,14 @@ if submitted:
                     "Total Interest Paid": comp.total_interest_paid_cad,
                 }
             )
-        comparison_df = pd.DataFrame(comparison_rows)
-        fig = px.bar(comparison_df, x="Strategy", y="Total Interest Paid")
-        st.plotly_chart(fig, use_container_width=True)
+        if comparison_rows:
+            st.plotly_chart(strategy_comparison(comparison_rows), use_container_width=True)
+        pending = [strat for strat, job in jobs.items() if not job.done()]
+        if pending:
+            st.caption("Still running: " + ", ".join(pending))
+
+    simulation_results()
+elif submitted:
+    st.info("No active accounts.")
 else:
     st.info("Run a simulation to see results.")
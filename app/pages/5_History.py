@@ -1,8 +1,20 @@
-import pandas as pd
+import math
+from typing import Dict, Optional, Tuple
+
 import streamlit as st
 
-from app.state import get_repo, format_money
+from app.state import get_repo
+from core.money import format_cents_array
+
 
+PAGE_SIZES = [50, 100, 250, 500]
+SORT_COLUMNS = {
+    "Date": "payment_date",
+    "Amount (CAD)": "payment_amount_cad",
+    "Principal": "applied_principal",
+    "Interest": "applied_interest",
+    "Penal": "applied_penal",
+}
 
 st.set_page_config(
     page_title="History | MyFin",
@@ -15,38 +27,101 @@ repo = get_repo()
 st.title("History")
 st.caption("Payments and monthly snapshots.")
 
-st.subheader("Payments")
-payments = repo.list_payments()
-if payments:
-    payment_rows = [
-        {
-            "Date": p.payment_date,
-            "Target Type": p.target_type,
-            "Target ID": p.target_id,
-            "Amount (CAD)": format_money(p.payment_amount_cad),
-            "Penal": format_money(p.applied_penal),
-            "Interest": format_money(p.applied_interest),
-            "Principal": format_money(p.applied_principal),
-        }
-        for p in payments
-    ]
-    st.dataframe(pd.DataFrame(payment_rows), use_container_width=True)
-else:
-    st.info("No payments recorded.")
+
+def account_filters() -> Dict[str, Tuple[Optional[str], Optional[int]]]:
+    options = {"All accounts": (None, None), "All loans": ("loan", None), "All credit cards": ("credit_card", None)}
+    for debt in repo.list_debts():
+        options[f"Loan: {debt.lender_name} (ID {debt.id})"] = ("loan", debt.id)
+    for card in repo.list_credit_cards():
+        options[f"Card: {card.card_name} (ID {card.id})"] = ("credit_card", card.id)
+    return options
+
+
+# Only the requested page is read and formatted; filtering, sorting and counting happen in SQL.
+@st.fragment
+def payments_section() -> None:
+    st.subheader("Payments")
+    accounts = account_filters()
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        account = st.selectbox("Account", list(accounts.keys()), key="history_account")
+    with col2:
+        start_date = st.date_input("From", value=None, key="history_from")
+    with col3:
+        end_date = st.date_input("To", value=None, key="history_to")
+
+    col1, col2, col3, col4 = st.columns(4)
+    with col1:
+        sort_label = st.selectbox("Sort By", list(SORT_COLUMNS.keys()), key="history_sort")
+    with col2:
+        order = st.radio("Order", ["Descending", "Ascending"], horizontal=True, key="history_order")
+    with col3:
+        page_size = st.selectbox("Rows per Page", PAGE_SIZES, index=1, key="history_page_size")
+    with col4:
+        include_archived = st.checkbox("Include archived payments", value=False, key="history_archived")
+
+    target_type, target_id = accounts[account]
+    filters = dict(
+        target_type=target_type,
+        target_id=target_id,
+        start_date=start_date,
+        end_date=end_date,
+        include_archived=include_archived,
+    )
+    total = repo.count_payments(**filters)
+    if total == 0:
+        st.info("No payments recorded.")
+        return
+
+    pages = math.ceil(total / page_size)
+    view = (account, start_date, end_date, sort_label, order, page_size, include_archived)
+    if st.session_state.get("history_view") != view:
+        st.session_state["history_view"] = view
+        st.session_state["history_page"] = 1
+    page = st.number_input("Page", min_value=1, max_value=pages, key="history_page")
+    payments = repo.payment_page(
+        **filters,
+        sort_by=SORT_COLUMNS[sort_label],
+        descending=order == "Descending",
+        limit=page_size,
+        offset=(page - 1) * page_size,
+    )
+    payment_table = {
+        "Date": payments["payment_date"],
+        "Target Type": payments["target_type"],
+        "Target ID": payments["target_id"],
+        "Amount (CAD)": format_cents_array(payments["payment_amount_cad"]),
+        "Penal": format_cents_array(payments["applied_penal"]),
+        "Interest": format_cents_array(payments["applied_interest"]),
+        "Principal": format_cents_array(payments["applied_principal"]),
+    }
+    first = (page - 1) * page_size + 1
+    last = first + len(payments["id"]) - 1
+    st.caption(f"Page {page:,} of {pages:,}: payments {first:,}-{last:,} of {total:,}")
+    st.dataframe(
+        payment_table,
+        use_container_width=True,
+        hide_index=True,
+        column_config={"Date": st.column_config.DateColumn(format="YYYY-MM-DD")},
+    )
+
+
+payments_section()
 
 st.subheader("Monthly Snapshots")
-snapshots = repo.list_monthly_snapshots()
-if snapshots:
-    snapshot_rows = [
-        {
-            "Date": s.snapshot_date,
-            "Total Debt": format_money(s.total_debt_cad),
-            "Total Interest": format_money(s.total_interest_cad),
-            "Total Savings": format_money(s.total_savings_cad),
-            "Net Position": format_money(s.net_position_cad),
-        }
-        for s in snapshots
-    ]
-    st.dataframe(pd.DataFrame(snapshot_rows), use_container_width=True)
+snapshots = repo.monthly_snapshot_columns()
+if len(snapshots["snapshot_date"]):
+    snapshot_table = {
+        "Date": snapshots["snapshot_date"],
+        "Total Debt": format_cents_array(snapshots["total_debt_cad"]),
+        "Total Interest": format_cents_array(snapshots["total_interest_cad"]),
+        "Total Savings": format_cents_array(snapshots["total_savings_cad"]),
+        "Net Position": format_cents_array(snapshots["net_position_cad"]),
+    }
+    st.dataframe(
+        snapshot_table,
+        use_container_width=True,
+        column_config={"Date": st.column_config.DateColumn(format="YYYY-MM-DD")},
+    )
 else:
     st.info("No snapshots recorded.")
@@ -1,11 +1,17 @@
-from datetime import date
+import time
+from datetime import date, datetime, timedelta
 
-import pandas as pd
 import streamlit as st
 
-from app.state import format_money, get_repo, load_card_snapshots, load_debt_snapshots
-from db.repository import MonthlySnapshot
+from app.state import (
+    archive_horizon_days,
+    format_money,
+    get_backup_service,
+    get_portfolio,
+    get_repo,
+)
 from models.types import FxRate
+from services.scheduler import healthy_workers, scheduler_for
 
 
 st.set_page_config(
@@ -51,41 +57,149 @@ if fx_rates:
         }
         for fx in fx_rates
     ]
-    st.dataframe(pd.DataFrame(fx_rows), use_container_width=True)
+    st.dataframe(fx_rows, use_container_width=True)
 
 st.divider()
 
+st.subheader("Background Jobs")
+workers = healthy_workers(repo, time.time())
+if workers:
+    worker = workers[0]
+    st.success(
+        f"Background worker {worker.worker_id} is {worker.state} "
+        f"(last heartbeat {int(time.time()) - worker.heartbeat_at}s ago)."
+    )
+else:
+    st.info("No background worker is running; jobs run inside the app. Start one with `python -m db.worker`.")
+job_runs = repo.latest_job_runs()
+if job_runs:
+    st.dataframe(
+        [
+            {
+                "Job": run.job_name,
+                "Period": run.period,
+                "Status": run.status,
+                "Progress": f"{run.progress:.0%}",
+                "Started": datetime.fromtimestamp(run.started_at),
+                "Finished": datetime.fromtimestamp(run.finished_at) if run.finished_at else None,
+                "Detail": run.detail or "",
+            }
+            for run in job_runs
+        ],
+        use_container_width=True,
+    )
+
 st.subheader("Maintenance")
 col1, col2 = st.columns(2)
 with col1:
     if st.button("Run Daily Recalculation"):
-        st.success("Recalculation completed on load. No data written.")
+        scheduler = scheduler_for(repo)
+        if scheduler.request("daily_accrual", date.today()):
+            if not workers:
+                scheduler.run_in_background(date.today(), force=True)
+            st.rerun()
+        else:
+            st.info("A recalculation is already running.")
 
 with col2:
     if st.button("Create Monthly Snapshot"):
         today = date.today()
-        debt_snaps = load_debt_snapshots(repo, today)
-        card_snaps = load_card_snapshots(repo, today)
-        total_debt = sum(
-            d.debt.principal_outstanding_cad + d.interest_cad + d.penal_cad for d in debt_snaps
-        ) + sum(
-            c.card.statement_balance_cad + c.interest_cad + c.late_fee_cad for c in card_snaps
-        )
-        total_interest = sum(d.interest_cad + d.penal_cad for d in debt_snaps) + sum(
-            c.interest_cad + c.late_fee_cad for c in card_snaps
-        )
-        total_savings = sum(s.balance_cad for s in repo.list_savings())
-        net_position = total_savings - total_debt
-
-        snapshot = MonthlySnapshot(
-            snapshot_date=today,
-            total_debt_cad=total_debt,
-            total_interest_cad=total_interest,
-            total_savings_cad=total_savings,
-            net_position_cad=net_position,
-        )
+        snapshot = get_portfolio(repo, today).monthly_snapshot(today)
         try:
             repo.add_monthly_snapshot(snapshot)
             st.success("Monthly snapshot saved.")
         except Exception:
             st.warning("Snapshot already exists for this date.")
+
+if st.button("Backfill Missing Months"):
+    from services.backfill import backfill_monthly_snapshots
+
+    added = backfill_monthly_snapshots(repo, date.today())
+    st.success(f"Backfilled {added} missing monthly snapshots from the payment ledger; savings are estimated.")
+
+if st.button("Reconcile Debt Principal"):
+    mismatches = repo.reconcile_debt_principal()
+    if mismatches:
+        st.warning(f"{len(mismatches)} debts do not match their payment ledger.")
+        st.dataframe(
+            [
+                {
+                    "Debt ID": m.debt_id,
+                    "Recorded (CAD)": format_money(m.recorded_cad),
+                    "Ledger (CAD)": format_money(m.expected_cad),
+                    "Payments": m.payment_count,
+                    "First Diverging Payment": m.diverged_payment_id,
+                    "Diverged On": m.diverged_on,
+                }
+                for m in mismatches
+            ],
+            use_container_width=True,
+        )
+    else:
+        st.success("Every debt matches its payment ledger.")
+
+st.divider()
+
+st.subheader("Payment Archive")
+st.caption("Older payments move to per-year files and are only opened when a query reaches back that far.")
+with st.form("archive_payments"):
+    horizon_days = st.number_input(
+        "Keep payments from the last N days in the main database",
+        min_value=0,
+        value=archive_horizon_days(),
+        step=30,
+    )
+    submitted = st.form_submit_button("Archive Old Payments")
+    if submitted:
+        moved = repo.archive_payments(date.today() - timedelta(days=int(horizon_days)))
+        if moved:
+            st.success(
+                "Archived " + ", ".join(f"{count} payments from {year}" for year, count in moved.items()) + "."
+            )
+        else:
+            st.info("No payments older than the horizon.")
+
+archived_years = repo.archived_payment_years()
+if archived_years:
+    st.write("Archived years: " + ", ".join(str(year) for year in archived_years))
+
+st.divider()
+
+st.subheader("Backups")
+backup_service = get_backup_service(repo)
+if st.button("Create Backup"):
+    progress_bar = st.progress(0.0)
+
+    def _report(status: int, remaining: int, total: int) -> None:
+        if total:
+            progress_bar.progress((total - remaining) / total)
+
+    backup = backup_service.create_backup(progress=_report)
+    progress_bar.progress(1.0)
+    st.success(f"Backup saved: {backup.path.name}")
+
+backups = backup_service.list_backups()
+if backups:
+    backup_rows = [
+        {
+            "Created": b.created_at.strftime("%Y-%m-%d %H:%M:%S"),
+            "File": b.path.name,
+            "Size (KB)": round(b.size_bytes / 1024, 1),
+        }
+        for b in backups
+    ]
+    st.dataframe(backup_rows, use_container_width=True)
+
+    backup_options = {f"{b.created_at:%Y-%m-%d %H:%M:%S} ({b.path.name})": b for b in backups}
+    with st.form("restore_backup"):
+        selected_backup = st.selectbox("Restore Point", list(backup_options.keys()))
+        confirmed = st.checkbox("I understand this replaces the current data.")
+        submitted = st.form_submit_button("Restore Backup")
+        if submitted:
+            if not confirmed:
+                st.error("Confirm the restore before continuing.")
+            else:
+                safety = backup_service.restore(backup_options[selected_backup])
+                st.success(f"Restored. The previous state was saved as {safety.path.name}.")
+else:
+    st.info("No backups yet.")
@@ -1,120 +1,98 @@
 from __future__ import annotations
 
-from dataclasses import dataclass
+import inspect
+import os
+from dataclasses import fields
 from datetime import date
 from pathlib import Path
-from typing import Dict, List, Optional
+from typing import TYPE_CHECKING, Any, Dict, List, Optional
 
 import streamlit as st
 
-from core.interest import (
-    compute_credit_card_accrual,
-    compute_credit_card_overdue_days,
-    compute_debt_accrual,
-    compute_debt_overdue_days,
-)
-from core.risk import compute_credit_card_risk, compute_debt_risk
 from core.utils import format_date
 from db.repository import Repository
-from models.types import CreditCard, Debt
+from db.tenants import DEFAULT_TENANT, TENANT_HEADER, RepositoryManager, UnknownTenantError, tenant_allowlist
+from services.backup import BackupService
+from services.portfolio import CardSnapshot, DebtSnapshot, Portfolio, portfolio_service
+from services.simulations import SimulationRunner
 
+if TYPE_CHECKING:
+    from streamlit.delta_generator import DeltaGenerator
 
-@dataclass(frozen=True)
-class DebtSnapshot:
-    debt: Debt
-    interest_cad: float
-    penal_cad: float
-    overdue_days: int
-    risk_score: float
-    risk_reason: str
 
+# Expanders that track their open state (key/on_change and .open) are newer than the oldest supported Streamlit;
+# without them a section renders eagerly inside a plain expander.
+TRACKED_EXPANDERS = "on_change" in inspect.signature(st.expander).parameters
 
-@dataclass(frozen=True)
-class CardSnapshot:
-    card: CreditCard
-    interest_cad: float
-    late_fee_cad: float
-    overdue_days: int
-    risk_score: float
-    risk_reason: str
+
+@st.cache_resource
+def get_repo_manager() -> RepositoryManager:
+    root = Path(__file__).resolve().parents[1]
+    manager = RepositoryManager(
+        root / "data",
+        capacity=int(os.environ.get("MYFIN_TENANT_POOL_SIZE", "64")),
+        idle_seconds=float(os.environ.get("MYFIN_TENANT_IDLE_SECONDS", "900")),
+        allowed=tenant_allowlist(),
+    )
+    manager.preload(t for t in os.environ.get("MYFIN_PRELOAD_TENANTS", "").split(",") if t)
+    return manager
 
 
 @st.cache_resource
+def get_simulation_runner() -> SimulationRunner:
+    return SimulationRunner(max_workers=int(os.environ.get("MYFIN_SIMULATION_WORKERS", "2")))
+
+
+def current_tenant() -> str:
+    return st.context.headers.get(TENANT_HEADER) or os.environ.get("MYFIN_TENANT", DEFAULT_TENANT)
+
+
 def get_repo() -> Repository:
-    root = Path(__file__).resolve().parents[1]
-    db_path = root / "data" / "finance.db"
-    return Repository(db_path)
-
-
-def load_debt_snapshots(repo: Repository, as_of: date) -> List[DebtSnapshot]:
-    debts = repo.list_debts(status="active")
-    snapshots: List[DebtSnapshot] = []
-    for debt in debts:
-        last_event = debt.last_payment_date or debt.loan_start_date
-        overdue_days = compute_debt_overdue_days(
-            as_of=as_of,
-            installment_due_day=debt.installment_due_day,
-            last_payment_date=debt.last_payment_date,
-            loan_start_date=debt.loan_start_date,
-        )
-        accrual = compute_debt_accrual(
-            principal_outstanding_cad=debt.principal_outstanding_cad,
-            interest_rate_annual=debt.interest_rate_annual,
-            penal_rate_annual=debt.penal_rate_annual,
-            last_event_date=last_event,
-            as_of=as_of,
-            overdue_days=overdue_days,
-        )
-        risk = compute_debt_risk(
-            interest_rate_annual=debt.interest_rate_annual,
-            overdue_days=overdue_days,
-            has_penal=accrual.penal_cad > 0,
-            original_currency=debt.original_currency,
-        )
-        snapshots.append(
-            DebtSnapshot(
-                debt=debt,
-                interest_cad=accrual.interest_cad,
-                penal_cad=accrual.penal_cad,
-                overdue_days=overdue_days,
-                risk_score=risk.score,
-                risk_reason=risk.reason,
-            )
-        )
-    return snapshots
-
-
-def load_card_snapshots(repo: Repository, as_of: date) -> List[CardSnapshot]:
-    cards = repo.list_credit_cards(status="active")
-    snapshots: List[CardSnapshot] = []
-    for card in cards:
-        last_event = card.last_payment_date or card.statement_date
-        accrual = compute_credit_card_accrual(
-            statement_balance_cad=card.statement_balance_cad,
-            interest_rate_annual=card.interest_rate_annual,
-            last_event_date=last_event,
-            as_of=as_of,
-            due_date=card.due_date,
-            flat_late_fee_cad=card.flat_late_fee_cad,
-        )
-        overdue_days = compute_credit_card_overdue_days(as_of, card.due_date)
-        risk = compute_credit_card_risk(
-            interest_rate_annual=card.interest_rate_annual,
-            overdue_days=overdue_days,
-            utilization=card.utilization,
-            has_late_fee=accrual.late_fee_cad > 0,
-        )
-        snapshots.append(
-            CardSnapshot(
-                card=card,
-                interest_cad=accrual.interest_cad,
-                late_fee_cad=accrual.late_fee_cad,
-                overdue_days=overdue_days,
-                risk_score=risk.score,
-                risk_reason=risk.reason,
-            )
-        )
-    return snapshots
+    try:
+        return get_repo_manager().get(current_tenant())
+    except UnknownTenantError as exc:
+        st.error(str(exc))
+        st.stop()
+
+
+def get_backup_service(repo: Repository) -> BackupService:
+    backup_dir = repo.db_path.parent / "backups" / repo.db_path.stem
+    return BackupService(repo, backup_dir, keep=int(os.environ.get("MYFIN_BACKUP_KEEP", "14")))
+
+
+def lazy_section(label: str, key: str) -> Optional[DeltaGenerator]:
+    if not TRACKED_EXPANDERS:
+        return st.expander(label)
+    section = st.expander(label, key=key, on_change="rerun")
+    return section if section.open else None
+
+
+def shown_version(form_key: str, version: int) -> int:
+    # A form submit carries the values rendered by the previous run, so compare against that run's version.
+    versions = st.session_state.setdefault("shown_versions", {})
+    shown = versions.get(form_key, version)
+    versions[form_key] = version
+    return shown
+
+
+def remember_version(form_key: str, version: int) -> None:
+    st.session_state.setdefault("shown_versions", {})[form_key] = version
+
+
+def conflict_rows(submitted: Any, current: Any) -> List[Dict[str, Any]]:
+    return [
+        {"Field": f.name, "Your Edit": getattr(submitted, f.name), "Saved": getattr(current, f.name)}
+        for f in fields(current)
+        if f.name not in ("id", "version") and getattr(submitted, f.name) != getattr(current, f.name)
+    ]
+
+
+def archive_horizon_days() -> int:
+    return int(os.environ.get("MYFIN_ARCHIVE_HORIZON_DAYS", "730"))
+
+
+def get_portfolio(repo: Repository, as_of: date) -> Portfolio:
+    return portfolio_service(repo).portfolio(as_of)
 
 
 def compute_totals(debt_snapshots: List[DebtSnapshot], card_snapshots: List[CardSnapshot]) -> Dict[str, float]:
@@ -131,5 +109,11 @@ def format_money(value: float) -> str:
     return f"{value:,.2f}"
 
 
+def format_cents(value: int) -> str:
+    sign = "-" if value < 0 else ""
+    units, cents = divmod(abs(int(value)), 100)
+    return f"{sign}{units:,}.{cents:02d}"
+
+
 def snapshot_label(as_of: date) -> str:
     return format_date(as_of)
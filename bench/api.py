@@ -0,0 +1,125 @@
+from __future__ import annotations
+
+import http.client
+import statistics
+import tempfile
+import threading
+import time
+from datetime import date
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from db.tenants import RepositoryManager
+from models.types import CreditCard, Debt
+from services.api import ApiServer, ApiService
+from services.simulations import SimulationRunner
+
+
+DEBTS = 400
+CARDS = 100
+REPEATS = 200
+CLIENTS = 8
+DURATION_SECONDS = 3.0
+QUERIES = [
+    "/portfolio",
+    "/risk",
+    "/allocations?available_cad=2500&strategy=avalanche",
+    "/snapshots",
+    "/simulations?monthly_payment_cad=25000&strategy=snowball",
+]
+
+
+def _seed(manager: RepositoryManager) -> None:
+    repo = manager.get("default")
+    for i in range(DEBTS):
+        repo.add_debt(
+            Debt(
+                0, f"Lender {i}", "Personal", "CAD", 5000.0, 1000.0 + i, 0.05 + (i % 10) / 100, 0.02,
+                date(2024, 1, 1), 50.0, i % 28 + 1, None, "active",
+            )
+        )
+    for i in range(CARDS):
+        repo.add_credit_card(
+            CreditCard(
+                0, "Bank", f"Card {i}", 10000.0, 200.0 + i, 0.2, date(2024, 2, 1), date(2024, 2, 20), None, 25.0,
+                "active",
+            )
+        )
+
+
+def _get(conn: http.client.HTTPConnection, path: str, etag: Optional[str] = None) -> Tuple[int, Optional[str]]:
+    conn.request("GET", path, headers={"If-None-Match": etag} if etag else {})
+    response = conn.getresponse()
+    response.read()
+    return response.status, response.getheader("ETag")
+
+
+def _timed(conn: http.client.HTTPConnection, path: str, etag: Optional[str] = None) -> float:
+    start = time.perf_counter()
+    _get(conn, path, etag)
+    return time.perf_counter() - start
+
+
+def _load(port: int, etags: Dict[str, str], revalidate: bool) -> Tuple[int, List[float]]:
+    stop = threading.Event()
+    latencies: List[List[float]] = [[] for _ in range(CLIENTS)]
+
+    def client(slot: int) -> None:
+        conn = http.client.HTTPConnection("127.0.0.1", port)
+        index = slot
+        while not stop.is_set():
+            path = QUERIES[index % len(QUERIES)]
+            latencies[slot].append(_timed(conn, path, etags[path] if revalidate else None))
+            index += 1
+        conn.close()
+
+    threads = [threading.Thread(target=client, args=(slot,)) for slot in range(CLIENTS)]
+    for thread in threads:
+        thread.start()
+    time.sleep(DURATION_SECONDS)
+    stop.set()
+    for thread in threads:
+        thread.join()
+    samples = [sample for slot in latencies for sample in slot]
+    return len(samples), samples
+
+
+def main() -> None:
+    with tempfile.TemporaryDirectory() as tmp:
+        manager = RepositoryManager(Path(tmp))
+        _seed(manager)
+        runner = SimulationRunner()
+        server = ApiServer(("127.0.0.1", 0), ApiService(manager, runner))
+        thread = threading.Thread(target=server.serve_forever, daemon=True)
+        thread.start()
+        port = server.server_port
+        conn = http.client.HTTPConnection("127.0.0.1", port)
+
+        print(f"{DEBTS} loans, {CARDS} cards; ms per request, median of {REPEATS} after the first")
+        print(f"{'query':<58} {'first':>8} {'repeat':>8} {'304':>8}")
+        etags: Dict[str, str] = {}
+        try:
+            for path in QUERIES:
+                first = _timed(conn, path)
+                etags[path] = _get(conn, path)[1]
+                repeat = statistics.median(_timed(conn, path) for _ in range(REPEATS))
+                revalidated = statistics.median(_timed(conn, path, etags[path]) for _ in range(REPEATS))
+                print(f"{path:<58} {first * 1e3:>8.2f} {repeat * 1e3:>8.2f} {revalidated * 1e3:>8.2f}")
+
+            print(f"\n{CLIENTS} keep-alive clients cycling through the queries for {DURATION_SECONDS:.0f}s")
+            for label, revalidate in (("full bodies", False), ("If-None-Match", True)):
+                count, samples = _load(port, etags, revalidate)
+                print(
+                    f"{label:<14} {count / DURATION_SECONDS:>8,.0f} req/s  "
+                    f"p50 {statistics.median(samples) * 1e3:.2f} ms  max {max(samples) * 1e3:.2f} ms"
+                )
+        finally:
+            conn.close()
+            server.shutdown()
+            server.server_close()
+            runner.shutdown()
+            manager.close()
+
+
+if __name__ == "__main__":
+    main()
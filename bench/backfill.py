@@ -0,0 +1,105 @@
+from __future__ import annotations
+
+import sqlite3
+import tempfile
+import time
+from datetime import date
+from pathlib import Path
+
+import numpy as np
+
+from core.backfill import historical_totals, missing_month_starts
+from db.repository import Repository
+from services.backfill import backfill_monthly_snapshots
+
+
+DEBTS = 2_000
+CARDS = 500
+PAYMENTS = 1_000_000
+DAYS = 3_652
+FIRST_DAY = 14_610
+
+
+def _seed(db_path: Path) -> None:
+    conn = sqlite3.connect(str(db_path))
+    with conn:
+        conn.execute(
+            f"""
+            WITH RECURSIVE n(i) AS (SELECT 1 UNION ALL SELECT i + 1 FROM n WHERE i < {DEBTS})
+            INSERT INTO debts (
+                lender_name, debt_type, original_currency, principal_original, principal_outstanding_cad,
+                interest_rate_annual, penal_rate_annual, loan_start_date, installment_amount,
+                installment_due_day, last_payment_date, status
+            )
+            SELECT 'Lender ' || i, 'Personal', 'CAD', 5000000, 100000 + i, 0.05 + (i % 10) / 100.0, 0.02,
+                {FIRST_DAY} + i % 365, 50000, CASE WHEN i % 4 = 0 THEN NULL ELSE i % 28 + 1 END, NULL, 'active'
+            FROM n
+            """
+        )
+        conn.execute(
+            f"""
+            WITH RECURSIVE n(i) AS (SELECT 1 UNION ALL SELECT i + 1 FROM n WHERE i < {CARDS})
+            INSERT INTO credit_cards (
+                bank_name, card_name, credit_limit_cad, statement_balance_cad, interest_rate_annual,
+                statement_date, due_date, last_payment_date, flat_late_fee_cad, status
+            )
+            SELECT 'Bank', 'Card ' || i, 1000000, 20000 + i, 0.2, {FIRST_DAY}, {FIRST_DAY + 20}, NULL, 2500, 'active'
+            FROM n
+            """
+        )
+        conn.execute(
+            f"""
+            WITH RECURSIVE n(i) AS (SELECT 0 UNION ALL SELECT i + 1 FROM n WHERE i < {PAYMENTS - 1})
+            INSERT INTO payments (
+                payment_date, target_type, target_id, payment_amount_original, payment_currency,
+                payment_amount_cad, applied_penal, applied_interest, applied_principal
+            )
+            SELECT {FIRST_DAY} + i * {DAYS} / {PAYMENTS},
+                CASE WHEN i % 5 = 0 THEN 'credit_card' ELSE 'loan' END,
+                CASE WHEN i % 5 = 0 THEN i % {CARDS} + 1 ELSE i % {DEBTS} + 1 END,
+                1500, 'CAD', 1500, 0, 500, 1000
+            FROM n
+            """
+        )
+    conn.close()
+
+
+def main() -> None:
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = Path(tmp) / "history.db"
+        Repository(db_path).close()
+        start = time.perf_counter()
+        _seed(db_path)
+        print(
+            f"Seeded {DEBTS:,} debts, {CARDS:,} cards and {PAYMENTS:,} payments over {DAYS:,} days "
+            f"in {time.perf_counter() - start:.1f} s"
+        )
+
+        repo = Repository(db_path)
+        debts = repo.debt_columns()
+        cards = repo.credit_card_columns()
+        payments = repo.payment_columns()
+        months = missing_month_starts(
+            np.array([], dtype="datetime64[D]"), payments["payment_date"].min(), payments["payment_date"].max()
+        )
+
+        savings = np.zeros(len(months), dtype=np.int64)
+        start = time.perf_counter()
+        together = historical_totals(months, debts, cards, payments, savings)
+        print(f"all {len(months)} months in one pass     {time.perf_counter() - start:8.2f} s")
+
+        start = time.perf_counter()
+        one_by_one = [historical_totals(months[i : i + 1], debts, cards, payments, savings[i : i + 1]) for i in range(len(months))]
+        print(f"one month at a time              {time.perf_counter() - start:8.2f} s")
+        assert all(
+            one["total_debt_cad"][0] == total for one, total in zip(one_by_one, together["total_debt_cad"])
+        )
+
+        start = time.perf_counter()
+        added = backfill_monthly_snapshots(repo, date.today())
+        print(f"backfill_monthly_snapshots       {time.perf_counter() - start:8.2f} s  {added} snapshots written")
+        repo.close()
+
+
+if __name__ == "__main__":
+    main()
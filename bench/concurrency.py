@@ -0,0 +1,93 @@
+from __future__ import annotations
+
+import statistics
+import tempfile
+import threading
+import time
+from datetime import date, timedelta
+from pathlib import Path
+from typing import List
+
+from db.repository import Repository
+
+
+DURATION_SECONDS = 5.0
+READERS = 4
+SEED_PAYMENTS = 20_000
+
+
+def _percentile(samples: List[float], pct: float) -> float:
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, int(round(pct / 100.0 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def _add_payment(repo: Repository, index: int) -> None:
+    repo.add_payment(
+        payment_date=date(2020, 1, 1) + timedelta(days=index % 2000),
+        target_type="loan",
+        target_id=index % 25,
+        payment_amount_original=100.0,
+        payment_currency="CAD",
+        payment_amount_cad=100.0,
+        applied_penal=0.0,
+        applied_interest=10.0,
+        applied_principal=90.0,
+    )
+
+
+def main() -> None:
+    with tempfile.TemporaryDirectory() as tmp:
+        repo = Repository(Path(tmp) / "load.db")
+        for index in range(SEED_PAYMENTS):
+            _add_payment(repo, index)
+
+        stop = threading.Event()
+        read_latencies: List[List[float]] = [[] for _ in range(READERS)]
+        write_latencies: List[float] = []
+        errors: List[BaseException] = []
+
+        def writer() -> None:
+            index = SEED_PAYMENTS
+            while not stop.is_set():
+                start = time.perf_counter()
+                try:
+                    _add_payment(repo, index)
+                except BaseException as exc:
+                    errors.append(exc)
+                write_latencies.append(time.perf_counter() - start)
+                index += 1
+
+        def reader(slot: int) -> None:
+            since = date(2024, 1, 1)
+            while not stop.is_set():
+                start = time.perf_counter()
+                try:
+                    repo.get_payment_totals()
+                    repo.list_payments(target_type="loan", target_id=slot, start_date=since)
+                except BaseException as exc:
+                    errors.append(exc)
+                read_latencies[slot].append(time.perf_counter() - start)
+
+        threads = [threading.Thread(target=writer)] + [
+            threading.Thread(target=reader, args=(slot,)) for slot in range(READERS)
+        ]
+        for thread in threads:
+            thread.start()
+        time.sleep(DURATION_SECONDS)
+        stop.set()
+        for thread in threads:
+            thread.join()
+        repo.close()
+
+    reads = [sample for samples in read_latencies for sample in samples]
+    print(f"{READERS} readers, 1 writer, {DURATION_SECONDS:.0f}s over {SEED_PAYMENTS:,} seeded payments")
+    print(f"writes: {len(write_latencies):,}  p50 {statistics.median(write_latencies) * 1e3:.2f} ms  "
+          f"p99 {_percentile(write_latencies, 99) * 1e3:.2f} ms")
+    print(f"reads:  {len(reads):,}  p50 {statistics.median(reads) * 1e3:.2f} ms  "
+          f"p99 {_percentile(reads, 99) * 1e3:.2f} ms  max {max(reads) * 1e3:.2f} ms")
+    print(f"errors: {len(errors)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,48 @@
+from __future__ import annotations
+
+import time
+
+import numpy as np
+import pandas as pd
+import plotly.express as px
+
+from app.charts import CHART_POINTS, line_chart
+
+
+LENGTHS = (600, 6_000, 60_000, 600_000)
+
+
+def _series(length: int) -> tuple:
+    rng = np.random.default_rng(length)
+    days = np.datetime64("2000-01-01") + np.arange(length)
+    debt = np.maximum(500_000 - np.cumsum(np.abs(rng.normal(40, 30, length))), 0)
+    savings = np.cumsum(rng.normal(10, 50, length))
+    return days, debt, savings
+
+
+def main() -> None:
+    days, debt, savings = _series(10)
+    line_chart("Date", days, {"Debt": debt, "Savings": savings}).to_json()
+    print(f"{'points':>8} {'full payload':>14} {'full render':>12} {'downsampled':>12} {'render':>9}")
+    for length in LENGTHS:
+        days, debt, savings = _series(length)
+
+        start = time.perf_counter()
+        full = px.line(pd.DataFrame({"Date": days, "Debt": debt, "Savings": savings}), x="Date", y=["Debt", "Savings"])
+        full_json = full.to_json()
+        full_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        small = line_chart("Date", days, {"Debt": debt, "Savings": savings})
+        small_json = small.to_json()
+        small_time = time.perf_counter() - start
+
+        print(
+            f"{length:>8,} {len(full_json) / 1024:>11,.0f} KB {full_time * 1000:>9.0f} ms "
+            f"{len(small_json) / 1024:>9,.0f} KB {small_time * 1000:>6.0f} ms"
+        )
+    print(f"target: {CHART_POINTS} points per chart (MYFIN_CHART_POINTS)")
+
+
+if __name__ == "__main__":
+    main()
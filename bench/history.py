@@ -0,0 +1,73 @@
+from __future__ import annotations
+
+import sqlite3
+import tempfile
+import time
+from datetime import date
+from pathlib import Path
+
+from app.state import format_cents
+from core.money import format_cents_array
+from db.repository import Repository
+
+
+PAYMENTS = 1_000_000
+DAYS = 3_652
+FIRST_DAY = 14_610
+PAGE_SIZE = 100
+
+
+def _seed(db_path: Path) -> None:
+    conn = sqlite3.connect(str(db_path))
+    with conn:
+        conn.execute(
+            f"""
+            WITH RECURSIVE n(i) AS (SELECT 0 UNION ALL SELECT i + 1 FROM n WHERE i < {PAYMENTS - 1})
+            INSERT INTO payments (
+                payment_date, target_type, target_id, payment_amount_original, payment_currency,
+                payment_amount_cad, applied_penal, applied_interest, applied_principal
+            )
+            SELECT {FIRST_DAY} + i * {DAYS} / {PAYMENTS},
+                CASE WHEN i % 5 = 0 THEN 'credit_card' ELSE 'loan' END,
+                i % 50 + 1, 1500 + i % 997, 'CAD', 1500 + i % 997, 0, 500, 1000 + i % 997
+            FROM n
+            """
+        )
+    conn.close()
+
+
+def _timed(label: str, action):
+    start = time.perf_counter()
+    result = action()
+    print(f"{label:<44} {(time.perf_counter() - start) * 1000:9.1f} ms")
+    return result
+
+
+def main() -> None:
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = Path(tmp) / "history.db"
+        Repository(db_path).close()
+        _seed(db_path)
+        repo = Repository(db_path)
+        print(f"{PAYMENTS:,} payments, {PAGE_SIZE} rows per page")
+
+        frame = _timed("whole table (previous page)", repo.payments_frame)
+        _timed("format every row with format_cents", lambda: frame["payment_amount_cad"].map(format_cents))
+        _timed("format every row with format_cents_array", lambda: format_cents_array(frame["payment_amount_cad"]))
+
+        window = dict(start_date=date(2012, 1, 1), end_date=date(2012, 12, 31))
+        _timed("count all", repo.count_payments)
+        _timed("first page by date", lambda: repo.payment_page(limit=PAGE_SIZE))
+        _timed("page 5,000 by date", lambda: repo.payment_page(limit=PAGE_SIZE, offset=4_999 * PAGE_SIZE))
+        _timed("first page by amount", lambda: repo.payment_page(sort_by="payment_amount_cad", limit=PAGE_SIZE))
+        _timed("count one account in 2012", lambda: repo.count_payments("loan", 7, **window))
+        page = _timed(
+            "first page, one account in 2012",
+            lambda: repo.payment_page("loan", 7, **window, limit=PAGE_SIZE),
+        )
+        _timed("format one page", lambda: format_cents_array(page["payment_amount_cad"]))
+        repo.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+from __future__ import annotations
+
+import sqlite3
+import tempfile
+import time
+from pathlib import Path
+
+from db.repository import Repository
+
+
+DEBTS = 10_000
+PAYMENTS = 2_000_000
+
+
+def _seed(db_path: Path) -> None:
+    conn = sqlite3.connect(str(db_path))
+    with conn:
+        conn.execute(
+            f"""
+            WITH RECURSIVE n(i) AS (SELECT 1 UNION ALL SELECT i + 1 FROM n WHERE i < {DEBTS})
+            INSERT INTO debts (
+                lender_name, debt_type, original_currency, principal_original, principal_outstanding_cad,
+                interest_rate_annual, penal_rate_annual, loan_start_date, installment_amount,
+                installment_due_day, last_payment_date, status
+            )
+            SELECT 'Lender ' || i, 'Personal', 'CAD', 100000000, 100000000 - {PAYMENTS // DEBTS} * 9000
+                - CASE WHEN i % 100 = 0 THEN 1 ELSE 0 END,
+                0.1, 0.0, 18262, NULL, NULL, NULL, 'active'
+            FROM n
+            """
+        )
+        conn.execute(
+            f"""
+            WITH RECURSIVE n(i) AS (SELECT 0 UNION ALL SELECT i + 1 FROM n WHERE i < {PAYMENTS - 1})
+            INSERT INTO payments (
+                payment_date, target_type, target_id, payment_amount_original, payment_currency,
+                payment_amount_cad, applied_penal, applied_interest, applied_principal
+            )
+            SELECT 18262 + i / {DEBTS}, 'loan', i % {DEBTS} + 1, 10000, 'CAD', 10000, 0, 1000, 9000 FROM n
+            """
+        )
+    conn.close()
+
+
+def _python_loop(repo: Repository) -> int:
+    mismatches = 0
+    for debt in repo.list_debts():
+        applied = sum(p.applied_principal for p in repo.list_payments("loan", debt.id))
+        if round((debt.principal_original - applied) * 100) != round(debt.principal_outstanding_cad * 100):
+            mismatches += 1
+    return mismatches
+
+
+def main() -> None:
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = Path(tmp) / "ledger.db"
+        Repository(db_path).close()
+        start = time.perf_counter()
+        _seed(db_path)
+        print(f"Seeded {DEBTS:,} debts and {PAYMENTS:,} payments in {time.perf_counter() - start:.1f} s")
+
+        repo = Repository(db_path)
+        start = time.perf_counter()
+        mismatches = repo.reconcile_debt_principal()
+        print(f"window-function reconciliation  {time.perf_counter() - start:8.2f} s  {len(mismatches)} mismatches")
+
+        start = time.perf_counter()
+        count = _python_loop(repo)
+        print(f"per-debt Python loop            {time.perf_counter() - start:8.2f} s  {count} mismatches")
+        repo.close()
+
+
+if __name__ == "__main__":
+    main()
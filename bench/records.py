@@ -0,0 +1,87 @@
+from __future__ import annotations
+
+import gc
+import time
+import tracemalloc
+from dataclasses import dataclass
+from datetime import date
+from typing import Callable, List, Sequence, Tuple
+
+from core.money import from_cents
+from core.utils import from_epoch_day
+from db.repository import PaymentRecord, _payment_from_row
+
+
+COUNT = 1_000_000
+
+
+@dataclass(frozen=True)
+class DictPaymentRecord:
+    id: int
+    payment_date: date
+    target_type: str
+    target_id: int
+    payment_amount_original: float
+    payment_currency: str
+    payment_amount_cad: float
+    applied_penal: float
+    applied_interest: float
+    applied_principal: float
+
+
+def _rows(count: int) -> List[Tuple]:
+    return [
+        (i, 19737, "loan", i % 50, 12500, "CAD", 12500, 0, 1250, 11250)
+        for i in range(count)
+    ]
+
+
+def _decode(r: Tuple) -> Tuple:
+    return (
+        r[0],
+        from_epoch_day(r[1]),
+        r[2],
+        r[3],
+        from_cents(r[4]),
+        r[5],
+        from_cents(r[6]),
+        from_cents(r[7]),
+        from_cents(r[8]),
+        from_cents(r[9]),
+    )
+
+
+def _measure(label: str, build: Callable[[Sequence[Tuple]], list], rows: Sequence[Tuple]) -> None:
+    gc.collect()
+    start = time.perf_counter()
+    records = build(rows)
+    elapsed = time.perf_counter() - start
+    del records
+
+    gc.collect()
+    tracemalloc.start()
+    records = build(rows)
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del records
+    print(f"{label:<32} {elapsed:8.3f} s  {current / len(rows):8.1f} B/record")
+
+
+def main() -> None:
+    rows = _rows(COUNT)
+    print(f"Building {COUNT:,} payment records")
+    _measure(
+        "frozen dataclass (__dict__)",
+        lambda rs: [DictPaymentRecord(*_decode(r)) for r in rs],
+        rows,
+    )
+    _measure(
+        "slotted dataclass __init__",
+        lambda rs: [PaymentRecord(*_decode(r)) for r in rs],
+        rows,
+    )
+    _measure("slotted tuple constructor", lambda rs: list(map(_payment_from_row, rs)), rows)
+
+
+if __name__ == "__main__":
+    main()
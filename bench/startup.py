@@ -0,0 +1,86 @@
+from __future__ import annotations
+
+import os
+import re
+import shutil
+import subprocess
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+
+ROOT = Path(__file__).resolve().parents[1]
+TENANT = "bench-startup"
+HEAVY = ("numpy", "pandas", "pyarrow", "plotly")
+RUNS = 3
+IMPORT_LINE = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)$")
+
+RENDER = """
+from streamlit.testing.v1 import AppTest
+app = AppTest.from_file({path!r}, default_timeout=120)
+app.run()
+assert not app.exception, [e.value for e in app.exception]
+"""
+
+
+def _entrypoints() -> List[Path]:
+    return [ROOT / "app" / "main.py"] + sorted((ROOT / "app" / "pages").glob("*.py"))
+
+
+def parse_importtime(stderr: str) -> Tuple[int, Dict[str, int]]:
+    # -X importtime prints "self | cumulative | <indent>module" per import, children before parents.
+    total = 0
+    heavy: Dict[str, int] = {}
+    for line in stderr.splitlines():
+        match = IMPORT_LINE.match(line)
+        if match is None:
+            continue
+        self_us, cumulative_us, _, module = match.groups()
+        total += int(self_us)
+        if module in HEAVY:
+            heavy[module] = int(cumulative_us)
+    return total, heavy
+
+
+def _render(path: Path) -> Tuple[float, int, Dict[str, int]]:
+    env = dict(os.environ, MYFIN_TENANT=TENANT, MYFIN_TENANTS=TENANT, PYTHONDONTWRITEBYTECODE="1")
+    start = time.perf_counter()
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", RENDER.format(path=str(path))],
+        cwd=ROOT,
+        env=env,
+        capture_output=True,
+        text=True,
+    )
+    elapsed = time.perf_counter() - start
+    if completed.returncode != 0:
+        raise RuntimeError(f"{path.name} failed:\n{completed.stderr[-2000:]}")
+    total, heavy = parse_importtime(completed.stderr)
+    return elapsed, total, heavy
+
+
+def _cleanup(created: bool) -> None:
+    tenants = ROOT / "data" / "tenants"
+    for path in tenants.glob(f"{TENANT}.db*"):
+        path.unlink()
+    shutil.rmtree(tenants / "archive" / TENANT, ignore_errors=True)
+    if created:
+        shutil.rmtree(tenants, ignore_errors=True)
+
+
+def main() -> None:
+    created = not (ROOT / "data" / "tenants").exists()
+    print(f"cold render of each entrypoint in a fresh interpreter, best of {RUNS}")
+    print(f"{'entrypoint':<32} {'render':>8} {'imports':>9}  heavy modules (cumulative import ms)")
+    try:
+        for path in _entrypoints():
+            elapsed, total, heavy = min(_render(path) for _ in range(RUNS))
+            loaded = ", ".join(f"{name} {us / 1000:.0f}" for name, us in sorted(heavy.items())) or "-"
+            print(f"{path.name:<32} {elapsed * 1000:>5.0f} ms {total / 1000:>6.0f} ms  {loaded}")
+    finally:
+        _cleanup(created)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,129 @@
+from __future__ import annotations
+
+from typing import Dict, Mapping
+
+import numpy as np
+
+from core.money import accrue_cents_array
+
+
+DATE_DTYPE = "datetime64[D]"
+# Packs (account index, epoch day) into one sortable int64 key.
+ACCOUNT_STRIDE = np.int64(1) << 32
+
+
+def month_starts(first: np.datetime64, last: np.datetime64) -> np.ndarray:
+    months = np.arange(np.datetime64(first, "M"), np.datetime64(last, "M") + 1)
+    return months.astype(DATE_DTYPE)
+
+
+def missing_month_starts(existing: np.ndarray, first: np.datetime64, last: np.datetime64) -> np.ndarray:
+    months = month_starts(first, last)
+    covered = np.asarray(existing, dtype=DATE_DTYPE).astype("datetime64[M]").astype(DATE_DTYPE)
+    return months[~np.isin(months, covered)]
+
+
+def nearest_savings(
+    months: np.ndarray, snapshot_dates: np.ndarray, snapshot_savings: np.ndarray, current_cents: int
+) -> np.ndarray:
+    # Savings have no dated history: each month takes the savings of the nearest existing snapshot, or the
+    # current balances when there are no snapshots yet.
+    months = np.asarray(months, dtype=DATE_DTYPE)
+    if len(snapshot_dates) == 0:
+        return np.full(len(months), current_cents, dtype=np.int64)
+    order = np.argsort(snapshot_dates)
+    dates = np.asarray(snapshot_dates, dtype=DATE_DTYPE)[order].astype(np.int64)
+    savings = np.asarray(snapshot_savings, dtype=np.int64)[order]
+    day = months.astype(np.int64)
+    after = np.clip(np.searchsorted(dates, day), 0, len(dates) - 1)
+    before = np.clip(after - 1, 0, len(dates) - 1)
+    nearest = np.where(np.abs(dates[before] - day) <= np.abs(dates[after] - day), before, after)
+    return savings[nearest]
+
+
+def _account_index(ids: np.ndarray, target_ids: np.ndarray) -> np.ndarray:
+    if len(ids) == 0:
+        return np.full(len(target_ids), -1, dtype=np.int64)
+    order = np.argsort(ids)
+    position = np.clip(np.searchsorted(ids[order], target_ids), 0, len(ids) - 1)
+    return np.where(ids[order][position] == target_ids, order[position], -1)
+
+
+def _next_due(anchor: np.ndarray, due_day: np.ndarray) -> np.ndarray:
+    offset = np.nan_to_num(due_day, nan=1.0).astype(np.int64) - 1
+    month = anchor.astype("datetime64[M]")
+    candidate = month.astype(DATE_DTYPE) + offset
+    following = (month + 1).astype(DATE_DTYPE) + offset
+    return np.where(candidate <= anchor, following, candidate)
+
+
+def historical_totals(
+    months: np.ndarray,
+    debts: Mapping[str, np.ndarray],
+    cards: Mapping[str, np.ndarray],
+    payments: Mapping[str, np.ndarray],
+    savings_cents: np.ndarray,
+) -> Dict[str, np.ndarray]:
+    # Each account's balance at a month start is its current balance plus the principal paid on or after it;
+    # accrual then runs from the last payment before the month start, as compute_*_accrual does for today.
+    # Accounts count only from the month they are known to exist: loans from their start date, cards from the
+    # earlier of their statement date and first payment. Savings come in per month from nearest_savings.
+    months = np.asarray(months, dtype=DATE_DTYPE)
+    n_debts = len(debts["id"])
+    balance_now = np.concatenate([debts["principal_outstanding_cad"], cards["statement_balance_cad"]]).astype(np.int64)
+    rate = np.concatenate([debts["interest_rate_annual"], cards["interest_rate_annual"]])
+    anchor = np.concatenate([debts["loan_start_date"], cards["statement_date"]]).astype(DATE_DTYPE)
+    n_accounts = len(balance_now)
+
+    card = _account_index(cards["id"], payments["target_id"])
+    account = np.where(
+        payments["target_type"] == "loan",
+        _account_index(debts["id"], payments["target_id"]),
+        np.where((payments["target_type"] == "credit_card") & (card >= 0), card + n_debts, -1),
+    )
+    known = account >= 0
+    pay_day = payments["payment_date"][known].astype(np.int64)
+    keys = account[known].astype(np.int64) * ACCOUNT_STRIDE + pay_day
+    order = np.argsort(keys, kind="stable")
+    keys = keys[order]
+    pay_day = pay_day[order]
+    paid = np.concatenate([[0], np.cumsum(payments["applied_principal"][known][order], dtype=np.int64)])
+
+    accounts = np.arange(n_accounts, dtype=np.int64)
+    month_day = months.astype(np.int64)
+    first = np.searchsorted(keys, accounts * ACCOUNT_STRIDE)[:, None]
+    last = np.searchsorted(keys, (accounts + 1) * ACCOUNT_STRIDE)[:, None]
+    cut = np.searchsorted(keys, accounts[:, None] * ACCOUNT_STRIDE + month_day[None, :])
+
+    anchor_day = anchor.astype(np.int64)
+    first_paid = pay_day[np.minimum(first[:, 0], len(pay_day) - 1)] if len(pay_day) else anchor_day
+    opened_day = np.where(last[:, 0] > first[:, 0], np.minimum(anchor_day, first_paid), anchor_day)
+    opened_day[:n_debts] = anchor_day[:n_debts]
+    opened = opened_day[:, None] <= month_day[None, :]
+    balance = np.where(opened, balance_now[:, None] + paid[last] - paid[cut], 0)
+
+    has_prior = cut > first
+    prior_day = pay_day[np.maximum(cut - 1, 0)] if len(pay_day) else np.zeros_like(cut)
+    last_event = np.where(has_prior, prior_day, anchor_day[:, None])
+    days = np.maximum(month_day[None, :] - last_event, 0)
+    interest = accrue_cents_array(balance, rate[:, None], days)
+
+    due_day = debts["installment_due_day"]
+    debt_event = last_event[:n_debts].astype(DATE_DTYPE)
+    overdue = np.where(
+        np.isnan(due_day)[:, None],
+        0,
+        np.maximum(month_day[None, :] - _next_due(debt_event, due_day[:, None]).astype(np.int64), 0),
+    )
+    penal = accrue_cents_array(balance[:n_debts], debts["penal_rate_annual"][:, None], overdue)
+
+    total_interest = interest.sum(axis=0) + penal.sum(axis=0)
+    total_debt = balance.sum(axis=0) + total_interest
+    total_savings = np.asarray(savings_cents, dtype=np.int64)
+    return {
+        "snapshot_date": months,
+        "total_debt_cad": total_debt.astype(np.int64),
+        "total_interest_cad": total_interest.astype(np.int64),
+        "total_savings_cad": total_savings,
+        "net_position_cad": (total_savings - total_debt).astype(np.int64),
+    }
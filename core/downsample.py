@@ -0,0 +1,61 @@
+from __future__ import annotations
+
+from typing import Sequence
+
+import numpy as np
+
+
+MIN_POINTS = 3
+
+
+def _as_float(values: np.ndarray) -> np.ndarray:
+    values = np.asarray(values)
+    if np.issubdtype(values.dtype, np.datetime64):
+        return values.astype("datetime64[D]").astype(np.int64).astype(np.float64)
+    return values.astype(np.float64)
+
+
+def lttb_indices(x: np.ndarray, y: np.ndarray, threshold: int) -> np.ndarray:
+    # Largest-Triangle-Three-Buckets: keep the first and last points, then from each of threshold - 2 equal
+    # buckets keep the point forming the largest triangle with the previous pick and the next bucket's mean.
+    if threshold < MIN_POINTS:
+        raise ValueError(f"threshold must be at least {MIN_POINTS}")
+    xs = _as_float(x)
+    ys = _as_float(y)
+    n = len(xs)
+    if len(ys) != n:
+        raise ValueError("x and y must have the same length")
+    if n <= threshold:
+        return np.arange(n)
+
+    edges = np.linspace(1, n - 1, threshold - 1).astype(np.int64)
+    starts, ends = edges[:-1], edges[1:]
+    counts = ends - starts
+    sum_x = np.concatenate([[0.0], np.cumsum(xs)])
+    sum_y = np.concatenate([[0.0], np.cumsum(ys)])
+    next_x = np.append(((sum_x[ends] - sum_x[starts]) / counts)[1:], xs[-1])
+    next_y = np.append(((sum_y[ends] - sum_y[starts]) / counts)[1:], ys[-1])
+
+    # Each pick anchors the next bucket's triangles, so buckets are walked in order; the work inside a
+    # bucket is one array expression.
+    picked = np.empty(threshold, dtype=np.int64)
+    picked[0], picked[-1] = 0, n - 1
+    anchor = 0
+    for bucket in range(threshold - 2):
+        start, end = starts[bucket], ends[bucket]
+        ax, ay = xs[anchor], ys[anchor]
+        area = np.abs((ax - next_x[bucket]) * (ys[start:end] - ay) - (ax - xs[start:end]) * (next_y[bucket] - ay))
+        anchor = start + int(np.argmax(area))
+        picked[bucket + 1] = anchor
+    return picked
+
+
+def downsample_indices(x: np.ndarray, series: Sequence[np.ndarray], max_points: int) -> np.ndarray:
+    # Series drawn against one x axis share their rows; each gets an equal share of the point budget and
+    # the union of their picks is kept.
+    if not series:
+        raise ValueError("series must not be empty")
+    threshold = max(MIN_POINTS, max_points // len(series))
+    if len(x) <= threshold:
+        return np.arange(len(x))
+    return np.unique(np.concatenate([lttb_indices(x, y, threshold) for y in series]))
@@ -4,6 +4,7 @@ from dataclasses import dataclass
 from datetime import date
 from typing import Optional
 
+from core.money import accrue_cents, from_cents, to_cents
 from core.utils import days_between, next_due_date
 
 
@@ -23,10 +24,6 @@ class CreditCardAccrual:
     overdue_days: int
 
 
-def _daily_rate(annual_rate: float) -> float:
-    return max(0.0, annual_rate) / 365.0
-
-
 def compute_debt_overdue_days(
     as_of: date,
     installment_due_day: Optional[int],
@@ -52,9 +49,9 @@ def compute_debt_accrual(
     if days == 0 or principal_outstanding_cad <= 0:
         return DebtAccrual(0.0, 0.0, 0, overdue_days)
 
-    interest = principal_outstanding_cad * _daily_rate(interest_rate_annual) * days
-    penal_days = max(0, overdue_days)
-    penal = principal_outstanding_cad * _daily_rate(penal_rate_annual) * penal_days
+    principal_cents = to_cents(principal_outstanding_cad)
+    interest = from_cents(accrue_cents(principal_cents, interest_rate_annual, days))
+    penal = from_cents(accrue_cents(principal_cents, penal_rate_annual, max(0, overdue_days)))
     return DebtAccrual(interest, penal, days, overdue_days)
 
 
@@ -74,7 +71,7 @@ def compute_credit_card_accrual(
     if days == 0 or statement_balance_cad <= 0:
         return CreditCardAccrual(0.0, 0.0, 0, compute_credit_card_overdue_days(as_of, due_date))
 
-    interest = statement_balance_cad * _daily_rate(interest_rate_annual) * days
+    interest = from_cents(accrue_cents(to_cents(statement_balance_cad), interest_rate_annual, days))
     overdue_days = compute_credit_card_overdue_days(as_of, due_date)
     late_fee = flat_late_fee_cad if overdue_days > 0 else 0.0
     return CreditCardAccrual(interest, late_fee, days, overdue_days)
@@ -0,0 +1,82 @@
+from __future__ import annotations
+
+from typing import TYPE_CHECKING, Optional, Sequence
+
+if TYPE_CHECKING:
+    import numpy as np
+
+
+CENTS_PER_UNIT = 100
+
+
+# Rounding is half-to-even on the float64 product everywhere (round() here, np.rint in the
+# array helpers), so scalar and vectorized paths produce the same cents for the same input.
+def to_cents(amount: Optional[float]) -> Optional[int]:
+    if amount is None:
+        return None
+    return int(round(amount * CENTS_PER_UNIT))
+
+
+def from_cents(cents: Optional[int]) -> Optional[float]:
+    if cents is None:
+        return None
+    return cents / CENTS_PER_UNIT
+
+
+def round_to_cent(amount: float) -> float:
+    return round(amount * CENTS_PER_UNIT) / CENTS_PER_UNIT
+
+
+def accrue_cents(balance_cents: int, annual_rate: float, days: int) -> int:
+    if balance_cents <= 0 or days <= 0:
+        return 0
+    return int(round(balance_cents * (max(0.0, annual_rate) / 365.0) * days))
+
+
+def cents_array(amounts: Sequence[float]) -> np.ndarray:
+    import numpy as np
+
+    return np.rint(np.asarray(amounts, dtype=np.float64) * CENTS_PER_UNIT).astype(np.int64)
+
+
+def accrue_cents_array(balance_cents: np.ndarray, annual_rate: np.ndarray, days: np.ndarray) -> np.ndarray:
+    import numpy as np
+
+    balance = np.asarray(balance_cents, dtype=np.int64)
+    accrued = np.rint(balance * (np.maximum(np.asarray(annual_rate, dtype=np.float64), 0.0) / 365.0) * days)
+    return np.where((balance > 0) & (np.asarray(days) > 0), accrued, 0).astype(np.int64)
+
+
+def dollars_array(cents: np.ndarray) -> np.ndarray:
+    import numpy as np
+
+    return np.asarray(cents, dtype=np.int64) / CENTS_PER_UNIT
+
+
+def format_cents_array(cents: np.ndarray) -> np.ndarray:
+    # Same text as app.state.format_cents: characters are written into a byte matrix one digit place at a
+    # time across the whole column, and the NUL padding after each row is dropped by the bytes dtype.
+    import numpy as np
+
+    values = np.asarray(cents, dtype=np.int64).ravel()
+    units, remainder = np.divmod(np.abs(values), CENTS_PER_UNIT)
+    digits = np.searchsorted(10 ** np.arange(19, dtype=np.int64), units, side="right").clip(1)
+    negative = (values < 0).astype(np.int64)
+    integer_end = negative + digits + (digits - 1) // 3
+    width = int(integer_end.max(initial=0)) + 3
+    chars = np.zeros((len(values), width), dtype=np.uint8)
+    rows = np.arange(len(values))
+    chars[rows, 0] = np.where(negative == 1, ord("-"), 0)
+    place = units.copy()
+    for k in range(int(digits.max(initial=0))):
+        written = k < digits
+        column = integer_end - 1 - k - k // 3
+        chars[rows[written], column[written]] = ord("0") + place[written] % 10
+        place //= 10
+        if k % 3 == 2:
+            comma = k + 1 < digits
+            chars[rows[comma], column[comma] - 1] = ord(",")
+    chars[rows, integer_end] = ord(".")
+    chars[rows, integer_end + 1] = ord("0") + remainder // 10
+    chars[rows, integer_end + 2] = ord("0") + remainder % 10
+    return chars.view(f"S{width}").ravel().astype(str).astype(object)
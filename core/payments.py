@@ -3,7 +3,10 @@ from __future__ import annotations
 from dataclasses import dataclass
 from typing import Iterable, List, Mapping
 
-from core.utils import clamp
+from core.money import from_cents, to_cents
+
+
+STRATEGIES = ("risk", "avalanche", "snowball")
 
 
 @dataclass(frozen=True)
@@ -14,23 +17,49 @@ class PaymentResult:
     remaining_amount: float
 
 
-def apply_payment_waterfall(
-    amount_cad: float,
-    penal_due_cad: float,
-    interest_due_cad: float,
-    principal_due_cad: float,
-) -> PaymentResult:
-    amount = max(0.0, amount_cad)
-    penal = min(amount, max(0.0, penal_due_cad))
+@dataclass(frozen=True)
+class PaymentCents:
+    applied_penal: int
+    applied_interest: int
+    applied_principal: int
+    remaining_amount: int
+
+
+def apply_payment_waterfall_cents(
+    amount_cents: int,
+    penal_due_cents: int,
+    interest_due_cents: int,
+    principal_due_cents: int,
+) -> PaymentCents:
+    amount = max(0, amount_cents)
+    penal = min(amount, max(0, penal_due_cents))
     amount -= penal
 
-    interest = min(amount, max(0.0, interest_due_cad))
+    interest = min(amount, max(0, interest_due_cents))
     amount -= interest
 
-    principal = min(amount, max(0.0, principal_due_cad))
+    principal = min(amount, max(0, principal_due_cents))
     amount -= principal
 
-    return PaymentResult(penal, interest, principal, amount)
+    return PaymentCents(penal, interest, principal, amount)
+
+
+def apply_payment_waterfall(
+    amount_cad: float,
+    penal_due_cad: float,
+    interest_due_cad: float,
+    principal_due_cad: float,
+) -> PaymentResult:
+    # Every input is rounded to whole cents first, so the buckets always add back up to the payment.
+    result = apply_payment_waterfall_cents(
+        to_cents(amount_cad), to_cents(penal_due_cad), to_cents(interest_due_cad), to_cents(principal_due_cad)
+    )
+    return PaymentResult(
+        from_cents(result.applied_penal),
+        from_cents(result.applied_interest),
+        from_cents(result.applied_principal),
+        from_cents(result.remaining_amount),
+    )
 
 
 def recommend_payment_allocations(
@@ -39,7 +68,8 @@ def recommend_payment_allocations(
     strategy: str = "risk",
     min_emergency_savings_cad: float = 0.0,
 ) -> List[dict]:
-    budget = clamp(available_cad - max(0.0, min_emergency_savings_cad), 0.0, available_cad)
+    available = to_cents(available_cad)
+    budget = min(max(0, available - max(0, to_cents(min_emergency_savings_cad))), available)
     if budget <= 0:
         return []
 
@@ -59,13 +89,13 @@ def recommend_payment_allocations(
     for item in sorted(candidates, key=key, reverse=reverse):
         if budget <= 0:
             break
-        amount = min(budget, float(item["balance_cad"]))
+        amount = min(budget, to_cents(float(item["balance_cad"])))
         budget -= amount
         allocations.append(
             {
                 "target_type": item["target_type"],
                 "target_id": item["target_id"],
-                "amount_cad": amount,
+                "amount_cad": from_cents(amount),
                 "strategy": strategy,
             }
         )
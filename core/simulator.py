@@ -2,9 +2,10 @@ from __future__ import annotations
 
 from dataclasses import dataclass
 from datetime import date, timedelta
-from typing import Dict, Iterable, List, Optional, Tuple
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
 
-from core.payments import apply_payment_waterfall, recommend_payment_allocations
+from core.money import accrue_cents, from_cents, to_cents
+from core.payments import apply_payment_waterfall_cents, recommend_payment_allocations
 from core.risk import compute_credit_card_risk, compute_debt_risk
 from core.utils import clamp
 from models.types import CreditCard, Debt
@@ -30,14 +31,15 @@ class SimulationResult:
 class _AccountState:
     target_type: str
     target_id: int
-    balance_cad: float
+    balance_cents: int
     interest_rate_annual: float
     penal_rate_annual: float
     currency: str
-    credit_limit_cad: float
+    credit_limit_cents: int
     due_day: Optional[int]
-    accrued_interest_cad: float = 0.0
-    accrued_penal_cad: float = 0.0
+    late_fee_cents: int = 0
+    accrued_interest_cents: int = 0
+    accrued_penal_cents: int = 0
 
 
 def _first_of_month(value: date) -> date:
@@ -56,10 +58,6 @@ def _days_between(start: date, end: date) -> int:
     return (end - start).days
 
 
-def _daily_rate(annual_rate: float) -> float:
-    return max(0.0, annual_rate) / 365.0
-
-
 def _period_due_date(period_start: date, due_day: Optional[int]) -> Optional[date]:
     if due_day is None:
         return None
@@ -69,11 +67,10 @@ def _period_due_date(period_start: date, due_day: Optional[int]) -> Optional[dat
 
 def _accrue_month(state: _AccountState, period_start: date, period_end: date) -> Tuple[int, int]:
     days = _days_between(period_start, period_end)
-    if days <= 0 or state.balance_cad <= 0:
+    if days <= 0 or state.balance_cents <= 0:
         return 0, 0
 
-    interest = state.balance_cad * _daily_rate(state.interest_rate_annual) * days
-    state.accrued_interest_cad += interest
+    state.accrued_interest_cents += accrue_cents(state.balance_cents, state.interest_rate_annual, days)
 
     overdue_days = 0
     due_date = _period_due_date(period_start, state.due_day)
@@ -82,16 +79,15 @@ def _accrue_month(state: _AccountState, period_start: date, period_end: date) ->
 
     if overdue_days > 0:
         if state.target_type == "loan":
-            penal = state.balance_cad * _daily_rate(state.penal_rate_annual) * overdue_days
-            state.accrued_penal_cad += penal
+            state.accrued_penal_cents += accrue_cents(state.balance_cents, state.penal_rate_annual, overdue_days)
         else:
-            state.accrued_penal_cad += state.penal_rate_annual
+            state.accrued_penal_cents += state.late_fee_cents
 
     return days, overdue_days
 
 
-def _total_balance(states: Iterable[_AccountState]) -> float:
-    return sum(s.balance_cad + s.accrued_interest_cad + s.accrued_penal_cad for s in states)
+def _total_balance(states: Iterable[_AccountState]) -> int:
+    return sum(s.balance_cents + s.accrued_interest_cents + s.accrued_penal_cents for s in states)
 
 
 def simulate_payoff(
@@ -101,6 +97,7 @@ def simulate_payoff(
     monthly_payment_cad: float,
     strategy: str,
     max_months: int = 600,
+    on_row: Optional[Callable[[SimulationRow], None]] = None,
 ) -> SimulationResult:
     states: List[_AccountState] = []
     for debt in debts:
@@ -108,11 +105,11 @@ def simulate_payoff(
             _AccountState(
                 target_type="loan",
                 target_id=debt.id,
-                balance_cad=debt.principal_outstanding_cad,
+                balance_cents=to_cents(debt.principal_outstanding_cad),
                 interest_rate_annual=debt.interest_rate_annual,
                 penal_rate_annual=debt.penal_rate_annual,
                 currency=debt.original_currency,
-                credit_limit_cad=0.0,
+                credit_limit_cents=0,
                 due_day=debt.installment_due_day,
             )
         )
@@ -121,17 +118,18 @@ def simulate_payoff(
             _AccountState(
                 target_type="credit_card",
                 target_id=card.id,
-                balance_cad=card.statement_balance_cad,
+                balance_cents=to_cents(card.statement_balance_cad),
                 interest_rate_annual=card.interest_rate_annual,
-                penal_rate_annual=card.flat_late_fee_cad,
+                penal_rate_annual=0.0,
                 currency="CAD",
-                credit_limit_cad=card.credit_limit_cad,
+                credit_limit_cents=to_cents(card.credit_limit_cad),
                 due_day=card.due_date.day,
+                late_fee_cents=to_cents(card.flat_late_fee_cad),
             )
         )
 
     timeline: List[SimulationRow] = []
-    total_interest_paid = 0.0
+    total_interest_paid = 0
     period_start = _first_of_month(start_date)
 
     for month_index in range(max_months):
@@ -147,55 +145,55 @@ def simulate_payoff(
             return SimulationResult(
                 strategy=strategy,
                 debt_free_date=debt_free_date,
-                total_interest_paid_cad=total_interest_paid,
+                total_interest_paid_cad=from_cents(total_interest_paid),
                 months=month_index,
                 timeline=timeline,
             )
 
-        payment_budget = max(0.0, monthly_payment_cad)
+        payment_budget = max(0, to_cents(monthly_payment_cad))
         if payment_budget > 0:
             items = []
             for state in states:
-                if state.balance_cad <= 0 and state.accrued_interest_cad <= 0 and state.accrued_penal_cad <= 0:
+                if state.balance_cents <= 0 and state.accrued_interest_cents <= 0 and state.accrued_penal_cents <= 0:
                     continue
                 if state.target_type == "loan":
                     risk = compute_debt_risk(
                         interest_rate_annual=state.interest_rate_annual,
                         overdue_days=overdue_by_account.get(state.target_id, 0),
-                        has_penal=state.accrued_penal_cad > 0,
+                        has_penal=state.accrued_penal_cents > 0,
                         original_currency=state.currency,
                     )
                     items.append(
                         {
                             "target_type": state.target_type,
                             "target_id": state.target_id,
-                            "balance_cad": state.balance_cad,
+                            "balance_cad": from_cents(state.balance_cents),
                             "interest_rate_annual": state.interest_rate_annual,
                             "risk_score": risk.score,
                         }
                     )
                 else:
                     util = 0.0
-                    if state.credit_limit_cad > 0:
-                        util = state.balance_cad / state.credit_limit_cad
+                    if state.credit_limit_cents > 0:
+                        util = state.balance_cents / state.credit_limit_cents
                     risk = compute_credit_card_risk(
                         interest_rate_annual=state.interest_rate_annual,
                         overdue_days=overdue_by_account.get(state.target_id, 0),
                         utilization=util,
-                        has_late_fee=state.accrued_penal_cad > 0,
+                        has_late_fee=state.accrued_penal_cents > 0,
                     )
                     items.append(
                         {
                             "target_type": state.target_type,
                             "target_id": state.target_id,
-                            "balance_cad": state.balance_cad,
+                            "balance_cad": from_cents(state.balance_cents),
                             "interest_rate_annual": state.interest_rate_annual,
                             "risk_score": risk.score,
                         }
                     )
 
             allocations = recommend_payment_allocations(
-                available_cad=payment_budget,
+                available_cad=from_cents(payment_budget),
                 items=items,
                 strategy=strategy,
             )
@@ -206,32 +204,33 @@ def simulate_payoff(
                     for s in states
                     if s.target_type == allocation["target_type"] and s.target_id == allocation["target_id"]
                 )
-                result = apply_payment_waterfall(
-                    amount_cad=allocation["amount_cad"],
-                    penal_due_cad=state.accrued_penal_cad,
-                    interest_due_cad=state.accrued_interest_cad,
-                    principal_due_cad=state.balance_cad,
+                result = apply_payment_waterfall_cents(
+                    amount_cents=to_cents(allocation["amount_cad"]),
+                    penal_due_cents=state.accrued_penal_cents,
+                    interest_due_cents=state.accrued_interest_cents,
+                    principal_due_cents=state.balance_cents,
                 )
                 total_interest_paid += result.applied_penal + result.applied_interest
-                state.accrued_penal_cad = max(0.0, state.accrued_penal_cad - result.applied_penal)
-                state.accrued_interest_cad = max(0.0, state.accrued_interest_cad - result.applied_interest)
-                state.balance_cad = max(0.0, state.balance_cad - result.applied_principal)
+                state.accrued_penal_cents -= result.applied_penal
+                state.accrued_interest_cents -= result.applied_interest
+                state.balance_cents -= result.applied_principal
 
         total_debt = _total_balance(states)
-        timeline.append(
-            SimulationRow(
-                as_of=period_end - timedelta(days=1),
-                total_debt_cad=total_debt,
-                total_interest_paid_cad=total_interest_paid,
-            )
+        row = SimulationRow(
+            as_of=period_end - timedelta(days=1),
+            total_debt_cad=from_cents(total_debt),
+            total_interest_paid_cad=from_cents(total_interest_paid),
         )
+        timeline.append(row)
+        if on_row is not None:
+            on_row(row)
 
         period_start = period_end
 
     return SimulationResult(
         strategy=strategy,
         debt_free_date=None,
-        total_interest_paid_cad=total_interest_paid,
+        total_interest_paid_cad=from_cents(total_interest_paid),
         months=max_months,
         timeline=timeline,
     )
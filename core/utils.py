@@ -1,10 +1,11 @@
 from __future__ import annotations
 
-from datetime import date, datetime, timedelta
+from datetime import date, timedelta
 from typing import Optional
 
 
 DATE_FMT = "%Y-%m-%d"
+EPOCH_ORDINAL = date(1970, 1, 1).toordinal()
 
 
 def parse_date(value: Optional[str]) -> Optional[date]:
@@ -12,13 +13,25 @@ def parse_date(value: Optional[str]) -> Optional[date]:
         return None
     if isinstance(value, date):
         return value
-    return datetime.strptime(value, DATE_FMT).date()
+    return date.fromisoformat(value)
 
 
 def format_date(value: date) -> str:
     return value.strftime(DATE_FMT)
 
 
+def to_epoch_day(value: Optional[date]) -> Optional[int]:
+    if value is None:
+        return None
+    return value.toordinal() - EPOCH_ORDINAL
+
+
+def from_epoch_day(value: Optional[int]) -> Optional[date]:
+    if value is None:
+        return None
+    return date.fromordinal(value + EPOCH_ORDINAL)
+
+
 def days_between(start: date, end: date) -> int:
     if end <= start:
         return 0
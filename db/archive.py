@@ -0,0 +1,137 @@
+from __future__ import annotations
+
+import re
+import sqlite3
+from contextlib import contextmanager
+from datetime import date
+from pathlib import Path
+from typing import Iterable, Iterator, List, Sequence, Tuple
+
+from core.utils import to_epoch_day
+from db.migrations import SCHEMA_VERSION, migrate
+
+
+# SQLite's default SQLITE_MAX_ATTACHED is 10; leave room for temp views over main.
+MAX_ATTACHED = 9
+# Archives were introduced at schema version 1 and did not record a user_version before 2.
+ARCHIVE_BASE_VERSION = 1
+ARCHIVE_VIEW = "payments_history"
+
+
+def archive_schema(year: int) -> str:
+    return f"archive_{year}"
+
+
+def year_bounds(year: int) -> Tuple[int, int]:
+    return to_epoch_day(date(year, 1, 1)), to_epoch_day(date(year + 1, 1, 1))
+
+
+def batched(years: Sequence[int], size: int = MAX_ATTACHED) -> Iterator[List[int]]:
+    for start in range(0, len(years), size):
+        yield list(years[start : start + size])
+
+
+def _copy_database(source: Path, target: Path) -> None:
+    source_conn = sqlite3.connect(f"file:{source}?mode=ro", uri=True)
+    target_conn = sqlite3.connect(str(target))
+    try:
+        source_conn.backup(target_conn)
+    finally:
+        target_conn.close()
+        source_conn.close()
+
+
+def _create_indexes(conn: sqlite3.Connection, schema: str) -> None:
+    conn.execute(f"DROP INDEX IF EXISTS {schema}.idx_payments_target")
+    conn.execute(
+        f"CREATE INDEX IF NOT EXISTS {schema}.idx_payments_target_date "
+        "ON payments (target_type, target_id, payment_date, applied_principal)"
+    )
+    conn.execute(f"CREATE INDEX IF NOT EXISTS {schema}.idx_payments_date ON payments (payment_date)")
+
+
+class PaymentArchive:
+    def __init__(self, archive_dir: Path, read_only: bool = False) -> None:
+        self.archive_dir = archive_dir
+        self.read_only = read_only
+
+    def path_for(self, year: int) -> Path:
+        return self.archive_dir / f"payments-{year}.db"
+
+    def existing_years(self, years: Iterable[int]) -> List[int]:
+        return [year for year in years if self.path_for(year).exists()]
+
+    def backup_to(self, target_dir: Path) -> None:
+        target_dir.mkdir(parents=True, exist_ok=True)
+        if not self.archive_dir.exists():
+            return
+        for path in sorted(self.archive_dir.glob("payments-*.db")):
+            _copy_database(path, target_dir / path.name)
+
+    def restore_from(self, source_dir: Path) -> None:
+        if self.read_only:
+            raise ValueError(f"Payment archive at {self.archive_dir} is read-only")
+        restored = sorted(path.name for path in source_dir.glob("payments-*.db"))
+        self.archive_dir.mkdir(parents=True, exist_ok=True)
+        for path in self.archive_dir.glob("payments-*.db"):
+            if path.name not in restored:
+                path.unlink()
+        for name in restored:
+            _copy_database(source_dir / name, self.archive_dir / name)
+
+    def migrate(self) -> None:
+        if self.read_only or not self.archive_dir.exists():
+            return
+        for path in sorted(self.archive_dir.glob("payments-*.db")):
+            conn = sqlite3.connect(str(path), isolation_level=None)
+            try:
+                version = max(conn.execute("PRAGMA user_version").fetchone()[0], ARCHIVE_BASE_VERSION)
+                if version < SCHEMA_VERSION:
+                    migrate(conn, version)
+                    _create_indexes(conn, "main")
+            finally:
+                conn.close()
+
+    def _attach(self, conn: sqlite3.Connection, year: int, writable: bool) -> None:
+        path = self.path_for(year)
+        schema = archive_schema(year)
+        if not writable:
+            conn.execute(f"ATTACH DATABASE ? AS {schema}", (f"file:{path}?mode=ro",))
+            return
+        self.archive_dir.mkdir(parents=True, exist_ok=True)
+        conn.execute(f"ATTACH DATABASE ? AS {schema}", (str(path),))
+        table_sql = conn.execute(
+            "SELECT sql FROM main.sqlite_master WHERE type = 'table' AND name = 'payments'"
+        ).fetchone()[0]
+        conn.execute(
+            re.sub(r"^CREATE TABLE\s+\"?payments\"?", f"CREATE TABLE IF NOT EXISTS {schema}.payments", table_sql)
+        )
+        _create_indexes(conn, schema)
+        conn.execute(f"PRAGMA {schema}.user_version = {SCHEMA_VERSION}")
+
+    @contextmanager
+    def attached(
+        self, conn: sqlite3.Connection, years: Iterable[int], writable: bool = False
+    ) -> Iterator[List[str]]:
+        if writable and self.read_only:
+            raise ValueError(f"Payment archive at {self.archive_dir} is read-only")
+        schemas: List[str] = []
+        try:
+            for year in years:
+                self._attach(conn, year, writable)
+                schemas.append(archive_schema(year))
+            yield schemas
+        finally:
+            conn.execute(f"DROP VIEW IF EXISTS temp.{ARCHIVE_VIEW}")
+            for schema in schemas:
+                conn.execute(f"DETACH DATABASE {schema}")
+
+    def create_history_view(self, conn: sqlite3.Connection, schemas: Sequence[str], include_hot: bool) -> None:
+        # Archived ids that are also hot (an interrupted move, or a restored main file) are read from main.
+        parts = ["SELECT * FROM main.payments"] if include_hot else []
+        parts.extend(
+            f"SELECT * FROM {schema}.payments WHERE id NOT IN (SELECT id FROM main.payments)"
+            for schema in schemas
+        )
+        conn.execute(f"DROP VIEW IF EXISTS temp.{ARCHIVE_VIEW}")
+        conn.execute(f"CREATE TEMP VIEW {ARCHIVE_VIEW} AS {' UNION ALL '.join(parts)}")
@@ -0,0 +1,19 @@
+from __future__ import annotations
+
+from datetime import date
+from pathlib import Path
+
+from db.repository import Repository
+from services.backfill import backfill_monthly_snapshots
+
+
+def main() -> None:
+    root = Path(__file__).resolve().parents[1]
+    db_path = root / "data" / "finance.db"
+    repo = Repository(db_path)
+    added = backfill_monthly_snapshots(repo, date.today())
+    print(f"Backfilled {added} missing monthly snapshots at {db_path}")
+
+
+if __name__ == "__main__":
+    main()
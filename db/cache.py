@@ -0,0 +1,70 @@
+from __future__ import annotations
+
+import threading
+from typing import Callable, Dict, Hashable, Iterable, Optional, Set, Tuple, TypeVar
+
+
+T = TypeVar("T")
+
+ChangedTables = Callable[[Optional[int]], Tuple[Set[str], int]]
+
+
+class RepositoryCache:
+    def __init__(
+        self,
+        tables: Iterable[str],
+        data_version: Callable[[], int],
+        changed_tables: Optional[ChangedTables] = None,
+    ) -> None:
+        self._lock = threading.Lock()
+        self._data_version = data_version
+        self._changed_tables = changed_tables
+        self._seen_data_version = data_version()
+        self._seen_change_seq: Optional[int] = None
+        self._versions: Dict[str, int] = {table: 0 for table in tables}
+        self._entries: Dict[Tuple[str, Hashable], Tuple[int, object]] = {}
+
+    def get(self, table: str, key: Hashable, loader: Callable[[], T]) -> T:
+        self._check_external_writes()
+        with self._lock:
+            version = self._versions[table]
+            entry = self._entries.get((table, key))
+            if entry is not None and entry[0] == version:
+                return entry[1]
+
+        value = loader()
+        with self._lock:
+            if self._versions[table] == version:
+                self._entries[(table, key)] = (version, value)
+        return value
+
+    def invalidate(self, *tables: str) -> None:
+        with self._lock:
+            for table in tables:
+                if table in self._versions:
+                    self._bump(table)
+
+    def version(self, table: str) -> int:
+        self._check_external_writes()
+        with self._lock:
+            return self._versions[table]
+
+    def _bump(self, table: str) -> None:
+        self._versions[table] += 1
+        for entry_key in [k for k in self._entries if k[0] == table]:
+            del self._entries[entry_key]
+
+    def _check_external_writes(self) -> None:
+        data_version = self._data_version()
+        if data_version == self._seen_data_version:
+            return
+        changed: Optional[Set[str]] = None
+        change_seq: Optional[int] = None
+        if self._changed_tables is not None:
+            changed, change_seq = self._changed_tables(self._seen_change_seq)
+        with self._lock:
+            self._seen_data_version = data_version
+            self._seen_change_seq = change_seq
+            for table in self._versions:
+                if changed is None or table in changed:
+                    self._bump(table)
@@ -0,0 +1,115 @@
+from __future__ import annotations
+
+import sqlite3
+from typing import TYPE_CHECKING, Dict, Mapping, Sequence, Tuple
+
+from db.connection import fetch_rows
+
+if TYPE_CHECKING:
+    import numpy as np
+    import pandas as pd
+
+
+DATE_DTYPE = "datetime64[D]"
+# Money columns carry integer cents, exactly as stored (nullable ones as float64 cents). Dtypes are
+# named rather than numpy objects so that importing the schema does not import numpy.
+MONEY_DTYPE = "int64"
+
+PAYMENT_COLUMNS: Dict[str, object] = {
+    "id": "int64",
+    "payment_date": DATE_DTYPE,
+    "target_type": object,
+    "target_id": "int64",
+    "payment_amount_original": MONEY_DTYPE,
+    "payment_currency": object,
+    "payment_amount_cad": MONEY_DTYPE,
+    "applied_penal": MONEY_DTYPE,
+    "applied_interest": MONEY_DTYPE,
+    "applied_principal": MONEY_DTYPE,
+}
+
+MONTHLY_SNAPSHOT_COLUMNS: Dict[str, object] = {
+    "snapshot_date": DATE_DTYPE,
+    "total_debt_cad": MONEY_DTYPE,
+    "total_interest_cad": MONEY_DTYPE,
+    "total_savings_cad": MONEY_DTYPE,
+    "net_position_cad": MONEY_DTYPE,
+}
+
+DEBT_COLUMNS: Dict[str, object] = {
+    "id": "int64",
+    "lender_name": object,
+    "debt_type": object,
+    "original_currency": object,
+    "principal_original": MONEY_DTYPE,
+    "principal_outstanding_cad": MONEY_DTYPE,
+    "interest_rate_annual": "float64",
+    "penal_rate_annual": "float64",
+    "loan_start_date": DATE_DTYPE,
+    "installment_amount": "float64",
+    "installment_due_day": "float64",
+    "last_payment_date": DATE_DTYPE,
+    "status": object,
+}
+
+CREDIT_CARD_COLUMNS: Dict[str, object] = {
+    "id": "int64",
+    "bank_name": object,
+    "card_name": object,
+    "credit_limit_cad": MONEY_DTYPE,
+    "statement_balance_cad": MONEY_DTYPE,
+    "interest_rate_annual": "float64",
+    "statement_date": DATE_DTYPE,
+    "due_date": DATE_DTYPE,
+    "last_payment_date": DATE_DTYPE,
+    "flat_late_fee_cad": MONEY_DTYPE,
+    "status": object,
+}
+
+SAVINGS_COLUMNS: Dict[str, object] = {
+    "id": "int64",
+    "account_name": object,
+    "currency": object,
+    "balance_cad": MONEY_DTYPE,
+}
+
+
+def epoch_days_to_datetime64(values: Sequence[object]) -> np.ndarray:
+    import numpy as np
+
+    return np.array(values, dtype=DATE_DTYPE)
+
+
+def datetime64_to_epoch_days(values: np.ndarray) -> np.ndarray:
+    import numpy as np
+
+    return np.asarray(values, dtype=DATE_DTYPE).astype(np.int64)
+
+
+def select_list(columns: Mapping[str, object]) -> str:
+    return ", ".join(columns)
+
+
+def fetch_columns(
+    conn: sqlite3.Connection,
+    query: str,
+    params: Sequence[object],
+    columns: Mapping[str, object],
+) -> Dict[str, np.ndarray]:
+    return columns_from_rows(fetch_rows(conn, query, params), columns)
+
+
+def columns_from_rows(rows: Sequence[Tuple], columns: Mapping[str, object]) -> Dict[str, np.ndarray]:
+    import numpy as np
+
+    values = list(zip(*rows)) if rows else [()] * len(columns)
+    return {
+        name: epoch_days_to_datetime64(column) if dtype == DATE_DTYPE else np.array(column, dtype=dtype)
+        for (name, dtype), column in zip(columns.items(), values)
+    }
+
+
+def to_frame(columns: Mapping[str, np.ndarray]) -> pd.DataFrame:
+    import pandas as pd
+
+    return pd.DataFrame(dict(columns), copy=False)
@@ -1,20 +1,163 @@
 from __future__ import annotations
 
+import queue
+import random
 import sqlite3
+import threading
+import time
+from contextlib import contextmanager
 from pathlib import Path
-from typing import Iterable
+from typing import Callable, Iterable, Iterator, List, Optional, Sequence, Tuple, Union
+
+from db.migrations import apply_migrations
 
 
 DEFAULT_DB_NAME = "finance.db"
+BUSY_TIMEOUT_MS = 5000
+
+
+def memory_database_uri(name: str) -> str:
+    return f"file:{name}?mode=memory&cache=shared"
 
 
-def get_connection(db_path: Path) -> sqlite3.Connection:
-    conn = sqlite3.connect(str(db_path))
+def get_connection(db_path: Union[Path, str], check_same_thread: bool = True) -> sqlite3.Connection:
+    database = str(db_path)
+    conn = sqlite3.connect(database, check_same_thread=check_same_thread, uri=True)
     conn.row_factory = sqlite3.Row
     conn.execute("PRAGMA foreign_keys = ON;")
+    conn.execute(f"PRAGMA busy_timeout = {BUSY_TIMEOUT_MS};")
     return conn
 
 
+def is_busy_error(exc: sqlite3.OperationalError) -> bool:
+    message = str(exc).lower()
+    return "locked" in message or "busy" in message
+
+
+class ConnectionPool:
+    def __init__(
+        self,
+        db_path: Union[Path, str],
+        readers: int = 4,
+        write_retries: int = 5,
+        retry_backoff: float = 0.05,
+    ) -> None:
+        self.db_path = db_path
+        self.write_retries = write_retries
+        self.retry_backoff = retry_backoff
+        self._write_lock = threading.RLock()
+        self._writer = get_connection(db_path, check_same_thread=False)
+        self._writer.isolation_level = None
+        self._readers: "queue.LifoQueue[sqlite3.Connection]" = queue.LifoQueue(maxsize=readers)
+        self._data_version = self._read_data_version()
+
+    def _open_reader(self) -> sqlite3.Connection:
+        conn = get_connection(self.db_path, check_same_thread=False)
+        conn.isolation_level = None
+        conn.execute("PRAGMA query_only = ON;")
+        return conn
+
+    @contextmanager
+    def read(self) -> Iterator[sqlite3.Connection]:
+        try:
+            conn = self._readers.get_nowait()
+        except queue.Empty:
+            conn = self._open_reader()
+        conn.execute("BEGIN")
+        try:
+            yield conn
+        finally:
+            conn.execute("ROLLBACK")
+            try:
+                self._readers.put_nowait(conn)
+            except queue.Full:
+                conn.close()
+
+    @contextmanager
+    def write(self) -> Iterator[sqlite3.Connection]:
+        with self._write_lock:
+            conn = self._writer
+            if conn.in_transaction:
+                yield conn
+                return
+            self._begin_immediate(conn)
+            try:
+                yield conn
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+            conn.execute("COMMIT")
+            self._data_version = self._read_data_version()
+
+    @contextmanager
+    def exclusive(self) -> Iterator[sqlite3.Connection]:
+        with self._write_lock:
+            try:
+                yield self._writer
+            finally:
+                self._data_version = self._read_data_version()
+
+    @contextmanager
+    def dedicated(self) -> Iterator[sqlite3.Connection]:
+        conn = get_connection(self.db_path, check_same_thread=False)
+        conn.isolation_level = None
+        try:
+            yield conn
+        finally:
+            conn.close()
+
+    def backup_to(
+        self,
+        target: sqlite3.Connection,
+        pages: int = 256,
+        sleep: float = 0.005,
+        progress: Optional[Callable[[int, int, int], object]] = None,
+    ) -> None:
+        with self.read() as conn:
+            conn.backup(target, pages=pages, sleep=sleep, progress=progress)
+
+    def restore_from(self, source: sqlite3.Connection, pages: int = -1) -> None:
+        with self._write_lock:
+            source.backup(self._writer, pages=pages)
+            self._data_version = self._read_data_version()
+
+    def _begin_immediate(self, conn: sqlite3.Connection) -> None:
+        for attempt in range(self.write_retries + 1):
+            try:
+                conn.execute("BEGIN IMMEDIATE")
+                return
+            except sqlite3.OperationalError as exc:
+                if not is_busy_error(exc) or attempt == self.write_retries:
+                    raise
+                time.sleep(self.retry_backoff * (2 ** attempt) * (1.0 + random.random()))
+
+    def _read_data_version(self) -> int:
+        return int(self._writer.execute("PRAGMA data_version").fetchone()[0])
+
+    def data_version(self) -> int:
+        if self._write_lock.acquire(blocking=False):
+            try:
+                self._data_version = self._read_data_version()
+            finally:
+                self._write_lock.release()
+        return self._data_version
+
+    def close(self) -> None:
+        with self._write_lock:
+            self._writer.close()
+        while True:
+            try:
+                self._readers.get_nowait().close()
+            except queue.Empty:
+                break
+
+
+def fetch_rows(conn: sqlite3.Connection, query: str, params: Sequence[object] = ()) -> List[Tuple]:
+    cursor = conn.cursor()
+    cursor.row_factory = None
+    return cursor.execute(query, tuple(params)).fetchall()
+
+
 def execute_script(conn: sqlite3.Connection, statements: Iterable[str]) -> None:
     for stmt in statements:
         conn.executescript(stmt)
@@ -28,5 +171,10 @@ def load_schema() -> str:
 def init_db(db_path: Path) -> None:
     db_path.parent.mkdir(parents=True, exist_ok=True)
     schema = load_schema()
-    with get_connection(db_path) as conn:
-        conn.executescript(schema)
+    conn = get_connection(db_path)
+    conn.isolation_level = None
+    try:
+        apply_migrations(conn, schema)
+        conn.execute("PRAGMA journal_mode = WAL;")
+    finally:
+        conn.close()
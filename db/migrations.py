@@ -0,0 +1,146 @@
+from __future__ import annotations
+
+import re
+import sqlite3
+from typing import Callable, Dict, List, Tuple
+
+
+EPOCH_JULIAN_DAY = 2440587.5
+
+DATE_COLUMNS: Dict[str, Tuple[str, ...]] = {
+    "debts": ("loan_start_date", "last_payment_date"),
+    "credit_cards": ("statement_date", "due_date", "last_payment_date"),
+    "payments": ("payment_date",),
+    "fx_rates": ("last_updated",),
+    "monthly_snapshots": ("snapshot_date",),
+}
+
+MONEY_COLUMNS: Dict[str, Tuple[str, ...]] = {
+    "debts": ("principal_original", "principal_outstanding_cad", "installment_amount"),
+    "credit_cards": ("credit_limit_cad", "statement_balance_cad", "flat_late_fee_cad"),
+    "payments": (
+        "payment_amount_original",
+        "payment_amount_cad",
+        "applied_penal",
+        "applied_interest",
+        "applied_principal",
+    ),
+    "savings": ("balance_cad",),
+    "monthly_snapshots": ("total_debt_cad", "total_interest_cad", "total_savings_cad", "net_position_cad"),
+    "payment_totals": ("payment_amount_cad", "applied_penal", "applied_interest", "applied_principal"),
+}
+
+VERSIONED_TABLES: Tuple[str, ...] = ("debts", "credit_cards", "savings")
+
+
+def _table_sql(conn: sqlite3.Connection, table: str) -> str:
+    row = conn.execute("SELECT sql FROM sqlite_master WHERE type = 'table' AND name = ?", (table,)).fetchone()
+    return row[0] if row else ""
+
+
+def _column_names(conn: sqlite3.Connection, table: str) -> List[str]:
+    return [row[1] for row in conn.execute(f"PRAGMA table_info({table})").fetchall()]
+
+
+def rebuild_table(conn: sqlite3.Connection, table: str, retype: Dict[str, str], convert: Dict[str, str]) -> None:
+    sql = _table_sql(conn, table)
+    sql = re.sub(rf"^CREATE TABLE\s+\"?{table}\"?", f"CREATE TABLE {table}_migrating", sql)
+    for column, column_type in retype.items():
+        sql = re.sub(rf"\b{column}\s+\w+", f"{column} {column_type}", sql, count=1)
+    columns = _column_names(conn, table)
+    select = ", ".join(convert.get(column, column) for column in columns)
+    conn.execute(sql)
+    conn.execute(f"INSERT INTO {table}_migrating ({', '.join(columns)}) SELECT {select} FROM {table}")
+    conn.execute(f"DROP TABLE {table}")
+    conn.execute(f"ALTER TABLE {table}_migrating RENAME TO {table}")
+
+
+def _epoch_day_dates(conn: sqlite3.Connection) -> None:
+    for table, columns in DATE_COLUMNS.items():
+        if not _table_sql(conn, table):
+            continue
+        rebuild_table(
+            conn,
+            table,
+            retype={column: "INTEGER" for column in columns},
+            convert={
+                column: f"CAST(julianday({column}) - {EPOCH_JULIAN_DAY} AS INTEGER)" for column in columns
+            },
+        )
+
+
+def _integer_cents(conn: sqlite3.Connection) -> None:
+    has_archives = bool(_table_sql(conn, "payment_archives")) and conn.execute(
+        "SELECT 1 FROM payment_archives LIMIT 1"
+    ).fetchone() is not None
+    for table, columns in MONEY_COLUMNS.items():
+        if not _table_sql(conn, table) or (table == "payment_totals" and not has_archives):
+            continue
+        rebuild_table(
+            conn,
+            table,
+            retype={column: "INTEGER" for column in columns},
+            convert={column: f"CAST(round({column} * 100) AS INTEGER)" for column in columns},
+        )
+    if not has_archives and _table_sql(conn, "payment_totals"):
+        # Without archived payments the schema backfill rebuilds the rollup from per-row cents exactly.
+        conn.execute("DROP TABLE payment_totals")
+
+
+def _row_versions(conn: sqlite3.Connection) -> None:
+    for table in VERSIONED_TABLES:
+        if _table_sql(conn, table) and "version" not in _column_names(conn, table):
+            conn.execute(f"ALTER TABLE {table} ADD COLUMN version INTEGER NOT NULL DEFAULT 1")
+
+
+def _job_progress(conn: sqlite3.Connection) -> None:
+    if not _table_sql(conn, "job_runs"):
+        return
+    columns = _column_names(conn, "job_runs")
+    if "progress" not in columns:
+        conn.execute("ALTER TABLE job_runs ADD COLUMN progress REAL NOT NULL DEFAULT 0")
+    if "heartbeat_at" not in columns:
+        conn.execute("ALTER TABLE job_runs ADD COLUMN heartbeat_at INTEGER")
+    conn.execute("UPDATE job_runs SET progress = 1 WHERE status = 'succeeded'")
+
+
+def _name_only_search(conn: sqlite3.Connection) -> None:
+    # Debt types and currencies stay in the search tables for display but are no longer matched; the schema
+    # recreates both tables and rebuilds them from their content tables.
+    for table in ("debts", "savings"):
+        conn.execute(f"DROP TABLE IF EXISTS {table}_search")
+        for operation in ("insert", "update", "delete"):
+            conn.execute(f"DROP TRIGGER IF EXISTS trg_{table}_search_{operation}")
+
+
+MIGRATIONS: List[Tuple[int, Callable[[sqlite3.Connection], None]]] = [
+    (1, _epoch_day_dates),
+    (2, _integer_cents),
+    (3, _row_versions),
+    (4, _job_progress),
+    (5, _name_only_search),
+]
+
+SCHEMA_VERSION = MIGRATIONS[-1][0]
+
+
+def migrate(conn: sqlite3.Connection, version: int) -> None:
+    conn.execute("BEGIN")
+    try:
+        for step_version, step in MIGRATIONS:
+            if step_version > version:
+                step(conn)
+        conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+        conn.execute("COMMIT")
+    except Exception:
+        conn.execute("ROLLBACK")
+        raise
+
+
+def apply_migrations(conn: sqlite3.Connection, schema: str) -> None:
+    version = conn.execute("PRAGMA user_version").fetchone()[0]
+    is_new = not _table_sql(conn, "payments")
+    if not is_new and version < SCHEMA_VERSION:
+        migrate(conn, version)
+    conn.executescript(schema)
+    conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
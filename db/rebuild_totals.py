@@ -0,0 +1,23 @@
+from __future__ import annotations
+
+from pathlib import Path
+
+from db.repository import Repository
+
+
+def main() -> None:
+    root = Path(__file__).resolve().parents[1]
+    db_path = root / "data" / "finance.db"
+    repo = Repository(db_path)
+    mismatches = repo.rebuild_payment_totals()
+    for mismatch in mismatches:
+        print(
+            f"{mismatch.target_type} {mismatch.target_id} {mismatch.payment_month}: "
+            f"rollup {mismatch.rollup.payment_count} payments / {mismatch.rollup.payment_amount_cad:.2f} CAD, "
+            f"ledger {mismatch.ledger.payment_count} payments / {mismatch.ledger.payment_amount_cad:.2f} CAD"
+        )
+    print(f"Rebuilt payment totals at {db_path} ({len(mismatches)} mismatched rows corrected)")
+
+
+if __name__ == "__main__":
+    main()
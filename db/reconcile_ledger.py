@@ -0,0 +1,28 @@
+from __future__ import annotations
+
+from pathlib import Path
+
+from db.repository import Repository
+
+
+def main() -> None:
+    root = Path(__file__).resolve().parents[1]
+    db_path = root / "data" / "finance.db"
+    repo = Repository(db_path)
+    mismatches = repo.reconcile_debt_principal()
+    for mismatch in mismatches:
+        diverged = (
+            f"first diverged at payment {mismatch.diverged_payment_id} on {mismatch.diverged_on} "
+            f"(balance {mismatch.balance_after_cad:.2f} CAD)"
+            if mismatch.diverged_payment_id is not None
+            else "no payment explains the difference"
+        )
+        print(
+            f"debt {mismatch.debt_id}: recorded {mismatch.recorded_cad:.2f} CAD, "
+            f"ledger {mismatch.expected_cad:.2f} CAD over {mismatch.payment_count} payments; {diverged}"
+        )
+    print(f"Reconciled debt principal at {db_path} ({len(mismatches)} mismatched debts)")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,16 +1,65 @@
 from __future__ import annotations
 
-from dataclasses import dataclass
+import re
+import sqlite3
+import uuid
+from contextlib import contextmanager
+from dataclasses import astuple, dataclass, fields
+from functools import partial
 from datetime import date
+from operator import itemgetter
 from pathlib import Path
-from typing import Iterable, List, Optional
+from typing import (
+    TYPE_CHECKING,
+    Callable,
+    ContextManager,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Sequence,
+    Set,
+    Tuple,
+    TypeVar,
+)
 
-from db.connection import get_connection, init_db
-from core.utils import format_date, parse_date
-from models.types import CreditCard, Debt, FxRate, SavingsAccount
+from db.archive import ARCHIVE_VIEW, MAX_ATTACHED, PaymentArchive, archive_schema, batched, year_bounds
+from db.cache import RepositoryCache
+from db.columnar import (
+    CREDIT_CARD_COLUMNS,
+    DEBT_COLUMNS,
+    MONTHLY_SNAPSHOT_COLUMNS,
+    PAYMENT_COLUMNS,
+    SAVINGS_COLUMNS,
+    columns_from_rows,
+    datetime64_to_epoch_days,
+    fetch_columns,
+    select_list,
+    to_frame,
+)
+from db.connection import ConnectionPool, fetch_rows, init_db, load_schema, memory_database_uri
+from db.migrations import MONEY_COLUMNS, apply_migrations
+from core.money import from_cents, to_cents
+from core.utils import from_epoch_day, to_epoch_day
+from models.types import CreditCard, Debt, FxRate, SavingsAccount, column_list, tuple_constructor
 
+if TYPE_CHECKING:
+    import numpy as np
+    import pandas as pd
 
-@dataclass(frozen=True)
+
+class ConcurrentUpdateError(Exception):
+    def __init__(self, table_name: str, row_id: int, expected_version: int, current_version: Optional[int]) -> None:
+        state = "was deleted" if current_version is None else f"is now at version {current_version}"
+        super().__init__(f"{table_name} row {row_id} {state}; the edit was made against version {expected_version}")
+        self.table_name = table_name
+        self.row_id = row_id
+        self.expected_version = expected_version
+        self.current_version = current_version
+
+
+@dataclass(frozen=True, slots=True)
 class PaymentRecord:
     id: int
     payment_date: date
@@ -24,7 +73,37 @@ class PaymentRecord:
     applied_principal: float
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
+class PaymentTotals:
+    payment_count: int
+    payment_amount_cad: float
+    applied_penal: float
+    applied_interest: float
+    applied_principal: float
+
+
+@dataclass(frozen=True, slots=True)
+class PaymentTotalsMismatch:
+    target_type: str
+    target_id: int
+    payment_month: str
+    rollup: PaymentTotals
+    ledger: PaymentTotals
+
+
+@dataclass(frozen=True, slots=True)
+class PrincipalMismatch:
+    debt_id: int
+    opening_cad: float
+    recorded_cad: float
+    expected_cad: float
+    payment_count: int
+    diverged_payment_id: Optional[int]
+    diverged_on: Optional[date]
+    balance_after_cad: Optional[float]
+
+
+@dataclass(frozen=True, slots=True)
 class MonthlySnapshot:
     snapshot_date: date
     total_debt_cad: float
@@ -33,16 +112,477 @@ class MonthlySnapshot:
     net_position_cad: float
 
 
+@dataclass(frozen=True, slots=True)
+class AccountMatch:
+    table_name: str
+    account_id: int
+    name: str
+    detail: str
+
+
+@dataclass(frozen=True, slots=True)
+class JobRun:
+    job_name: str
+    period: str
+    status: str
+    started_at: int
+    finished_at: Optional[int]
+    detail: Optional[str]
+    progress: float
+    heartbeat_at: Optional[int]
+
+
+@dataclass(frozen=True, slots=True)
+class WorkerHeartbeat:
+    worker_id: str
+    hostname: str
+    pid: int
+    started_at: int
+    heartbeat_at: int
+    interval_seconds: int
+    state: str
+
+
+@dataclass(frozen=True, slots=True)
+class AccrualRecord:
+    target_type: str
+    target_id: int
+    interest_cad: float
+    fee_cad: float
+    overdue_days: int
+    risk_score: float
+    risk_reason: str
+
+
+@dataclass(frozen=True, slots=True)
+class ChangeRecord:
+    seq: int
+    table_name: str
+    row_key: object
+    operation: str
+
+
+_payment_from_row = tuple_constructor(
+    PaymentRecord,
+    {
+        "payment_date": from_epoch_day,
+        **dict.fromkeys(MONEY_COLUMNS["payments"], from_cents),
+    },
+)
+_monthly_snapshot_from_row = tuple_constructor(
+    MonthlySnapshot,
+    {"snapshot_date": from_epoch_day, **dict.fromkeys(MONEY_COLUMNS["monthly_snapshots"], from_cents)},
+)
+_debt_from_row = tuple_constructor(
+    Debt,
+    {
+        "loan_start_date": from_epoch_day,
+        "last_payment_date": from_epoch_day,
+        **dict.fromkeys(MONEY_COLUMNS["debts"], from_cents),
+    },
+)
+_credit_card_from_row = tuple_constructor(
+    CreditCard,
+    {
+        "statement_date": from_epoch_day,
+        "due_date": from_epoch_day,
+        "last_payment_date": from_epoch_day,
+        **dict.fromkeys(MONEY_COLUMNS["credit_cards"], from_cents),
+    },
+)
+_savings_from_row = tuple_constructor(SavingsAccount, dict.fromkeys(MONEY_COLUMNS["savings"], from_cents))
+_fx_rate_from_row = tuple_constructor(FxRate, {"last_updated": from_epoch_day})
+_change_from_row = tuple_constructor(ChangeRecord)
+_principal_mismatch_from_row = tuple_constructor(
+    PrincipalMismatch,
+    {
+        "opening_cad": from_cents,
+        "recorded_cad": from_cents,
+        "expected_cad": from_cents,
+        "diverged_on": from_epoch_day,
+        "balance_after_cad": from_cents,
+    },
+)
+_payment_totals = tuple_constructor(
+    PaymentTotals, dict.fromkeys(MONEY_COLUMNS["payment_totals"], from_cents)
+)
+_account_match_from_row = tuple_constructor(AccountMatch)
+_job_run_from_row = tuple_constructor(JobRun)
+_worker_heartbeat_from_row = tuple_constructor(WorkerHeartbeat)
+_accrual_from_row = tuple_constructor(AccrualRecord, {"interest_cad": from_cents, "fee_cad": from_cents})
+
+PAYMENT_FIELDS = [field.name for field in fields(PaymentRecord)]
+MONTHLY_SNAPSHOT_SELECT = column_list(MonthlySnapshot)
+DEBT_SELECT = column_list(Debt)
+CREDIT_CARD_SELECT = column_list(CreditCard)
+SAVINGS_SELECT = column_list(SavingsAccount)
+FX_RATE_SELECT = column_list(FxRate)
+
+PAYMENT_MONTH_SQL = "strftime('%Y-%m', payment_date * 86400, 'unixepoch')"
+PAYMENT_YEAR_SQL = "CAST(strftime('%Y', payment_date * 86400, 'unixepoch') AS INTEGER)"
+
+PAYMENT_TOTALS_COLUMNS = (
+    "target_type, target_id, payment_month, payment_count, payment_amount_cad, "
+    "applied_penal, applied_interest, applied_principal"
+)
+
+PAYMENT_TOTALS_VALUES = "payment_count, payment_amount_cad, applied_penal, applied_interest, applied_principal"
+PAYMENT_TOTALS_SUMS = ", ".join(f"COALESCE(SUM({column}), 0)" for column in PAYMENT_TOTALS_VALUES.split(", "))
+
+PAYMENT_TOTALS_AGGREGATE = f"""
+    SELECT
+        target_type, target_id, {PAYMENT_MONTH_SQL} AS payment_month, COUNT(*), SUM(payment_amount_cad),
+        SUM(applied_penal), SUM(applied_interest), SUM(applied_principal)
+    FROM {{source}}
+    WHERE {{where}}
+    GROUP BY target_type, target_id, payment_month
+"""
+
+PAYMENT_TOTALS_UPSERT = """
+    ON CONFLICT (target_type, target_id, payment_month) DO UPDATE SET
+        payment_count = payment_count + excluded.payment_count,
+        payment_amount_cad = payment_amount_cad + excluded.payment_amount_cad,
+        applied_penal = applied_penal + excluded.applied_penal,
+        applied_interest = applied_interest + excluded.applied_interest,
+        applied_principal = applied_principal + excluded.applied_principal
+"""
+
+CHANGE_SELECT = column_list(ChangeRecord)
+JOB_RUN_SELECT = column_list(JobRun)
+WORKER_HEARTBEAT_SELECT = column_list(WorkerHeartbeat)
+ACCRUAL_SELECT = column_list(AccrualRecord)
+# Precomputed accruals older than this are pruned when a newer day is saved.
+ACCRUAL_RETENTION_DAYS = 7
+
+T = TypeVar("T")
+
+CACHED_TABLES = ("debts", "credit_cards", "savings", "fx_rates", "monthly_snapshots")
+# The account tables the What-If sandbox reads; nothing else is copied into it.
+SANDBOX_TABLES = ("debts", "credit_cards", "savings", "fx_rates")
+
+SEARCH_COLUMNS: Dict[str, Tuple[str, str]] = {
+    "debts": ("lender_name", "debt_type"),
+    "credit_cards": ("card_name", "bank_name"),
+    "savings": ("account_name", "currency"),
+}
+
+
+def _changed_tables(pool: ConnectionPool, since_seq: Optional[int]) -> Tuple[Set[str], int]:
+    with pool.read() as conn:
+        latest, oldest = conn.execute("SELECT COALESCE(MAX(seq), 0), COALESCE(MIN(seq), 0) FROM change_log").fetchone()
+        # A cursor behind pruned rows cannot tell what changed, just like one the log moved back past.
+        if since_seq is None or latest < since_seq or oldest > since_seq + 1:
+            return set(CACHED_TABLES), latest
+        rows = conn.execute(
+            "SELECT DISTINCT table_name FROM change_log WHERE seq > ? AND seq <= ?",
+            (since_seq, latest),
+        ).fetchall()
+    return {row[0] for row in rows}, latest
+
+
+def search_expression(text: str) -> str:
+    return " ".join(f'"{term}"*' for term in re.findall(r"\w+", text))
+
+
+def archive_dir_for(db_path: Path) -> Path:
+    return db_path.parent / "archive" / db_path.stem
+
+
+def _swapped_version(
+    conn: sqlite3.Connection, cursor: sqlite3.Cursor, table: str, row_id: int, expected_version: int
+) -> int:
+    if cursor.rowcount == 1:
+        return expected_version + 1
+    row = conn.execute(f"SELECT version FROM {table} WHERE id = ?", (row_id,)).fetchone()
+    raise ConcurrentUpdateError(table, row_id, expected_version, row[0] if row else None)
+
+
 class Repository:
-    def __init__(self, db_path: Path) -> None:
+    def __init__(
+        self,
+        db_path: Path,
+        pool: Optional[ConnectionPool] = None,
+        archive: Optional[PaymentArchive] = None,
+    ) -> None:
         self.db_path = db_path
-        init_db(db_path)
+        self._archive = archive or PaymentArchive(archive_dir_for(db_path))
+        if pool is None:
+            init_db(db_path)
+            self._archive.migrate()
+            pool = ConnectionPool(db_path)
+        self._pool = pool
+        # The cache's callbacks close over the pool only, so the repository is not part of a reference cycle.
+        self._cache = RepositoryCache(CACHED_TABLES, pool.data_version, partial(_changed_tables, pool))
 
-    def _connect(self):
-        return get_connection(self.db_path)
+    def _connect(self) -> ContextManager[sqlite3.Connection]:
+        return self._pool.read()
 
-    def add_debt(self, debt: Debt) -> int:
+    @contextmanager
+    def _write(self, *tables: str) -> Iterator[sqlite3.Connection]:
+        try:
+            with self._pool.write() as conn:
+                yield conn
+        finally:
+            self._cache.invalidate(*tables)
+
+    def close(self) -> None:
+        self._pool.close()
+
+    def claim_job_run(self, job_name: str, period: str, started_at: int, lease_seconds: int) -> bool:
+        # The (job_name, period) key is the lock. Requested runs are taken at once; failed runs and claims
+        # whose heartbeat stopped are retaken once their lease ends.
+        with self._write() as conn:
+            cursor = conn.execute(
+                """
+                INSERT INTO job_runs (job_name, period, status, started_at, heartbeat_at)
+                VALUES (?, ?, 'running', ?, ?)
+                ON CONFLICT (job_name, period) DO UPDATE SET
+                    status = 'running',
+                    started_at = excluded.started_at,
+                    heartbeat_at = excluded.heartbeat_at,
+                    finished_at = NULL,
+                    detail = NULL,
+                    progress = 0
+                WHERE status = 'requested'
+                    OR (
+                        status IN ('failed', 'running')
+                        AND COALESCE(heartbeat_at, started_at) <= excluded.started_at - ?
+                    )
+                """,
+                (job_name, period, started_at, started_at, lease_seconds),
+            )
+            return cursor.rowcount == 1
+
+    def request_job_run(self, job_name: str, period: str, requested_at: int, lease_seconds: int) -> bool:
+        with self._write() as conn:
+            cursor = conn.execute(
+                """
+                INSERT INTO job_runs (job_name, period, status, started_at)
+                VALUES (?, ?, 'requested', ?)
+                ON CONFLICT (job_name, period) DO UPDATE SET
+                    status = 'requested',
+                    started_at = excluded.started_at,
+                    heartbeat_at = NULL,
+                    finished_at = NULL,
+                    detail = NULL,
+                    progress = 0
+                WHERE status != 'running' OR COALESCE(heartbeat_at, started_at) <= excluded.started_at - ?
+                """,
+                (job_name, period, requested_at, lease_seconds),
+            )
+            return cursor.rowcount == 1
+
+    def update_job_progress(self, job_name: str, period: str, progress: float, heartbeat_at: int) -> None:
+        with self._write() as conn:
+            conn.execute(
+                """
+                UPDATE job_runs SET progress = ?, heartbeat_at = ?
+                WHERE job_name = ? AND period = ? AND status = 'running'
+                """,
+                (min(max(progress, 0.0), 1.0), heartbeat_at, job_name, period),
+            )
+
+    def finish_job_run(
+        self, job_name: str, period: str, status: str, finished_at: int, detail: Optional[str] = None
+    ) -> None:
+        with self._write() as conn:
+            conn.execute(
+                """
+                UPDATE job_runs SET
+                    status = ?,
+                    finished_at = ?,
+                    heartbeat_at = ?,
+                    detail = ?,
+                    progress = CASE WHEN ? = 'succeeded' THEN 1 ELSE progress END
+                WHERE job_name = ? AND period = ?
+                """,
+                (status, finished_at, finished_at, detail, status, job_name, period),
+            )
+
+    def requested_job_runs(self) -> List[JobRun]:
+        query = f"SELECT {JOB_RUN_SELECT} FROM job_runs WHERE status = 'requested' ORDER BY started_at"
+        with self._connect() as conn:
+            return list(map(_job_run_from_row, fetch_rows(conn, query)))
+
+    def get_job_run(self, job_name: str, period: str) -> Optional[JobRun]:
+        query = f"SELECT {JOB_RUN_SELECT} FROM job_runs WHERE job_name = ? AND period = ?"
+        with self._connect() as conn:
+            rows = fetch_rows(conn, query, (job_name, period))
+        return _job_run_from_row(rows[0]) if rows else None
+
+    def latest_job_runs(self) -> List[JobRun]:
+        query = f"""
+            SELECT {JOB_RUN_SELECT} FROM job_runs AS runs
+            WHERE started_at = (SELECT MAX(started_at) FROM job_runs WHERE job_name = runs.job_name)
+            ORDER BY job_name
+        """
+        with self._connect() as conn:
+            return list(map(_job_run_from_row, fetch_rows(conn, query)))
+
+    def record_worker_heartbeat(self, heartbeat: WorkerHeartbeat) -> None:
+        with self._write() as conn:
+            conn.execute(
+                f"INSERT OR REPLACE INTO worker_heartbeats ({WORKER_HEARTBEAT_SELECT}) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                astuple(heartbeat),
+            )
+
+    def list_worker_heartbeats(self) -> List[WorkerHeartbeat]:
+        query = f"SELECT {WORKER_HEARTBEAT_SELECT} FROM worker_heartbeats ORDER BY heartbeat_at DESC"
         with self._connect() as conn:
+            return list(map(_worker_heartbeat_from_row, fetch_rows(conn, query)))
+
+    def save_accruals(self, as_of: date, change_seq: int, computed_at: int, records: Iterable[AccrualRecord]) -> None:
+        day = to_epoch_day(as_of)
+        with self._write() as conn:
+            conn.execute("DELETE FROM accruals WHERE as_of = ? OR as_of < ?", (day, day - ACCRUAL_RETENTION_DAYS))
+            conn.execute("DELETE FROM accrual_runs WHERE as_of < ?", (day - ACCRUAL_RETENTION_DAYS,))
+            conn.executemany(
+                f"INSERT INTO accruals (as_of, {ACCRUAL_SELECT}) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                [
+                    (
+                        day,
+                        record.target_type,
+                        record.target_id,
+                        to_cents(record.interest_cad),
+                        to_cents(record.fee_cad),
+                        record.overdue_days,
+                        record.risk_score,
+                        record.risk_reason,
+                    )
+                    for record in records
+                ],
+            )
+            conn.execute(
+                "INSERT OR REPLACE INTO accrual_runs (as_of, change_seq, computed_at) VALUES (?, ?, ?)",
+                (day, change_seq, computed_at),
+            )
+
+    def load_accruals(self, as_of: date, change_seq: int) -> Optional[Dict[Tuple[str, int], AccrualRecord]]:
+        # Only accruals computed against the current change_log position are returned.
+        day = to_epoch_day(as_of)
+        with self._connect() as conn:
+            run = conn.execute("SELECT change_seq FROM accrual_runs WHERE as_of = ?", (day,)).fetchone()
+            if run is None or run[0] != change_seq:
+                return None
+            rows = fetch_rows(conn, f"SELECT {ACCRUAL_SELECT} FROM accruals WHERE as_of = ?", (day,))
+        return {(record.target_type, record.target_id): record for record in map(_accrual_from_row, rows)}
+
+    def table_versions(self, *tables: str) -> Tuple[int, ...]:
+        return tuple(self._cache.version(table) for table in tables)
+
+    def latest_change_seq(self, tables: Optional[Iterable[str]] = None) -> int:
+        query = "SELECT COALESCE(MAX(seq), 0) FROM change_log"
+        params: List[object] = []
+        if tables is not None:
+            params.extend(tables)
+            query += f" WHERE table_name IN ({', '.join('?' for _ in params)})"
+        with self._connect() as conn:
+            row = conn.execute(query, params).fetchone()
+        return int(row[0])
+
+    def changes_since(
+        self, seq: int, tables: Optional[Iterable[str]] = None, limit: int = 1000
+    ) -> List[ChangeRecord]:
+        query = f"SELECT {CHANGE_SELECT} FROM change_log WHERE seq > ?"
+        params: List[object] = [seq]
+        if tables is not None:
+            names = list(tables)
+            query += f" AND table_name IN ({', '.join('?' for _ in names)})"
+            params.extend(names)
+        query += " ORDER BY seq LIMIT ?"
+        params.append(limit)
+        with self._connect() as conn:
+            return list(map(_change_from_row, fetch_rows(conn, query, params)))
+
+    def prune_changes(self, up_to_seq: int) -> int:
+        # The newest row always stays, so latest_change_seq() never moves backwards.
+        with self._write("change_log") as conn:
+            return conn.execute(
+                "DELETE FROM change_log WHERE seq <= ? AND seq < (SELECT MAX(seq) FROM change_log)", (up_to_seq,)
+            ).rowcount
+
+    def sandbox(self) -> "Repository":
+        uri = memory_database_uri(f"myfin-sandbox-{uuid.uuid4().hex}")
+        pool = ConnectionPool(uri, readers=1)
+        with pool.exclusive() as conn:
+            apply_migrations(conn, load_schema())
+        archive = PaymentArchive(self._archive.archive_dir, read_only=True)
+        sandbox = Repository(self.db_path, pool=pool, archive=archive)
+        sandbox.copy_from(self)
+        return sandbox
+
+    def copy_from(self, other: "Repository", tables: Sequence[str] = SANDBOX_TABLES) -> None:
+        # Only the named tables are copied, read in one transaction so they agree with each other.
+        with other._connect() as conn:
+            rows = {}
+            for table in tables:
+                columns = ", ".join(row[1] for row in conn.execute(f"PRAGMA table_info({table})"))
+                rows[table] = (columns, conn.execute(f"SELECT {columns} FROM {table}").fetchall())
+        with self._write(*tables) as conn:
+            for table, (columns, values) in rows.items():
+                conn.execute(f"DELETE FROM {table}")
+                placeholders = ", ".join("?" for _ in columns.split(", "))
+                conn.executemany(f"INSERT INTO {table} ({columns}) VALUES ({placeholders})", values)
+
+    def backup_to(
+        self,
+        target_path: Path,
+        pages: int = 256,
+        sleep: float = 0.005,
+        progress: Optional[Callable[[int, int, int], object]] = None,
+        archive_dir: Optional[Path] = None,
+    ) -> None:
+        target = sqlite3.connect(str(target_path))
+        try:
+            self._pool.backup_to(target, pages=pages, sleep=sleep, progress=progress)
+            target.execute("PRAGMA journal_mode = DELETE")
+        finally:
+            target.close()
+        # Archives are copied after the main file, so a payment archived in between lands in both copies rather
+        # than neither; reads prefer the hot row.
+        if archive_dir is not None:
+            self._archive.backup_to(archive_dir)
+
+    def restore_from(self, source_path: Path, archive_dir: Optional[Path] = None) -> None:
+        if archive_dir is not None:
+            self._archive.restore_from(archive_dir)
+        source = sqlite3.connect(f"file:{source_path}?mode=ro", uri=True)
+        try:
+            self._pool.restore_from(source)
+        finally:
+            source.close()
+            self._cache.invalidate(*CACHED_TABLES)
+
+    def _load_one(self, from_row: Callable[[Tuple], T], select: str, table: str, row_id: int) -> Optional[T]:
+        with self._connect() as conn:
+            rows = fetch_rows(conn, f"SELECT {select} FROM {table} WHERE id = ?", (row_id,))
+        return from_row(rows[0]) if rows else None
+
+    def search_accounts(
+        self, text: str, tables: Optional[Iterable[str]] = None, limit: int = 20
+    ) -> List[AccountMatch]:
+        names = list(tables) if tables is not None else list(SEARCH_COLUMNS)
+        expression = search_expression(text)
+        if expression:
+            parts = [
+                f"SELECT '{table}', rowid, {name}, {detail}, rank FROM {table}_search WHERE {table}_search MATCH :q"
+                for table in names
+                for name, detail in [SEARCH_COLUMNS[table]]
+            ]
+            query = " UNION ALL ".join(parts) + " ORDER BY 5, 2 DESC LIMIT :limit"
+        else:
+            parts = [
+                f"SELECT '{table}', id, {name}, {detail} FROM {table}"
+                for table in names
+                for name, detail in [SEARCH_COLUMNS[table]]
+            ]
+            query = " UNION ALL ".join(parts) + " ORDER BY 2 DESC LIMIT :limit"
+        with self._connect() as conn:
+            rows = conn.execute(query, {"q": expression, "limit": limit}).fetchall()
+        return [_account_match_from_row(tuple(row[:4])) for row in rows]
+
+    def add_debt(self, debt: Debt) -> int:
+        with self._write("debts") as conn:
             cursor = conn.execute(
                 """
                 INSERT INTO debts (
@@ -56,62 +596,59 @@ class Repository:
                     debt.lender_name,
                     debt.debt_type,
                     debt.original_currency,
-                    debt.principal_original,
-                    debt.principal_outstanding_cad,
+                    to_cents(debt.principal_original),
+                    to_cents(debt.principal_outstanding_cad),
                     debt.interest_rate_annual,
                     debt.penal_rate_annual,
-                    format_date(debt.loan_start_date),
-                    debt.installment_amount,
+                    to_epoch_day(debt.loan_start_date),
+                    to_cents(debt.installment_amount),
                     debt.installment_due_day,
-                    format_date(debt.last_payment_date) if debt.last_payment_date else None,
+                    to_epoch_day(debt.last_payment_date),
                     debt.status,
                 ),
             )
             return int(cursor.lastrowid)
 
     def list_debts(self, status: Optional[str] = None) -> List[Debt]:
+        return list(self._cache.get("debts", ("list", status), lambda: self._load_debts(status)))
+
+    def _load_debts(self, status: Optional[str]) -> List[Debt]:
+        query = f"SELECT {DEBT_SELECT} FROM debts"
+        params: Tuple[object, ...] = ()
+        if status:
+            query += " WHERE status = ?"
+            params = (status,)
         with self._connect() as conn:
-            if status:
-                rows = conn.execute("SELECT * FROM debts WHERE status = ?", (status,)).fetchall()
-            else:
-                rows = conn.execute("SELECT * FROM debts").fetchall()
-
-        return [
-            Debt(
-                id=row["id"],
-                lender_name=row["lender_name"],
-                debt_type=row["debt_type"],
-                original_currency=row["original_currency"],
-                principal_original=row["principal_original"],
-                principal_outstanding_cad=row["principal_outstanding_cad"],
-                interest_rate_annual=row["interest_rate_annual"],
-                penal_rate_annual=row["penal_rate_annual"],
-                loan_start_date=parse_date(row["loan_start_date"]),
-                installment_amount=row["installment_amount"],
-                installment_due_day=row["installment_due_day"],
-                last_payment_date=parse_date(row["last_payment_date"]),
-                status=row["status"],
-            )
-            for row in rows
-        ]
+            return list(map(_debt_from_row, fetch_rows(conn, query, params)))
+
+    def get_debt(self, debt_id: int) -> Optional[Debt]:
+        return self._cache.get(
+            "debts", ("id", debt_id), lambda: self._load_one(_debt_from_row, DEBT_SELECT, "debts", debt_id)
+        )
+
+    def debt_columns(self, status: Optional[str] = None) -> Dict[str, np.ndarray]:
+        return self._account_columns("debts", DEBT_COLUMNS, status)
+
+    def debts_frame(self, status: Optional[str] = None) -> pd.DataFrame:
+        return to_frame(self.debt_columns(status))
 
     def update_debt_principal(self, debt_id: int, principal_outstanding_cad: float) -> None:
-        with self._connect() as conn:
+        with self._write("debts") as conn:
             conn.execute(
-                "UPDATE debts SET principal_outstanding_cad = ? WHERE id = ?",
-                (principal_outstanding_cad, debt_id),
+                "UPDATE debts SET principal_outstanding_cad = ?, version = version + 1 WHERE id = ?",
+                (to_cents(principal_outstanding_cad), debt_id),
             )
 
     def update_debt_last_payment(self, debt_id: int, last_payment_date: date) -> None:
-        with self._connect() as conn:
+        with self._write("debts") as conn:
             conn.execute(
-                "UPDATE debts SET last_payment_date = ? WHERE id = ?",
-                (format_date(last_payment_date), debt_id),
+                "UPDATE debts SET last_payment_date = ?, version = version + 1 WHERE id = ?",
+                (to_epoch_day(last_payment_date), debt_id),
             )
 
-    def update_debt(self, debt: Debt) -> None:
-        with self._connect() as conn:
-            conn.execute(
+    def update_debt(self, debt: Debt) -> int:
+        with self._write("debts") as conn:
+            cursor = conn.execute(
                 """
                 UPDATE debts SET
                     lender_name = ?,
@@ -125,28 +662,31 @@ class Repository:
                     installment_amount = ?,
                     installment_due_day = ?,
                     last_payment_date = ?,
-                    status = ?
-                WHERE id = ?
+                    status = ?,
+                    version = version + 1
+                WHERE id = ? AND version = ?
                 """,
                 (
                     debt.lender_name,
                     debt.debt_type,
                     debt.original_currency,
-                    debt.principal_original,
-                    debt.principal_outstanding_cad,
+                    to_cents(debt.principal_original),
+                    to_cents(debt.principal_outstanding_cad),
                     debt.interest_rate_annual,
                     debt.penal_rate_annual,
-                    format_date(debt.loan_start_date),
-                    debt.installment_amount,
+                    to_epoch_day(debt.loan_start_date),
+                    to_cents(debt.installment_amount),
                     debt.installment_due_day,
-                    format_date(debt.last_payment_date) if debt.last_payment_date else None,
+                    to_epoch_day(debt.last_payment_date),
                     debt.status,
                     debt.id,
+                    debt.version,
                 ),
             )
+            return _swapped_version(conn, cursor, "debts", debt.id, debt.version)
 
     def add_credit_card(self, card: CreditCard) -> int:
-        with self._connect() as conn:
+        with self._write("credit_cards") as conn:
             cursor = conn.execute(
                 """
                 INSERT INTO credit_cards (
@@ -158,59 +698,71 @@ class Repository:
                 (
                     card.bank_name,
                     card.card_name,
-                    card.credit_limit_cad,
-                    card.statement_balance_cad,
+                    to_cents(card.credit_limit_cad),
+                    to_cents(card.statement_balance_cad),
                     card.interest_rate_annual,
-                    format_date(card.statement_date),
-                    format_date(card.due_date),
-                    format_date(card.last_payment_date) if card.last_payment_date else None,
-                    card.flat_late_fee_cad,
+                    to_epoch_day(card.statement_date),
+                    to_epoch_day(card.due_date),
+                    to_epoch_day(card.last_payment_date),
+                    to_cents(card.flat_late_fee_cad),
                     card.status,
                 ),
             )
             return int(cursor.lastrowid)
 
     def list_credit_cards(self, status: Optional[str] = None) -> List[CreditCard]:
+        return list(self._cache.get("credit_cards", ("list", status), lambda: self._load_credit_cards(status)))
+
+    def _load_credit_cards(self, status: Optional[str]) -> List[CreditCard]:
+        query = f"SELECT {CREDIT_CARD_SELECT} FROM credit_cards"
+        params: Tuple[object, ...] = ()
+        if status:
+            query += " WHERE status = ?"
+            params = (status,)
         with self._connect() as conn:
-            if status:
-                rows = conn.execute("SELECT * FROM credit_cards WHERE status = ?", (status,)).fetchall()
-            else:
-                rows = conn.execute("SELECT * FROM credit_cards").fetchall()
-
-        return [
-            CreditCard(
-                id=row["id"],
-                bank_name=row["bank_name"],
-                card_name=row["card_name"],
-                credit_limit_cad=row["credit_limit_cad"],
-                statement_balance_cad=row["statement_balance_cad"],
-                interest_rate_annual=row["interest_rate_annual"],
-                statement_date=parse_date(row["statement_date"]),
-                due_date=parse_date(row["due_date"]),
-                last_payment_date=parse_date(row["last_payment_date"]),
-                flat_late_fee_cad=row["flat_late_fee_cad"],
-                status=row["status"],
-            )
-            for row in rows
-        ]
+            return list(map(_credit_card_from_row, fetch_rows(conn, query, params)))
 
-    def update_credit_card_balance(self, card_id: int, statement_balance_cad: float) -> None:
+    def get_credit_card(self, card_id: int) -> Optional[CreditCard]:
+        return self._cache.get(
+            "credit_cards",
+            ("id", card_id),
+            lambda: self._load_one(_credit_card_from_row, CREDIT_CARD_SELECT, "credit_cards", card_id),
+        )
+
+    def credit_card_columns(self, status: Optional[str] = None) -> Dict[str, np.ndarray]:
+        return self._account_columns("credit_cards", CREDIT_CARD_COLUMNS, status)
+
+    def credit_cards_frame(self, status: Optional[str] = None) -> pd.DataFrame:
+        return to_frame(self.credit_card_columns(status))
+
+    def _account_columns(
+        self, table: str, columns: Dict[str, object], status: Optional[str]
+    ) -> Dict[str, np.ndarray]:
+        query = f"SELECT {select_list(columns)} FROM {table}"
+        params: List[object] = []
+        if status:
+            query += " WHERE status = ?"
+            params.append(status)
         with self._connect() as conn:
+            return fetch_columns(conn, query, params, columns)
+
+    def update_credit_card_balance(self, card_id: int, statement_balance_cad: float) -> None:
+        with self._write("credit_cards") as conn:
             conn.execute(
-                "UPDATE credit_cards SET statement_balance_cad = ? WHERE id = ?",
-                (statement_balance_cad, card_id),
+                "UPDATE credit_cards SET statement_balance_cad = ?, version = version + 1 WHERE id = ?",
+                (to_cents(statement_balance_cad), card_id),
             )
 
     def update_credit_card_last_payment(self, card_id: int, last_payment_date: date) -> None:
-        with self._connect() as conn:
+        with self._write("credit_cards") as conn:
             conn.execute(
-                "UPDATE credit_cards SET last_payment_date = ? WHERE id = ?",
-                (format_date(last_payment_date), card_id),
+                "UPDATE credit_cards SET last_payment_date = ?, version = version + 1 WHERE id = ?",
+                (to_epoch_day(last_payment_date), card_id),
             )
 
-    def update_credit_card(self, card: CreditCard) -> None:
-        with self._connect() as conn:
-            conn.execute(
+    def update_credit_card(self, card: CreditCard) -> int:
+        with self._write("credit_cards") as conn:
+            cursor = conn.execute(
                 """
                 UPDATE credit_cards SET
                     bank_name = ?,
@@ -222,23 +774,26 @@ class Repository:
                     due_date = ?,
                     last_payment_date = ?,
                     flat_late_fee_cad = ?,
-                    status = ?
-                WHERE id = ?
+                    status = ?,
+                    version = version + 1
+                WHERE id = ? AND version = ?
                 """,
                 (
                     card.bank_name,
                     card.card_name,
-                    card.credit_limit_cad,
-                    card.statement_balance_cad,
+                    to_cents(card.credit_limit_cad),
+                    to_cents(card.statement_balance_cad),
                     card.interest_rate_annual,
-                    format_date(card.statement_date),
-                    format_date(card.due_date),
-                    format_date(card.last_payment_date) if card.last_payment_date else None,
-                    card.flat_late_fee_cad,
+                    to_epoch_day(card.statement_date),
+                    to_epoch_day(card.due_date),
+                    to_epoch_day(card.last_payment_date),
+                    to_cents(card.flat_late_fee_cad),
                     card.status,
                     card.id,
+                    card.version,
                 ),
             )
+            return _swapped_version(conn, cursor, "credit_cards", card.id, card.version)
 
     def add_payment(
         self,
@@ -252,7 +807,7 @@ class Repository:
         applied_interest: float,
         applied_principal: float,
     ) -> int:
-        with self._connect() as conn:
+        with self._write("payments") as conn:
             cursor = conn.execute(
                 """
                 INSERT INTO payments (
@@ -262,21 +817,32 @@ class Repository:
                 ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
                 """,
                 (
-                    format_date(payment_date),
+                    to_epoch_day(payment_date),
                     target_type,
                     target_id,
-                    payment_amount_original,
+                    to_cents(payment_amount_original),
                     payment_currency,
-                    payment_amount_cad,
-                    applied_penal,
-                    applied_interest,
-                    applied_principal,
+                    to_cents(payment_amount_cad),
+                    to_cents(applied_penal),
+                    to_cents(applied_interest),
+                    to_cents(applied_principal),
                 ),
             )
             return int(cursor.lastrowid)
 
-    def list_payments(self, target_type: Optional[str] = None, target_id: Optional[int] = None) -> List[PaymentRecord]:
-        query = "SELECT * FROM payments"
+    def _payments_query(
+        self,
+        select: str,
+        target_type: Optional[str],
+        target_id: Optional[int],
+        start_date: Optional[date] = None,
+        end_date: Optional[date] = None,
+        source: str = "payments",
+        order_by: Optional[str] = "payment_date DESC",
+        limit: Optional[int] = None,
+        offset: int = 0,
+    ) -> Tuple[str, List[object]]:
+        query = f"SELECT {select} FROM {source}"
         params: List[object] = []
         clauses = []
         if target_type:
@@ -285,70 +851,522 @@ class Repository:
         if target_id is not None:
             clauses.append("target_id = ?")
             params.append(target_id)
+        if start_date is not None:
+            clauses.append("payment_date >= ?")
+            params.append(to_epoch_day(start_date))
+        if end_date is not None:
+            clauses.append("payment_date <= ?")
+            params.append(to_epoch_day(end_date))
         if clauses:
             query += " WHERE " + " AND ".join(clauses)
-        query += " ORDER BY payment_date DESC"
+        if order_by:
+            query += f" ORDER BY {order_by}"
+        if limit is not None:
+            query += " LIMIT ? OFFSET ?"
+            params.extend((limit, offset))
+        return query, params
 
+    def _archived_years(
+        self, start_date: Optional[date], end_date: Optional[date], include_archived: bool
+    ) -> List[int]:
+        if start_date is None and not include_archived:
+            return []
+        query = "SELECT year FROM payment_archives WHERE last_date >= ? AND first_date <= ? ORDER BY year DESC"
+        params = (
+            to_epoch_day(start_date) if start_date is not None else 0,
+            to_epoch_day(end_date) if end_date is not None else 2 ** 62,
+        )
         with self._connect() as conn:
-            rows = conn.execute(query, tuple(params)).fetchall()
-
-        return [
-            PaymentRecord(
-                id=row["id"],
-                payment_date=parse_date(row["payment_date"]),
-                target_type=row["target_type"],
-                target_id=row["target_id"],
-                payment_amount_original=row["payment_amount_original"],
-                payment_currency=row["payment_currency"],
-                payment_amount_cad=row["payment_amount_cad"],
-                applied_penal=row["applied_penal"],
-                applied_interest=row["applied_interest"],
-                applied_principal=row["applied_principal"],
+            years = [int(row[0]) for row in conn.execute(query, params).fetchall()]
+        return self._archive.existing_years(years)
+
+    def _payment_rows(
+        self,
+        columns: Sequence[str],
+        target_type: Optional[str],
+        target_id: Optional[int],
+        start_date: Optional[date],
+        end_date: Optional[date],
+        include_archived: bool,
+        sort_by: str = "payment_date",
+        descending: bool = True,
+        limit: Optional[int] = None,
+        offset: int = 0,
+    ) -> List[Tuple]:
+        if sort_by not in PAYMENT_COLUMNS:
+            raise ValueError(f"Unknown payment sort column: {sort_by}")
+        direction = "DESC" if descending else "ASC"
+        keys = [sort_by] if sort_by == "id" else [sort_by, "id"]
+        order_by = ", ".join(f"{key} {direction}" for key in keys)
+        years = self._archived_years(start_date, end_date, include_archived)
+        if len(years) <= MAX_ATTACHED:
+            query, params = self._payments_query(
+                ", ".join(columns),
+                target_type,
+                target_id,
+                start_date,
+                end_date,
+                source=ARCHIVE_VIEW if years else "payments",
+                order_by=order_by,
+                limit=limit,
+                offset=offset,
+            )
+            if not years:
+                with self._connect() as conn:
+                    return fetch_rows(conn, query, params)
+            with self._pool.dedicated() as conn:
+                with self._archive.attached(conn, years) as schemas:
+                    self._archive.create_history_view(conn, schemas, include_hot=True)
+                    return fetch_rows(conn, query, params)
+
+        # Too many archives to attach at once: each batch returns its own first offset + limit rows
+        # and the batches are merged here, with the sort keys selected alongside the requested columns.
+        selected = list(columns) + [key for key in keys if key not in columns]
+        query, params = self._payments_query(
+            ", ".join(selected),
+            target_type,
+            target_id,
+            start_date,
+            end_date,
+            source=ARCHIVE_VIEW,
+            order_by=order_by,
+            limit=None if limit is None else offset + limit,
+        )
+        rows: List[Tuple] = []
+        with self._pool.dedicated() as conn:
+            for index, batch in enumerate(batched(years)):
+                with self._archive.attached(conn, batch) as schemas:
+                    self._archive.create_history_view(conn, schemas, include_hot=index == 0)
+                    rows.extend(fetch_rows(conn, query, params))
+        rows.sort(key=itemgetter(*(selected.index(key) for key in keys)), reverse=descending)
+        rows = rows[offset:] if limit is None else rows[offset : offset + limit]
+        if len(selected) > len(columns):
+            rows = [row[: len(columns)] for row in rows]
+        return rows
+
+    def count_payments(
+        self,
+        target_type: Optional[str] = None,
+        target_id: Optional[int] = None,
+        start_date: Optional[date] = None,
+        end_date: Optional[date] = None,
+        include_archived: bool = False,
+    ) -> int:
+        years = self._archived_years(start_date, end_date, include_archived)
+        query, params = self._payments_query(
+            "COUNT(*)",
+            target_type,
+            target_id,
+            start_date,
+            end_date,
+            source=ARCHIVE_VIEW if years else "payments",
+            order_by=None,
+        )
+        if not years:
+            with self._connect() as conn:
+                return int(conn.execute(query, params).fetchone()[0])
+        total = 0
+        with self._pool.dedicated() as conn:
+            for index, batch in enumerate(batched(years)):
+                with self._archive.attached(conn, batch) as schemas:
+                    self._archive.create_history_view(conn, schemas, include_hot=index == 0)
+                    total += int(conn.execute(query, params).fetchone()[0])
+        return total
+
+    def payment_page(
+        self,
+        target_type: Optional[str] = None,
+        target_id: Optional[int] = None,
+        start_date: Optional[date] = None,
+        end_date: Optional[date] = None,
+        include_archived: bool = False,
+        sort_by: str = "payment_date",
+        descending: bool = True,
+        limit: int = 100,
+        offset: int = 0,
+        fields: Optional[Sequence[str]] = None,
+    ) -> Dict[str, np.ndarray]:
+        if limit < 1:
+            raise ValueError("limit must be at least 1")
+        if offset < 0:
+            raise ValueError("offset must not be negative")
+        columns = {name: PAYMENT_COLUMNS[name] for name in fields} if fields else PAYMENT_COLUMNS
+        rows = self._payment_rows(
+            list(columns),
+            target_type,
+            target_id,
+            start_date,
+            end_date,
+            include_archived,
+            sort_by=sort_by,
+            descending=descending,
+            limit=limit,
+            offset=offset,
+        )
+        return columns_from_rows(rows, columns)
+
+    def list_payments(
+        self,
+        target_type: Optional[str] = None,
+        target_id: Optional[int] = None,
+        start_date: Optional[date] = None,
+        end_date: Optional[date] = None,
+        include_archived: bool = False,
+    ) -> List[PaymentRecord]:
+        rows = self._payment_rows(
+            PAYMENT_FIELDS, target_type, target_id, start_date, end_date, include_archived
+        )
+        return list(map(_payment_from_row, rows))
+
+    def payment_columns(
+        self,
+        target_type: Optional[str] = None,
+        target_id: Optional[int] = None,
+        start_date: Optional[date] = None,
+        end_date: Optional[date] = None,
+        include_archived: bool = False,
+        fields: Optional[Sequence[str]] = None,
+    ) -> Dict[str, np.ndarray]:
+        columns = {name: PAYMENT_COLUMNS[name] for name in fields} if fields else PAYMENT_COLUMNS
+        rows = self._payment_rows(list(columns), target_type, target_id, start_date, end_date, include_archived)
+        return columns_from_rows(rows, columns)
+
+    def payments_frame(
+        self,
+        target_type: Optional[str] = None,
+        target_id: Optional[int] = None,
+        start_date: Optional[date] = None,
+        end_date: Optional[date] = None,
+        include_archived: bool = False,
+    ) -> pd.DataFrame:
+        return to_frame(
+            self.payment_columns(target_type, target_id, start_date, end_date, include_archived)
+        )
+
+    def get_payment_totals(
+        self,
+        target_type: Optional[str] = None,
+        target_id: Optional[int] = None,
+        payment_month: Optional[str] = None,
+    ) -> PaymentTotals:
+        # Unfiltered totals are the one grand total row; filters sum the matching per-target, per-month rows.
+        filters = {"target_type": target_type, "target_id": target_id, "payment_month": payment_month}
+        clauses = [f"{column} = ?" for column, value in filters.items() if value is not None]
+        if clauses:
+            query = f"SELECT {PAYMENT_TOTALS_SUMS} FROM payment_totals WHERE " + " AND ".join(clauses)
+        else:
+            query = f"SELECT {PAYMENT_TOTALS_VALUES} FROM payment_grand_totals WHERE id = 1"
+        params = [value for value in filters.values() if value is not None]
+        with self._connect() as conn:
+            row = conn.execute(query, params).fetchone()
+        return _payment_totals(row or (0, 0, 0, 0, 0))
+
+    def _load_ledger_totals(self, conn: sqlite3.Connection) -> None:
+        conn.execute("DROP TABLE IF EXISTS temp.ledger_totals")
+        conn.execute(
+            """
+            CREATE TEMP TABLE ledger_totals (
+                target_type TEXT NOT NULL,
+                target_id INTEGER NOT NULL,
+                payment_month TEXT NOT NULL,
+                payment_count INTEGER NOT NULL,
+                payment_amount_cad INTEGER NOT NULL,
+                applied_penal INTEGER NOT NULL,
+                applied_interest INTEGER NOT NULL,
+                applied_principal INTEGER NOT NULL,
+                PRIMARY KEY (target_type, target_id, payment_month)
+            )
+            """
+        )
+        insert = (
+            f"INSERT INTO temp.ledger_totals ({PAYMENT_TOTALS_COLUMNS}) "
+            f"{PAYMENT_TOTALS_AGGREGATE} {PAYMENT_TOTALS_UPSERT}"
+        )
+        conn.execute(insert.format(source="main.payments", where="true"))
+        years = [int(row[0]) for row in conn.execute("SELECT year FROM payment_archives").fetchall()]
+        for batch in batched(self._archive.existing_years(years)):
+            with self._archive.attached(conn, batch) as schemas:
+                self._archive.create_history_view(conn, schemas, include_hot=False)
+                conn.execute(insert.format(source=ARCHIVE_VIEW, where="true"))
+
+    def _ledger_mismatches(self, conn: sqlite3.Connection) -> List[PaymentTotalsMismatch]:
+        rows = conn.execute(
+            """
+            WITH keys AS (
+                SELECT target_type, target_id, payment_month FROM temp.ledger_totals
+                UNION
+                SELECT target_type, target_id, payment_month FROM payment_totals
+            )
+            SELECT
+                k.target_type, k.target_id, k.payment_month,
+                COALESCE(t.payment_count, 0), COALESCE(t.payment_amount_cad, 0),
+                COALESCE(t.applied_penal, 0), COALESCE(t.applied_interest, 0),
+                COALESCE(t.applied_principal, 0),
+                COALESCE(l.payment_count, 0), COALESCE(l.payment_amount_cad, 0),
+                COALESCE(l.applied_penal, 0), COALESCE(l.applied_interest, 0),
+                COALESCE(l.applied_principal, 0)
+            FROM keys k
+            LEFT JOIN payment_totals t USING (target_type, target_id, payment_month)
+            LEFT JOIN temp.ledger_totals l USING (target_type, target_id, payment_month)
+            WHERE COALESCE(t.payment_count, 0) != COALESCE(l.payment_count, 0)
+                OR COALESCE(t.payment_amount_cad, 0) != COALESCE(l.payment_amount_cad, 0)
+                OR COALESCE(t.applied_penal, 0) != COALESCE(l.applied_penal, 0)
+                OR COALESCE(t.applied_interest, 0) != COALESCE(l.applied_interest, 0)
+                OR COALESCE(t.applied_principal, 0) != COALESCE(l.applied_principal, 0)
+            ORDER BY k.payment_month, k.target_type, k.target_id
+            """
+        ).fetchall()
+
+        mismatches = [
+            PaymentTotalsMismatch(
+                target_type=row[0],
+                target_id=row[1],
+                payment_month=row[2],
+                rollup=_payment_totals(row[3:8]),
+                ledger=_payment_totals(row[8:13]),
             )
             for row in rows
         ]
+        # The grand total row is what get_payment_totals() reads, so it is reconciled too, reported as "all".
+        grand = conn.execute(f"SELECT {PAYMENT_TOTALS_VALUES} FROM payment_grand_totals WHERE id = 1").fetchone()
+        ledger = conn.execute(f"SELECT {PAYMENT_TOTALS_SUMS} FROM temp.ledger_totals").fetchone()
+        grand = tuple(grand) if grand else (0,) * len(ledger)
+        if grand != tuple(ledger):
+            mismatches.append(PaymentTotalsMismatch("all", 0, "all", _payment_totals(grand), _payment_totals(ledger)))
+        return mismatches
 
-    def add_savings_account(self, account_name: str, currency: str, balance_cad: float) -> int:
+    def verify_payment_totals(self) -> List[PaymentTotalsMismatch]:
+        with self._pool.exclusive() as conn:
+            self._load_ledger_totals(conn)
+            try:
+                return self._ledger_mismatches(conn)
+            finally:
+                conn.execute("DROP TABLE temp.ledger_totals")
+
+    def rebuild_payment_totals(self) -> List[PaymentTotalsMismatch]:
+        with self._pool.exclusive() as conn:
+            self._load_ledger_totals(conn)
+            try:
+                mismatches = self._ledger_mismatches(conn)
+                with self._write("payment_totals"):
+                    conn.execute("DELETE FROM payment_totals")
+                    conn.execute(
+                        f"INSERT INTO payment_totals ({PAYMENT_TOTALS_COLUMNS}) "
+                        f"SELECT {PAYMENT_TOTALS_COLUMNS} FROM temp.ledger_totals"
+                    )
+                    conn.execute(
+                        f"INSERT OR REPLACE INTO payment_grand_totals (id, {PAYMENT_TOTALS_VALUES}) "
+                        f"SELECT 1, {PAYMENT_TOTALS_SUMS} FROM payment_totals"
+                    )
+            finally:
+                conn.execute("DROP TABLE temp.ledger_totals")
+        return mismatches
+
+    def reconcile_debt_principal(self, tolerance_cents: int = 0) -> List[PrincipalMismatch]:
+        with self._pool.dedicated() as conn:
+            conn.execute(
+                """
+                CREATE TEMP TABLE archived_principal (
+                    debt_id INTEGER NOT NULL,
+                    payment_id INTEGER NOT NULL,
+                    payment_date INTEGER NOT NULL,
+                    applied_principal INTEGER NOT NULL
+                )
+                """
+            )
+            years = [int(row[0]) for row in conn.execute("SELECT year FROM payment_archives").fetchall()]
+            for batch in batched(self._archive.existing_years(years)):
+                with self._archive.attached(conn, batch) as schemas:
+                    self._archive.create_history_view(conn, schemas, include_hot=False)
+                    conn.execute(
+                        f"""
+                        INSERT INTO temp.archived_principal
+                        SELECT target_id, id, payment_date, applied_principal
+                        FROM {ARCHIVE_VIEW} WHERE target_type = 'loan'
+                        """
+                    )
+            ledger = "SELECT target_id, id, payment_date, applied_principal FROM main.payments WHERE target_type = 'loan'"
+            if conn.execute("SELECT 1 FROM temp.archived_principal LIMIT 1").fetchone():
+                ledger += " UNION ALL SELECT * FROM temp.archived_principal"
+            # Totals run first over the covering index; running sums are only computed for the
+            # debts that disagree. Opening balances convert principal_original at today's FX rate,
+            # and debts in a currency without a rate are skipped rather than reported against a guess.
+            rows = fetch_rows(
+                conn,
+                f"""
+                WITH ledger (debt_id, payment_id, payment_date, applied_principal) AS NOT MATERIALIZED ({ledger}),
+                opening AS (
+                    SELECT
+                        d.id AS debt_id,
+                        d.principal_outstanding_cad AS recorded,
+                        CASE
+                            WHEN d.original_currency = 'CAD' THEN d.principal_original
+                            ELSE CAST(round(d.principal_original * f.rate_to_cad) AS INTEGER)
+                        END AS opening
+                    FROM debts d
+                    LEFT JOIN fx_rates f ON f.currency = d.original_currency
+                ),
+                applied AS (
+                    SELECT debt_id, SUM(applied_principal) AS applied, COUNT(*) AS payment_count
+                    FROM ledger
+                    GROUP BY debt_id
+                ),
+                mismatched AS (
+                    SELECT
+                        o.debt_id, o.opening, o.recorded,
+                        o.opening - COALESCE(a.applied, 0) AS expected,
+                        COALESCE(a.payment_count, 0) AS payment_count
+                    FROM opening o
+                    LEFT JOIN applied a USING (debt_id)
+                    WHERE o.opening IS NOT NULL AND abs(o.opening - COALESCE(a.applied, 0) - o.recorded) > ?1
+                ),
+                running AS (
+                    SELECT
+                        m.debt_id, l.payment_id, l.payment_date, m.recorded,
+                        m.opening - SUM(l.applied_principal) OVER (
+                            PARTITION BY m.debt_id ORDER BY l.payment_date, l.payment_id
+                            ROWS UNBOUNDED PRECEDING
+                        ) AS balance_after
+                    FROM mismatched m
+                    JOIN ledger l USING (debt_id)
+                ),
+                diverged AS (
+                    SELECT
+                        debt_id, payment_id, payment_date, balance_after,
+                        ROW_NUMBER() OVER (PARTITION BY debt_id ORDER BY payment_date, payment_id) AS position
+                    FROM running
+                    WHERE balance_after < recorded - ?1
+                )
+                SELECT
+                    m.debt_id, m.opening, m.recorded, m.expected, m.payment_count,
+                    d.payment_id, d.payment_date, d.balance_after
+                FROM mismatched m
+                LEFT JOIN diverged d ON d.debt_id = m.debt_id AND d.position = 1
+                ORDER BY m.debt_id
+                """,
+                (tolerance_cents,),
+            )
+        return list(map(_principal_mismatch_from_row, rows))
+
+    def archived_payment_years(self) -> List[int]:
         with self._connect() as conn:
+            return [int(row[0]) for row in conn.execute("SELECT year FROM payment_archives ORDER BY year")]
+
+    def archive_payments(self, before: date) -> Dict[int, int]:
+        cutoff = to_epoch_day(before)
+        moved: Dict[int, int] = {}
+        with self._pool.exclusive() as conn:
+            years = [
+                int(row[0])
+                for row in conn.execute(
+                    f"SELECT DISTINCT {PAYMENT_YEAR_SQL} FROM payments WHERE payment_date < ? ORDER BY 1",
+                    (cutoff,),
+                ).fetchall()
+            ]
+            for batch in batched(years):
+                with self._archive.attached(conn, batch, writable=True):
+                    # The copy commits before the hot rows go, so a crash in between leaves
+                    # duplicates (which history reads ignore) rather than lost payments.
+                    with self._pool.write():
+                        for year in batch:
+                            start, end = year_bounds(year)
+                            conn.execute(
+                                f"""
+                                INSERT OR REPLACE INTO {archive_schema(year)}.payments
+                                SELECT * FROM main.payments WHERE payment_date >= ? AND payment_date < ?
+                                """,
+                                (start, min(end, cutoff)),
+                            )
+                    with self._write("payments", "payment_totals") as tx:
+                        seq = tx.execute("SELECT COALESCE(MAX(seq), 0) FROM change_log").fetchone()[0]
+                        for year in batch:
+                            moved[year] = self._drop_archived_year(tx, year, cutoff)
+                        tx.execute(
+                            """
+                            UPDATE change_log SET operation = 'archive'
+                            WHERE seq > ? AND table_name = 'payments' AND operation = 'delete'
+                            """,
+                            (seq,),
+                        )
+        return moved
+
+    def _drop_archived_year(self, conn: sqlite3.Connection, year: int, cutoff: int) -> int:
+        schema = archive_schema(year)
+        start, end = year_bounds(year)
+        where = (
+            "payment_date >= ? AND payment_date < ? "
+            f"AND id IN (SELECT id FROM {schema}.payments)"
+        )
+        params = (start, min(end, cutoff))
+        # The delete trigger subtracts every archived row from payment_totals; add them back
+        # first so the rollup keeps covering cold history.
+        aggregate = PAYMENT_TOTALS_AGGREGATE.format(source="main.payments", where=where)
+        conn.execute(
+            f"INSERT INTO payment_totals ({PAYMENT_TOTALS_COLUMNS}) {aggregate} {PAYMENT_TOTALS_UPSERT}",
+            params,
+        )
+        count = conn.execute(f"DELETE FROM main.payments WHERE {where}", params).rowcount
+        conn.execute(
+            f"""
+            INSERT OR REPLACE INTO payment_archives (year, row_count, first_date, last_date)
+            SELECT ?, COUNT(*), MIN(payment_date), MAX(payment_date) FROM {schema}.payments
+            """,
+            (year,),
+        )
+        return count
+
+    def add_savings_account(self, account_name: str, currency: str, balance_cad: float) -> int:
+        with self._write("savings") as conn:
             cursor = conn.execute(
                 "INSERT INTO savings (account_name, currency, balance_cad) VALUES (?, ?, ?)",
-                (account_name, currency, balance_cad),
+                (account_name, currency, to_cents(balance_cad)),
             )
             return int(cursor.lastrowid)
 
     def list_savings(self) -> List[SavingsAccount]:
+        return list(self._cache.get("savings", ("list",), self._load_savings))
+
+    def _load_savings(self) -> List[SavingsAccount]:
         with self._connect() as conn:
-            rows = conn.execute("SELECT * FROM savings").fetchall()
-        return [
-            SavingsAccount(
-                id=row["id"],
-                account_name=row["account_name"],
-                currency=row["currency"],
-                balance_cad=row["balance_cad"],
-            )
-            for row in rows
-        ]
+            return list(map(_savings_from_row, fetch_rows(conn, f"SELECT {SAVINGS_SELECT} FROM savings")))
+
+    def get_savings_account(self, account_id: int) -> Optional[SavingsAccount]:
+        return self._cache.get(
+            "savings",
+            ("id", account_id),
+            lambda: self._load_one(_savings_from_row, SAVINGS_SELECT, "savings", account_id),
+        )
 
-    def update_savings(self, account: SavingsAccount) -> None:
+    def savings_columns(self) -> Dict[str, np.ndarray]:
         with self._connect() as conn:
-            conn.execute(
+            return fetch_columns(conn, f"SELECT {select_list(SAVINGS_COLUMNS)} FROM savings", (), SAVINGS_COLUMNS)
+
+    def savings_frame(self) -> pd.DataFrame:
+        return to_frame(self.savings_columns())
+
+    def update_savings(self, account: SavingsAccount) -> int:
+        with self._write("savings") as conn:
+            cursor = conn.execute(
                 """
                 UPDATE savings SET
                     account_name = ?,
                     currency = ?,
-                    balance_cad = ?
-                WHERE id = ?
+                    balance_cad = ?,
+                    version = version + 1
+                WHERE id = ? AND version = ?
                 """,
                 (
                     account.account_name,
                     account.currency,
-                    account.balance_cad,
+                    to_cents(account.balance_cad),
                     account.id,
+                    account.version,
                 ),
             )
+            return _swapped_version(conn, cursor, "savings", account.id, account.version)
 
     def upsert_fx_rate(self, rate: FxRate) -> None:
-        with self._connect() as conn:
+        with self._write("fx_rates") as conn:
             conn.execute(
                 """
                 INSERT INTO fx_rates (currency, rate_to_cad, last_updated, source)
@@ -358,36 +1376,27 @@ class Repository:
                     last_updated = excluded.last_updated,
                     source = excluded.source
                 """,
-                (rate.currency, rate.rate_to_cad, format_date(rate.last_updated), rate.source),
+                (rate.currency, rate.rate_to_cad, to_epoch_day(rate.last_updated), rate.source),
             )
 
     def get_fx_rate(self, currency: str) -> Optional[FxRate]:
+        key = currency.upper()
+        return self._cache.get("fx_rates", ("get", key), lambda: self._load_fx_rate(key))
+
+    def _load_fx_rate(self, currency: str) -> Optional[FxRate]:
         with self._connect() as conn:
-            row = conn.execute("SELECT * FROM fx_rates WHERE currency = ?", (currency.upper(),)).fetchone()
-        if not row:
-            return None
-        return FxRate(
-            currency=row["currency"],
-            rate_to_cad=row["rate_to_cad"],
-            last_updated=parse_date(row["last_updated"]),
-            source=row["source"],
-        )
+            rows = fetch_rows(conn, f"SELECT {FX_RATE_SELECT} FROM fx_rates WHERE currency = ?", (currency.upper(),))
+        return _fx_rate_from_row(rows[0]) if rows else None
 
     def list_fx_rates(self) -> List[FxRate]:
+        return list(self._cache.get("fx_rates", ("list",), self._load_fx_rates))
+
+    def _load_fx_rates(self) -> List[FxRate]:
         with self._connect() as conn:
-            rows = conn.execute("SELECT * FROM fx_rates").fetchall()
-        return [
-            FxRate(
-                currency=row["currency"],
-                rate_to_cad=row["rate_to_cad"],
-                last_updated=parse_date(row["last_updated"]),
-                source=row["source"],
-            )
-            for row in rows
-        ]
+            return list(map(_fx_rate_from_row, fetch_rows(conn, f"SELECT {FX_RATE_SELECT} FROM fx_rates")))
 
     def add_monthly_snapshot(self, snapshot: MonthlySnapshot) -> None:
-        with self._connect() as conn:
+        with self._write("monthly_snapshots") as conn:
             conn.execute(
                 """
                 INSERT INTO monthly_snapshots (
@@ -396,24 +1405,44 @@ class Repository:
                 ) VALUES (?, ?, ?, ?, ?)
                 """,
                 (
-                    format_date(snapshot.snapshot_date),
-                    snapshot.total_debt_cad,
-                    snapshot.total_interest_cad,
-                    snapshot.total_savings_cad,
-                    snapshot.net_position_cad,
+                    to_epoch_day(snapshot.snapshot_date),
+                    to_cents(snapshot.total_debt_cad),
+                    to_cents(snapshot.total_interest_cad),
+                    to_cents(snapshot.total_savings_cad),
+                    to_cents(snapshot.net_position_cad),
                 ),
             )
 
+    def add_monthly_snapshot_columns(self, columns: Dict[str, np.ndarray]) -> int:
+        import numpy as np
+
+        days = datetime64_to_epoch_days(columns["snapshot_date"])
+        money = [np.asarray(columns[name], dtype=np.int64) for name in MONEY_COLUMNS["monthly_snapshots"]]
+        with self._write("monthly_snapshots") as conn:
+            cursor = conn.executemany(
+                f"INSERT OR IGNORE INTO monthly_snapshots ({MONTHLY_SNAPSHOT_SELECT}) VALUES (?, ?, ?, ?, ?)",
+                zip(days.tolist(), *(values.tolist() for values in money)),
+            )
+            return cursor.rowcount
+
+    def get_monthly_snapshot(self, snapshot_date: date) -> Optional[MonthlySnapshot]:
+        query = f"SELECT {MONTHLY_SNAPSHOT_SELECT} FROM monthly_snapshots WHERE snapshot_date = ?"
+        with self._connect() as conn:
+            rows = fetch_rows(conn, query, (to_epoch_day(snapshot_date),))
+        return _monthly_snapshot_from_row(rows[0]) if rows else None
+
     def list_monthly_snapshots(self) -> List[MonthlySnapshot]:
+        query = f"SELECT {MONTHLY_SNAPSHOT_SELECT} FROM monthly_snapshots ORDER BY snapshot_date DESC"
         with self._connect() as conn:
-            rows = conn.execute("SELECT * FROM monthly_snapshots ORDER BY snapshot_date DESC").fetchall()
-        return [
-            MonthlySnapshot(
-                snapshot_date=parse_date(row["snapshot_date"]),
-                total_debt_cad=row["total_debt_cad"],
-                total_interest_cad=row["total_interest_cad"],
-                total_savings_cad=row["total_savings_cad"],
-                net_position_cad=row["net_position_cad"],
-            )
-            for row in rows
-        ]
+            return list(map(_monthly_snapshot_from_row, fetch_rows(conn, query)))
+
+    def monthly_snapshot_columns(self) -> Dict[str, np.ndarray]:
+        return dict(self._cache.get("monthly_snapshots", ("columns",), self._load_monthly_snapshot_columns))
+
+    def _load_monthly_snapshot_columns(self) -> Dict[str, np.ndarray]:
+        query = f"SELECT {select_list(MONTHLY_SNAPSHOT_COLUMNS)} FROM monthly_snapshots ORDER BY snapshot_date DESC"
+        with self._connect() as conn:
+            return fetch_columns(conn, query, (), MONTHLY_SNAPSHOT_COLUMNS)
+
+    def monthly_snapshots_frame(self) -> pd.DataFrame:
+        return to_frame(self.monthly_snapshot_columns())
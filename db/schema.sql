@@ -5,68 +5,424 @@ CREATE TABLE IF NOT EXISTS debts (
     lender_name TEXT NOT NULL,
     debt_type TEXT NOT NULL,
     original_currency TEXT NOT NULL,
-    principal_original REAL NOT NULL,
-    principal_outstanding_cad REAL NOT NULL,
+    principal_original INTEGER NOT NULL,
+    principal_outstanding_cad INTEGER NOT NULL,
     interest_rate_annual REAL NOT NULL,
     penal_rate_annual REAL NOT NULL,
-    loan_start_date TEXT NOT NULL,
-    installment_amount REAL,
+    loan_start_date INTEGER NOT NULL,
+    installment_amount INTEGER,
     installment_due_day INTEGER,
-    last_payment_date TEXT,
-    status TEXT NOT NULL
+    last_payment_date INTEGER,
+    status TEXT NOT NULL,
+    version INTEGER NOT NULL DEFAULT 1
 );
 
 CREATE TABLE IF NOT EXISTS credit_cards (
     id INTEGER PRIMARY KEY AUTOINCREMENT,
     bank_name TEXT NOT NULL,
     card_name TEXT NOT NULL,
-    credit_limit_cad REAL NOT NULL,
-    statement_balance_cad REAL NOT NULL,
+    credit_limit_cad INTEGER NOT NULL,
+    statement_balance_cad INTEGER NOT NULL,
     interest_rate_annual REAL NOT NULL,
-    statement_date TEXT NOT NULL,
-    due_date TEXT NOT NULL,
-    last_payment_date TEXT,
-    flat_late_fee_cad REAL NOT NULL,
-    status TEXT NOT NULL
+    statement_date INTEGER NOT NULL,
+    due_date INTEGER NOT NULL,
+    last_payment_date INTEGER,
+    flat_late_fee_cad INTEGER NOT NULL,
+    status TEXT NOT NULL,
+    version INTEGER NOT NULL DEFAULT 1
 );
 
 CREATE TABLE IF NOT EXISTS payments (
     id INTEGER PRIMARY KEY AUTOINCREMENT,
-    payment_date TEXT NOT NULL,
+    payment_date INTEGER NOT NULL,
     target_type TEXT NOT NULL,
     target_id INTEGER NOT NULL,
-    payment_amount_original REAL NOT NULL,
+    payment_amount_original INTEGER NOT NULL,
     payment_currency TEXT NOT NULL,
-    payment_amount_cad REAL NOT NULL,
-    applied_penal REAL NOT NULL,
-    applied_interest REAL NOT NULL,
-    applied_principal REAL NOT NULL
+    payment_amount_cad INTEGER NOT NULL,
+    applied_penal INTEGER NOT NULL,
+    applied_interest INTEGER NOT NULL,
+    applied_principal INTEGER NOT NULL
 );
 
 CREATE TABLE IF NOT EXISTS savings (
     id INTEGER PRIMARY KEY AUTOINCREMENT,
     account_name TEXT NOT NULL,
     currency TEXT NOT NULL,
-    balance_cad REAL NOT NULL
+    balance_cad INTEGER NOT NULL,
+    version INTEGER NOT NULL DEFAULT 1
 );
 
 CREATE TABLE IF NOT EXISTS fx_rates (
     currency TEXT PRIMARY KEY,
     rate_to_cad REAL NOT NULL,
-    last_updated TEXT NOT NULL,
+    last_updated INTEGER NOT NULL,
     source TEXT NOT NULL
 );
 
 CREATE TABLE IF NOT EXISTS monthly_snapshots (
-    snapshot_date TEXT PRIMARY KEY,
-    total_debt_cad REAL NOT NULL,
-    total_interest_cad REAL NOT NULL,
-    total_savings_cad REAL NOT NULL,
-    net_position_cad REAL NOT NULL
+    snapshot_date INTEGER PRIMARY KEY,
+    total_debt_cad INTEGER NOT NULL,
+    total_interest_cad INTEGER NOT NULL,
+    total_savings_cad INTEGER NOT NULL,
+    net_position_cad INTEGER NOT NULL
 );
 
-CREATE INDEX IF NOT EXISTS idx_payments_target ON payments (target_type, target_id);
+CREATE TABLE IF NOT EXISTS payment_totals (
+    target_type TEXT NOT NULL,
+    target_id INTEGER NOT NULL,
+    payment_month TEXT NOT NULL,
+    payment_count INTEGER NOT NULL,
+    payment_amount_cad INTEGER NOT NULL,
+    applied_penal INTEGER NOT NULL,
+    applied_interest INTEGER NOT NULL,
+    applied_principal INTEGER NOT NULL,
+    PRIMARY KEY (target_type, target_id, payment_month)
+);
+
+CREATE TABLE IF NOT EXISTS payment_grand_totals (
+    id INTEGER PRIMARY KEY CHECK (id = 1),
+    payment_count INTEGER NOT NULL,
+    payment_amount_cad INTEGER NOT NULL,
+    applied_penal INTEGER NOT NULL,
+    applied_interest INTEGER NOT NULL,
+    applied_principal INTEGER NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS payment_archives (
+    year INTEGER PRIMARY KEY,
+    row_count INTEGER NOT NULL,
+    first_date INTEGER NOT NULL,
+    last_date INTEGER NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS job_runs (
+    job_name TEXT NOT NULL,
+    period TEXT NOT NULL,
+    status TEXT NOT NULL,
+    started_at INTEGER NOT NULL,
+    finished_at INTEGER,
+    detail TEXT,
+    progress REAL NOT NULL DEFAULT 0,
+    heartbeat_at INTEGER,
+    PRIMARY KEY (job_name, period)
+);
+
+CREATE TABLE IF NOT EXISTS worker_heartbeats (
+    worker_id TEXT PRIMARY KEY,
+    hostname TEXT NOT NULL,
+    pid INTEGER NOT NULL,
+    started_at INTEGER NOT NULL,
+    heartbeat_at INTEGER NOT NULL,
+    interval_seconds INTEGER NOT NULL,
+    state TEXT NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS accrual_runs (
+    as_of INTEGER PRIMARY KEY,
+    change_seq INTEGER NOT NULL,
+    computed_at INTEGER NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS accruals (
+    as_of INTEGER NOT NULL,
+    target_type TEXT NOT NULL,
+    target_id INTEGER NOT NULL,
+    interest_cad INTEGER NOT NULL,
+    fee_cad INTEGER NOT NULL,
+    overdue_days INTEGER NOT NULL,
+    risk_score REAL NOT NULL,
+    risk_reason TEXT NOT NULL,
+    PRIMARY KEY (as_of, target_type, target_id)
+);
+
+CREATE TABLE IF NOT EXISTS change_log (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    table_name TEXT NOT NULL,
+    row_key NOT NULL,
+    operation TEXT NOT NULL
+);
+
+DROP INDEX IF EXISTS idx_payments_target;
+CREATE INDEX IF NOT EXISTS idx_payments_target_date ON payments (target_type, target_id, payment_date, applied_principal);
 CREATE INDEX IF NOT EXISTS idx_payments_date ON payments (payment_date);
 CREATE INDEX IF NOT EXISTS idx_debts_status ON debts (status);
 CREATE INDEX IF NOT EXISTS idx_cards_status ON credit_cards (status);
 CREATE INDEX IF NOT EXISTS idx_snapshots_date ON monthly_snapshots (snapshot_date);
+
+
+INSERT INTO payment_totals (
+    target_type, target_id, payment_month, payment_count, payment_amount_cad,
+    applied_penal, applied_interest, applied_principal
+)
+SELECT
+    target_type, target_id, strftime('%Y-%m', payment_date * 86400, 'unixepoch'), COUNT(*), SUM(payment_amount_cad),
+    SUM(applied_penal), SUM(applied_interest), SUM(applied_principal)
+FROM payments
+WHERE NOT EXISTS (SELECT 1 FROM payment_totals)
+GROUP BY target_type, target_id, strftime('%Y-%m', payment_date * 86400, 'unixepoch');
+
+INSERT INTO payment_grand_totals (
+    id, payment_count, payment_amount_cad, applied_penal, applied_interest, applied_principal
+)
+SELECT
+    1, COALESCE(SUM(payment_count), 0), COALESCE(SUM(payment_amount_cad), 0), COALESCE(SUM(applied_penal), 0),
+    COALESCE(SUM(applied_interest), 0), COALESCE(SUM(applied_principal), 0)
+FROM payment_totals
+HAVING NOT EXISTS (SELECT 1 FROM payment_grand_totals);
+
+CREATE TRIGGER IF NOT EXISTS trg_payment_totals_grand_insert AFTER INSERT ON payment_totals
+BEGIN
+    UPDATE payment_grand_totals SET
+        payment_count = payment_count + NEW.payment_count,
+        payment_amount_cad = payment_amount_cad + NEW.payment_amount_cad,
+        applied_penal = applied_penal + NEW.applied_penal,
+        applied_interest = applied_interest + NEW.applied_interest,
+        applied_principal = applied_principal + NEW.applied_principal;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_payment_totals_grand_delete AFTER DELETE ON payment_totals
+BEGIN
+    UPDATE payment_grand_totals SET
+        payment_count = payment_count - OLD.payment_count,
+        payment_amount_cad = payment_amount_cad - OLD.payment_amount_cad,
+        applied_penal = applied_penal - OLD.applied_penal,
+        applied_interest = applied_interest - OLD.applied_interest,
+        applied_principal = applied_principal - OLD.applied_principal;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_payment_totals_grand_update AFTER UPDATE ON payment_totals
+BEGIN
+    UPDATE payment_grand_totals SET
+        payment_count = payment_count + NEW.payment_count - OLD.payment_count,
+        payment_amount_cad = payment_amount_cad + NEW.payment_amount_cad - OLD.payment_amount_cad,
+        applied_penal = applied_penal + NEW.applied_penal - OLD.applied_penal,
+        applied_interest = applied_interest + NEW.applied_interest - OLD.applied_interest,
+        applied_principal = applied_principal + NEW.applied_principal - OLD.applied_principal;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_payments_totals_insert AFTER INSERT ON payments
+BEGIN
+    INSERT INTO payment_totals (
+        target_type, target_id, payment_month, payment_count, payment_amount_cad,
+        applied_penal, applied_interest, applied_principal
+    ) VALUES (
+        NEW.target_type, NEW.target_id, strftime('%Y-%m', NEW.payment_date * 86400, 'unixepoch'), 1, NEW.payment_amount_cad,
+        NEW.applied_penal, NEW.applied_interest, NEW.applied_principal
+    )
+    ON CONFLICT (target_type, target_id, payment_month) DO UPDATE SET
+        payment_count = payment_count + 1,
+        payment_amount_cad = payment_amount_cad + excluded.payment_amount_cad,
+        applied_penal = applied_penal + excluded.applied_penal,
+        applied_interest = applied_interest + excluded.applied_interest,
+        applied_principal = applied_principal + excluded.applied_principal;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_payments_totals_delete AFTER DELETE ON payments
+BEGIN
+    UPDATE payment_totals SET
+        payment_count = payment_count - 1,
+        payment_amount_cad = payment_amount_cad - OLD.payment_amount_cad,
+        applied_penal = applied_penal - OLD.applied_penal,
+        applied_interest = applied_interest - OLD.applied_interest,
+        applied_principal = applied_principal - OLD.applied_principal
+    WHERE target_type = OLD.target_type
+        AND target_id = OLD.target_id
+        AND payment_month = strftime('%Y-%m', OLD.payment_date * 86400, 'unixepoch');
+    DELETE FROM payment_totals
+    WHERE target_type = OLD.target_type
+        AND target_id = OLD.target_id
+        AND payment_month = strftime('%Y-%m', OLD.payment_date * 86400, 'unixepoch')
+        AND payment_count <= 0;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_payments_totals_update AFTER UPDATE ON payments
+BEGIN
+    UPDATE payment_totals SET
+        payment_count = payment_count - 1,
+        payment_amount_cad = payment_amount_cad - OLD.payment_amount_cad,
+        applied_penal = applied_penal - OLD.applied_penal,
+        applied_interest = applied_interest - OLD.applied_interest,
+        applied_principal = applied_principal - OLD.applied_principal
+    WHERE target_type = OLD.target_type
+        AND target_id = OLD.target_id
+        AND payment_month = strftime('%Y-%m', OLD.payment_date * 86400, 'unixepoch');
+    DELETE FROM payment_totals
+    WHERE target_type = OLD.target_type
+        AND target_id = OLD.target_id
+        AND payment_month = strftime('%Y-%m', OLD.payment_date * 86400, 'unixepoch')
+        AND payment_count <= 0;
+    INSERT INTO payment_totals (
+        target_type, target_id, payment_month, payment_count, payment_amount_cad,
+        applied_penal, applied_interest, applied_principal
+    ) VALUES (
+        NEW.target_type, NEW.target_id, strftime('%Y-%m', NEW.payment_date * 86400, 'unixepoch'), 1, NEW.payment_amount_cad,
+        NEW.applied_penal, NEW.applied_interest, NEW.applied_principal
+    )
+    ON CONFLICT (target_type, target_id, payment_month) DO UPDATE SET
+        payment_count = payment_count + 1,
+        payment_amount_cad = payment_amount_cad + excluded.payment_amount_cad,
+        applied_penal = applied_penal + excluded.applied_penal,
+        applied_interest = applied_interest + excluded.applied_interest,
+        applied_principal = applied_principal + excluded.applied_principal;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_debts_changes_insert AFTER INSERT ON debts
+BEGIN
+    INSERT INTO change_log (table_name, row_key, operation) VALUES ('debts', NEW.id, 'insert');
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_debts_changes_update AFTER UPDATE ON debts
+BEGIN
+    INSERT INTO change_log (table_name, row_key, operation) VALUES ('debts', NEW.id, 'update');
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_debts_changes_delete AFTER DELETE ON debts
+BEGIN
+    INSERT INTO change_log (table_name, row_key, operation) VALUES ('debts', OLD.id, 'delete');
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_credit_cards_changes_insert AFTER INSERT ON credit_cards
+BEGIN
+    INSERT INTO change_log (table_name, row_key, operation) VALUES ('credit_cards', NEW.id, 'insert');
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_credit_cards_changes_update AFTER UPDATE ON credit_cards
+BEGIN
+    INSERT INTO change_log (table_name, row_key, operation) VALUES ('credit_cards', NEW.id, 'update');
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_credit_cards_changes_delete AFTER DELETE ON credit_cards
+BEGIN
+    INSERT INTO change_log (table_name, row_key, operation) VALUES ('credit_cards', OLD.id, 'delete');
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_payments_changes_insert AFTER INSERT ON payments
+BEGIN
+    INSERT INTO change_log (table_name, row_key, operation) VALUES ('payments', NEW.id, 'insert');
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_payments_changes_update AFTER UPDATE ON payments
+BEGIN
+    INSERT INTO change_log (table_name, row_key, operation) VALUES ('payments', NEW.id, 'update');
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_payments_changes_delete AFTER DELETE ON payments
+BEGIN
+    INSERT INTO change_log (table_name, row_key, operation) VALUES ('payments', OLD.id, 'delete');
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_savings_changes_insert AFTER INSERT ON savings
+BEGIN
+    INSERT INTO change_log (table_name, row_key, operation) VALUES ('savings', NEW.id, 'insert');
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_savings_changes_update AFTER UPDATE ON savings
+BEGIN
+    INSERT INTO change_log (table_name, row_key, operation) VALUES ('savings', NEW.id, 'update');
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_savings_changes_delete AFTER DELETE ON savings
+BEGIN
+    INSERT INTO change_log (table_name, row_key, operation) VALUES ('savings', OLD.id, 'delete');
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_fx_rates_changes_insert AFTER INSERT ON fx_rates
+BEGIN
+    INSERT INTO change_log (table_name, row_key, operation) VALUES ('fx_rates', NEW.currency, 'insert');
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_fx_rates_changes_update AFTER UPDATE ON fx_rates
+BEGIN
+    INSERT INTO change_log (table_name, row_key, operation) VALUES ('fx_rates', NEW.currency, 'update');
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_fx_rates_changes_delete AFTER DELETE ON fx_rates
+BEGIN
+    INSERT INTO change_log (table_name, row_key, operation) VALUES ('fx_rates', OLD.currency, 'delete');
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_monthly_snapshots_changes_insert AFTER INSERT ON monthly_snapshots
+BEGIN
+    INSERT INTO change_log (table_name, row_key, operation) VALUES ('monthly_snapshots', NEW.snapshot_date, 'insert');
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_monthly_snapshots_changes_update AFTER UPDATE ON monthly_snapshots
+BEGIN
+    INSERT INTO change_log (table_name, row_key, operation) VALUES ('monthly_snapshots', NEW.snapshot_date, 'update');
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_monthly_snapshots_changes_delete AFTER DELETE ON monthly_snapshots
+BEGIN
+    INSERT INTO change_log (table_name, row_key, operation) VALUES ('monthly_snapshots', OLD.snapshot_date, 'delete');
+END;
+
+
+CREATE VIRTUAL TABLE IF NOT EXISTS debts_search USING fts5(
+    lender_name, debt_type UNINDEXED, content='debts', content_rowid='id', tokenize='unicode61 remove_diacritics 2', prefix='2 3'
+);
+
+INSERT INTO debts_search (debts_search) SELECT 'rebuild'
+WHERE NOT EXISTS (SELECT 1 FROM debts_search_docsize) AND EXISTS (SELECT 1 FROM debts);
+
+CREATE TRIGGER IF NOT EXISTS trg_debts_search_insert AFTER INSERT ON debts
+BEGIN
+    INSERT INTO debts_search (rowid, lender_name, debt_type) VALUES (NEW.id, NEW.lender_name, NEW.debt_type);
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_debts_search_update AFTER UPDATE OF lender_name, debt_type ON debts
+BEGIN
+    INSERT INTO debts_search (debts_search, rowid, lender_name, debt_type) VALUES ('delete', OLD.id, OLD.lender_name, OLD.debt_type);
+    INSERT INTO debts_search (rowid, lender_name, debt_type) VALUES (NEW.id, NEW.lender_name, NEW.debt_type);
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_debts_search_delete AFTER DELETE ON debts
+BEGIN
+    INSERT INTO debts_search (debts_search, rowid, lender_name, debt_type) VALUES ('delete', OLD.id, OLD.lender_name, OLD.debt_type);
+END;
+
+CREATE VIRTUAL TABLE IF NOT EXISTS credit_cards_search USING fts5(
+    card_name, bank_name, content='credit_cards', content_rowid='id', tokenize='unicode61 remove_diacritics 2', prefix='2 3'
+);
+
+INSERT INTO credit_cards_search (credit_cards_search) SELECT 'rebuild'
+WHERE NOT EXISTS (SELECT 1 FROM credit_cards_search_docsize) AND EXISTS (SELECT 1 FROM credit_cards);
+
+CREATE TRIGGER IF NOT EXISTS trg_credit_cards_search_insert AFTER INSERT ON credit_cards
+BEGIN
+    INSERT INTO credit_cards_search (rowid, card_name, bank_name) VALUES (NEW.id, NEW.card_name, NEW.bank_name);
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_credit_cards_search_update AFTER UPDATE OF card_name, bank_name ON credit_cards
+BEGIN
+    INSERT INTO credit_cards_search (credit_cards_search, rowid, card_name, bank_name) VALUES ('delete', OLD.id, OLD.card_name, OLD.bank_name);
+    INSERT INTO credit_cards_search (rowid, card_name, bank_name) VALUES (NEW.id, NEW.card_name, NEW.bank_name);
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_credit_cards_search_delete AFTER DELETE ON credit_cards
+BEGIN
+    INSERT INTO credit_cards_search (credit_cards_search, rowid, card_name, bank_name) VALUES ('delete', OLD.id, OLD.card_name, OLD.bank_name);
+END;
+
+CREATE VIRTUAL TABLE IF NOT EXISTS savings_search USING fts5(
+    account_name, currency UNINDEXED, content='savings', content_rowid='id', tokenize='unicode61 remove_diacritics 2', prefix='2 3'
+);
+
+INSERT INTO savings_search (savings_search) SELECT 'rebuild'
+WHERE NOT EXISTS (SELECT 1 FROM savings_search_docsize) AND EXISTS (SELECT 1 FROM savings);
+
+CREATE TRIGGER IF NOT EXISTS trg_savings_search_insert AFTER INSERT ON savings
+BEGIN
+    INSERT INTO savings_search (rowid, account_name, currency) VALUES (NEW.id, NEW.account_name, NEW.currency);
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_savings_search_update AFTER UPDATE OF account_name, currency ON savings
+BEGIN
+    INSERT INTO savings_search (savings_search, rowid, account_name, currency) VALUES ('delete', OLD.id, OLD.account_name, OLD.currency);
+    INSERT INTO savings_search (rowid, account_name, currency) VALUES (NEW.id, NEW.account_name, NEW.currency);
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_savings_search_delete AFTER DELETE ON savings
+BEGIN
+    INSERT INTO savings_search (savings_search, rowid, account_name, currency) VALUES ('delete', OLD.id, OLD.account_name, OLD.currency);
+END;
@@ -0,0 +1,134 @@
+from __future__ import annotations
+
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, FrozenSet, Iterable, List, Optional
+
+from db.repository import Repository
+
+
+DEFAULT_TENANT = "default"
+TENANT_HEADER = "X-MyFin-Tenant"
+TENANT_ID_PATTERN = re.compile(r"^[A-Za-z0-9][A-Za-z0-9_-]{0,63}$")
+
+
+class UnknownTenantError(LookupError):
+    def __init__(self, tenant_id: str) -> None:
+        super().__init__(f"Unknown tenant: {tenant_id!r}")
+        self.tenant_id = tenant_id
+
+
+def tenant_allowlist() -> Optional[List[str]]:
+    value = os.environ.get("MYFIN_TENANTS")
+    if value is None:
+        return None
+    return [tenant_id for tenant_id in value.split(",") if tenant_id]
+
+
+@dataclass
+class _PooledRepository:
+    repo: Repository
+    last_used: float
+
+
+# Evicted repositories are dropped rather than closed: a session may still be
+# mid-run with one, and its writer connection closes with the last reference.
+class RepositoryManager:
+    def __init__(
+        self,
+        data_dir: Path,
+        capacity: int = 64,
+        idle_seconds: float = 900.0,
+        clock: Callable[[], float] = time.monotonic,
+        allowed: Optional[Iterable[str]] = None,
+    ) -> None:
+        if capacity < 1:
+            raise ValueError("capacity must be at least 1")
+        self.data_dir = data_dir
+        # Tenant ids arrive in an unauthenticated header, so reads never create databases. Without an allowlist
+        # only tenants with a stored database resolve; with one, exactly those tenants do and are created on first use.
+        self.allowed: Optional[FrozenSet[str]] = None if allowed is None else frozenset(allowed) | {DEFAULT_TENANT}
+        self.capacity = capacity
+        self.idle_seconds = idle_seconds
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._pool: "OrderedDict[str, _PooledRepository]" = OrderedDict()
+
+    def db_path(self, tenant_id: str) -> Path:
+        if not TENANT_ID_PATTERN.match(tenant_id):
+            raise ValueError(f"Invalid tenant id: {tenant_id!r}")
+        if tenant_id == DEFAULT_TENANT:
+            return self.data_dir / "finance.db"
+        return self.data_dir / "tenants" / f"{tenant_id}.db"
+
+    def resolvable(self, tenant_id: str) -> bool:
+        path = self.db_path(tenant_id)
+        if tenant_id == DEFAULT_TENANT:
+            return True
+        return tenant_id in self.allowed if self.allowed is not None else path.exists()
+
+    def stored_tenants(self) -> List[str]:
+        tenants = [DEFAULT_TENANT] if (self.data_dir / "finance.db").exists() else []
+        tenants_dir = self.data_dir / "tenants"
+        if tenants_dir.exists():
+            tenants.extend(sorted(p.stem for p in tenants_dir.glob("*.db") if TENANT_ID_PATTERN.match(p.stem)))
+        return [tenant_id for tenant_id in tenants if self.resolvable(tenant_id)]
+
+    def get(self, tenant_id: str) -> Repository:
+        now = self._clock()
+        with self._lock:
+            self._evict_idle(now)
+            pooled = self._pool.get(tenant_id)
+            if pooled is not None:
+                pooled.last_used = now
+                self._pool.move_to_end(tenant_id)
+                return pooled.repo
+
+        if not self.resolvable(tenant_id):
+            raise UnknownTenantError(tenant_id)
+        repo = Repository(self.db_path(tenant_id))
+        with self._lock:
+            pooled = self._pool.get(tenant_id)
+            if pooled is not None:
+                repo.close()
+                pooled.last_used = now
+                self._pool.move_to_end(tenant_id)
+                return pooled.repo
+            self._pool[tenant_id] = _PooledRepository(repo, now)
+            while len(self._pool) > self.capacity:
+                self._pool.popitem(last=False)
+            return repo
+
+    def preload(self, tenant_ids: Iterable[str]) -> None:
+        for tenant_id in tenant_ids:
+            self.get(tenant_id)
+
+    def evict_idle(self) -> int:
+        with self._lock:
+            return self._evict_idle(self._clock())
+
+    def open_tenants(self) -> List[str]:
+        with self._lock:
+            return list(self._pool)
+
+    def close(self) -> None:
+        with self._lock:
+            pooled = list(self._pool.values())
+            self._pool.clear()
+        for item in pooled:
+            item.repo.close()
+
+    def _evict_idle(self, now: float) -> int:
+        evicted = 0
+        while self._pool:
+            tenant_id, pooled = next(iter(self._pool.items()))
+            if now - pooled.last_used < self.idle_seconds:
+                break
+            del self._pool[tenant_id]
+            evicted += 1
+        return evicted
@@ -0,0 +1,107 @@
+from __future__ import annotations
+
+import argparse
+import os
+import signal
+import socket
+import threading
+import time
+import uuid
+from datetime import date
+from pathlib import Path
+from typing import Callable, Dict
+
+from db.repository import Repository, WorkerHeartbeat
+from db.tenants import RepositoryManager, tenant_allowlist
+from services.scheduler import scheduler_for
+
+
+def _summary(tenant_id: str, jobs: Dict[str, str]) -> str:
+    return f"[{tenant_id}] " + (", ".join(f"{name}: {status}" for name, status in jobs.items()) or "nothing due")
+
+
+class Worker:
+    def __init__(
+        self,
+        manager: RepositoryManager,
+        interval_seconds: int = 30,
+        clock: Callable[[], float] = time.time,
+    ) -> None:
+        if interval_seconds < 1:
+            raise ValueError("interval_seconds must be at least 1")
+        self.manager = manager
+        self.interval_seconds = interval_seconds
+        self.worker_id = f"{socket.gethostname()}-{os.getpid()}-{uuid.uuid4().hex[:8]}"
+        self._clock = clock
+        self._started_at = int(clock())
+        self._stop = threading.Event()
+
+    def heartbeat(self, repo: Repository, state: str) -> None:
+        repo.record_worker_heartbeat(
+            WorkerHeartbeat(
+                worker_id=self.worker_id,
+                hostname=socket.gethostname(),
+                pid=os.getpid(),
+                started_at=self._started_at,
+                heartbeat_at=int(self._clock()),
+                interval_seconds=self.interval_seconds,
+                state=state,
+            )
+        )
+
+    def run_once(self) -> Dict[str, Dict[str, str]]:
+        results: Dict[str, Dict[str, str]] = {}
+        for tenant_id in self.manager.stored_tenants():
+            repo = self.manager.get(tenant_id)
+            self.heartbeat(repo, "running")
+            try:
+                results[tenant_id] = scheduler_for(repo).run_due(date.today())
+            finally:
+                self.heartbeat(repo, "idle")
+        return results
+
+    def run_forever(self) -> None:
+        while not self._stop.is_set():
+            for tenant_id, jobs in self.run_once().items():
+                if jobs:
+                    print(_summary(tenant_id, jobs))
+            self._stop.wait(self.interval_seconds)
+
+    def shutdown(self) -> None:
+        for tenant_id in self.manager.stored_tenants():
+            self.heartbeat(self.manager.get(tenant_id), "stopped")
+
+    def stop(self) -> None:
+        self._stop.set()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Run MyFin automation jobs outside the Streamlit process.")
+    parser.add_argument("--once", action="store_true", help="run due jobs for every tenant and exit")
+    parser.add_argument(
+        "--interval",
+        type=int,
+        default=int(os.environ.get("MYFIN_WORKER_INTERVAL_SECONDS", "30")),
+        help="seconds between scheduling passes",
+    )
+    args = parser.parse_args()
+
+    root = Path(__file__).resolve().parents[1]
+    manager = RepositoryManager(root / "data", allowed=tenant_allowlist())
+    worker = Worker(manager, interval_seconds=args.interval)
+    try:
+        if args.once:
+            for tenant_id, jobs in worker.run_once().items():
+                print(_summary(tenant_id, jobs))
+            return
+        signal.signal(signal.SIGTERM, lambda *_: worker.stop())
+        signal.signal(signal.SIGINT, lambda *_: worker.stop())
+        print(f"Worker {worker.worker_id} polling every {args.interval}s")
+        worker.run_forever()
+    finally:
+        worker.shutdown()
+        manager.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,11 +1,14 @@
 from __future__ import annotations
 
-from dataclasses import dataclass
+from dataclasses import dataclass, fields
 from datetime import date
-from typing import Optional
+from typing import Any, Callable, Mapping, Optional, Sequence, Type, TypeVar
 
 
-@dataclass(frozen=True)
+T = TypeVar("T")
+
+
+@dataclass(frozen=True, slots=True)
 class Debt:
     id: int
     lender_name: str
@@ -20,9 +23,10 @@ class Debt:
     installment_due_day: Optional[int]
     last_payment_date: Optional[date]
     status: str
+    version: int = 1
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class CreditCard:
     id: int
     bank_name: str
@@ -35,6 +39,7 @@ class CreditCard:
     last_payment_date: Optional[date]
     flat_late_fee_cad: float
     status: str
+    version: int = 1
 
     @property
     def utilization(self) -> float:
@@ -43,7 +48,7 @@ class CreditCard:
         return max(0.0, min(1.0, self.statement_balance_cad / self.credit_limit_cad))
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class FxRate:
     currency: str
     rate_to_cad: float
@@ -51,17 +56,42 @@ class FxRate:
     source: str
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class SavingsAccount:
     id: int
     account_name: str
     currency: str
     balance_cad: float
+    version: int = 1
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class PaymentAllocation:
     target_type: str
     target_id: int
     amount_cad: float
     strategy: str
+
+
+def tuple_constructor(
+    cls: Type[T], converters: Optional[Mapping[str, Callable[[Any], Any]]] = None
+) -> Callable[[Sequence[Any]], T]:
+    # Writes each field through its slot descriptor, skipping the frozen __setattr__ guard.
+    converters = converters or {}
+    names = [f.name for f in fields(cls)]
+    namespace: dict = {"new": object.__new__, "cls": cls}
+    lines = ["def from_tuple(values):", "    obj = new(cls)"]
+    for index, name in enumerate(names):
+        namespace[f"set_{index}"] = cls.__dict__[name].__set__
+        value = f"values[{index}]"
+        if name in converters:
+            namespace[f"convert_{index}"] = converters[name]
+            value = f"convert_{index}({value})"
+        lines.append(f"    set_{index}(obj, {value})")
+    lines.append("    return obj")
+    exec("\n".join(lines), namespace)
+    return namespace["from_tuple"]
+
+
+def column_list(cls: type) -> str:
+    return ", ".join(f.name for f in fields(cls))
@@ -0,0 +1,349 @@
+from __future__ import annotations
+
+import argparse
+import hashlib
+import json
+import math
+import os
+import signal
+import threading
+import traceback
+import uuid
+from collections import OrderedDict
+from dataclasses import asdict, dataclass
+from datetime import MAXYEAR, date
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Mapping, Optional, Sequence, Tuple
+from urllib.parse import parse_qs, urlsplit
+
+from core.payments import STRATEGIES, recommend_payment_allocations
+from db.repository import Repository
+from db.tenants import DEFAULT_TENANT, TENANT_HEADER, RepositoryManager, UnknownTenantError, tenant_allowlist
+from services.portfolio import PORTFOLIO_TABLES, allocation_items, portfolio_service
+from services.simulations import Scenario, SimulationRunner
+
+
+Headers = Dict[str, str]
+Response = Tuple[int, Headers, bytes]
+
+# A hundred years; every simulated month is a timeline row in the response.
+MAX_SIMULATION_MONTHS = 1200
+
+
+class ApiError(Exception):
+    def __init__(self, status: HTTPStatus, message: str) -> None:
+        super().__init__(message)
+        self.status = status
+
+
+def bad_request(message: str) -> ApiError:
+    return ApiError(HTTPStatus.BAD_REQUEST, message)
+
+
+class Query:
+    def __init__(self, params: Mapping[str, List[str]]) -> None:
+        self._params = {name: values[-1] for name, values in params.items()}
+        self._used: Dict[str, Any] = {}
+
+    def _take(self, name: str, parse: Callable[[str], Any], default: Any) -> Any:
+        raw = self._params.get(name)
+        if raw is None:
+            if default is None:
+                raise bad_request(f"Missing parameter: {name}")
+            value = default
+        else:
+            try:
+                value = parse(raw)
+            except ValueError:
+                raise bad_request(f"Invalid value for {name}: {raw!r}") from None
+        self._used[name] = value
+        return value
+
+    def date(self, name: str, default: Optional[date] = None) -> date:
+        return self._take(name, date.fromisoformat, default)
+
+    def number(self, name: str, default: Optional[float] = None, minimum: float = 0.0) -> float:
+        value = self._take(name, float, default)
+        if not math.isfinite(value) or value < minimum:
+            raise bad_request(f"{name} must be at least {minimum:g}")
+        return value
+
+    def integer(self, name: str, default: Optional[int] = None, minimum: int = 1, maximum: Optional[int] = None) -> int:
+        value = self._take(name, int, default)
+        if value < minimum:
+            raise bad_request(f"{name} must be at least {minimum}")
+        if maximum is not None and value > maximum:
+            raise bad_request(f"{name} must be at most {maximum}")
+        return value
+
+    def choice(self, name: str, choices: Sequence[str], default: Optional[str] = None) -> str:
+        value = self._take(name, str, default)
+        if value not in choices:
+            raise bad_request(f"{name} must be one of {', '.join(choices)}")
+        return value
+
+    def key(self) -> Tuple[Tuple[str, str], ...]:
+        unknown = sorted(set(self._params) - set(self._used))
+        if unknown:
+            raise bad_request(f"Unknown parameter: {unknown[0]}")
+        return tuple(sorted((name, str(value)) for name, value in self._used.items()))
+
+
+@dataclass(frozen=True)
+class Route:
+    tables: Tuple[str, ...]
+    parse: Callable[[Query], Dict[str, Any]]
+    build: Callable[["ApiService", Repository, Dict[str, Any]], Any]
+
+
+def _portfolio_params(query: Query) -> Dict[str, Any]:
+    return {"as_of": query.date("as_of", date.today())}
+
+
+def _allocation_params(query: Query) -> Dict[str, Any]:
+    return {
+        "as_of": query.date("as_of", date.today()),
+        "available_cad": query.number("available_cad"),
+        "strategy": query.choice("strategy", STRATEGIES, "risk"),
+        "min_emergency_savings_cad": query.number("min_emergency_savings_cad", 0.0),
+    }
+
+
+def _simulation_params(query: Query) -> Dict[str, Any]:
+    params = {
+        "start_date": query.date("start_date", date.today()),
+        "monthly_payment_cad": query.number("monthly_payment_cad"),
+        "strategy": query.choice("strategy", STRATEGIES, "risk"),
+        "max_months": query.integer("max_months", 600, maximum=MAX_SIMULATION_MONTHS),
+    }
+    if params["start_date"].year + params["max_months"] // 12 + 1 > MAXYEAR:
+        raise bad_request("start_date is too late for a run of max_months")
+    return params
+
+
+def _portfolio(api: "ApiService", repo: Repository, params: Dict[str, Any]) -> Any:
+    portfolio = portfolio_service(repo).portfolio(params["as_of"])
+    return {**asdict(portfolio), "net_position_cad": portfolio.net_position_cad}
+
+
+def _risk(api: "ApiService", repo: Repository, params: Dict[str, Any]) -> Any:
+    portfolio = portfolio_service(repo).portfolio(params["as_of"])
+    accounts = [("loan", d.debt.id, d.debt.lender_name, d) for d in portfolio.debts] + [
+        ("credit_card", c.card.id, c.card.card_name, c) for c in portfolio.cards
+    ]
+    accounts.sort(key=lambda account: account[3].risk_score, reverse=True)
+    return {
+        "as_of": portfolio.as_of,
+        "accounts": [
+            {
+                "target_type": target_type,
+                "target_id": target_id,
+                "name": name,
+                "risk_score": snapshot.risk_score,
+                "risk_reason": snapshot.risk_reason,
+                "overdue_days": snapshot.overdue_days,
+            }
+            for target_type, target_id, name, snapshot in accounts
+        ],
+    }
+
+
+def _allocations(api: "ApiService", repo: Repository, params: Dict[str, Any]) -> Any:
+    portfolio = portfolio_service(repo).portfolio(params["as_of"])
+    return {
+        "as_of": portfolio.as_of,
+        "allocations": recommend_payment_allocations(
+            available_cad=params["available_cad"],
+            items=allocation_items(portfolio),
+            strategy=params["strategy"],
+            min_emergency_savings_cad=params["min_emergency_savings_cad"],
+        ),
+    }
+
+
+def _snapshots(api: "ApiService", repo: Repository, params: Dict[str, Any]) -> Any:
+    return {"snapshots": [asdict(snapshot) for snapshot in repo.list_monthly_snapshots()]}
+
+
+def _simulation(api: "ApiService", repo: Repository, params: Dict[str, Any]) -> Any:
+    scenario = Scenario(
+        debts=tuple(repo.list_debts(status="active")),
+        cards=tuple(repo.list_credit_cards(status="active")),
+        **params,
+    )
+    result = api.runner.submit(scenario).result()
+    if result is None:
+        raise ApiError(HTTPStatus.SERVICE_UNAVAILABLE, "Simulation was cancelled")
+    return asdict(result)
+
+
+ROUTES: Dict[str, Route] = {
+    "/portfolio": Route(PORTFOLIO_TABLES, _portfolio_params, _portfolio),
+    "/risk": Route(PORTFOLIO_TABLES, _portfolio_params, _risk),
+    "/allocations": Route(PORTFOLIO_TABLES, _allocation_params, _allocations),
+    "/snapshots": Route(("monthly_snapshots",), lambda query: {}, _snapshots),
+    "/simulations": Route(("debts", "credit_cards"), _simulation_params, _simulation),
+}
+
+
+def _json_default(value: Any) -> Any:
+    if isinstance(value, date):
+        return value.isoformat()
+    raise TypeError(f"{type(value).__name__} is not JSON serializable")
+
+
+def encode(payload: Any) -> bytes:
+    return json.dumps(payload, default=_json_default, separators=(",", ":")).encode("utf-8")
+
+
+def etag_matches(header: Optional[str], etag: str) -> bool:
+    if header is None:
+        return False
+    candidates = [candidate.strip() for candidate in header.split(",")]
+    return "*" in candidates or any(candidate.removeprefix("W/") == etag for candidate in candidates)
+
+
+class ApiService:
+    def __init__(self, manager: RepositoryManager, runner: SimulationRunner, max_entries: int = 256) -> None:
+        if max_entries < 1:
+            raise ValueError("max_entries must be at least 1")
+        self.manager = manager
+        self.runner = runner
+        self.max_entries = max_entries
+        # Table versions restart at zero with the process, so tags carry an instance id to never repeat.
+        self._instance = uuid.uuid4().hex
+        self._lock = threading.Lock()
+        self._bodies: "OrderedDict[str, bytes]" = OrderedDict()
+
+    def etag(self, tenant_id: str, path: str, key: Tuple[Tuple[str, str], ...], versions: Tuple[int, ...]) -> str:
+        digest = hashlib.blake2b(repr((self._instance, tenant_id, path, key, versions)).encode(), digest_size=12)
+        return f'"{digest.hexdigest()}"'
+
+    def handle(self, tenant_id: str, target: str, if_none_match: Optional[str] = None) -> Response:
+        try:
+            return self._handle(tenant_id, target, if_none_match)
+        except ApiError as exc:
+            return self._error(exc.status, str(exc))
+        except UnknownTenantError as exc:
+            return self._error(HTTPStatus.NOT_FOUND, str(exc))
+        except Exception:
+            # Only ApiError carries a client-facing message; anything else is a server fault.
+            traceback.print_exc()
+            return self._error(HTTPStatus.INTERNAL_SERVER_ERROR, "Internal server error")
+
+    def _handle(self, tenant_id: str, target: str, if_none_match: Optional[str]) -> Response:
+        url = urlsplit(target)
+        route = ROUTES.get(url.path)
+        if route is None:
+            raise ApiError(HTTPStatus.NOT_FOUND, f"Unknown endpoint: {url.path}")
+        query = Query(parse_qs(url.query, keep_blank_values=True))
+        params = route.parse(query)
+        try:
+            self.manager.db_path(tenant_id)
+        except ValueError as exc:
+            raise bad_request(str(exc)) from None
+        repo = self.manager.get(tenant_id)
+
+        # Versions are read before the body is built, so a write during the build only makes the next
+        # request rebuild; nothing is computed for a client that already holds the current tag.
+        etag = self.etag(tenant_id, url.path, query.key(), repo.table_versions(*route.tables))
+        headers = {"ETag": etag, "Cache-Control": "no-cache"}
+        if etag_matches(if_none_match, etag):
+            return HTTPStatus.NOT_MODIFIED, headers, b""
+        with self._lock:
+            body = self._bodies.get(etag)
+            if body is not None:
+                self._bodies.move_to_end(etag)
+        if body is None:
+            body = encode(route.build(self, repo, params))
+            with self._lock:
+                self._bodies[etag] = body
+                while len(self._bodies) > self.max_entries:
+                    self._bodies.popitem(last=False)
+        return HTTPStatus.OK, {**headers, "Content-Type": "application/json"}, body
+
+    def _error(self, status: HTTPStatus, message: str) -> Response:
+        return status, {"Content-Type": "application/json"}, encode({"error": message})
+
+
+class ApiRequestHandler(BaseHTTPRequestHandler):
+    # Keep-alive lets scripted clients reuse one connection; without Nagle the body is not held back waiting
+    # for the client to acknowledge the headers.
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+    server: "ApiServer"
+
+    def do_GET(self) -> None:
+        tenant_id = self.headers.get(TENANT_HEADER) or self.server.default_tenant
+        status, headers, body = self.server.api.handle(tenant_id, self.path, self.headers.get("If-None-Match"))
+        self.send_response(status)
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format: str, *args: Any) -> None:
+        if self.server.access_log:
+            super().log_message(format, *args)
+
+
+class ApiServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(
+        self,
+        address: Tuple[str, int],
+        api: ApiService,
+        default_tenant: str = DEFAULT_TENANT,
+        access_log: bool = False,
+    ) -> None:
+        super().__init__(address, ApiRequestHandler)
+        self.api = api
+        self.default_tenant = default_tenant
+        self.access_log = access_log
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Serve MyFin portfolio queries as JSON over HTTP.")
+    parser.add_argument("--host", default=os.environ.get("MYFIN_API_HOST", "127.0.0.1"))
+    parser.add_argument("--port", type=int, default=int(os.environ.get("MYFIN_API_PORT", "8765")))
+    parser.add_argument(
+        "--cache-entries",
+        type=int,
+        default=int(os.environ.get("MYFIN_API_CACHE_ENTRIES", "256")),
+        help="encoded responses kept for repeat queries",
+    )
+    parser.add_argument("--access-log", action="store_true", help="log every request to stderr")
+    args = parser.parse_args()
+
+    root = Path(__file__).resolve().parents[1]
+    manager = RepositoryManager(
+        root / "data",
+        capacity=int(os.environ.get("MYFIN_TENANT_POOL_SIZE", "64")),
+        idle_seconds=float(os.environ.get("MYFIN_TENANT_IDLE_SECONDS", "900")),
+        allowed=tenant_allowlist(),
+    )
+    runner = SimulationRunner(max_workers=int(os.environ.get("MYFIN_SIMULATION_WORKERS", "2")))
+    server = ApiServer(
+        (args.host, args.port),
+        ApiService(manager, runner, max_entries=args.cache_entries),
+        default_tenant=os.environ.get("MYFIN_TENANT", DEFAULT_TENANT),
+        access_log=args.access_log,
+    )
+    signal.signal(signal.SIGTERM, lambda *_: threading.Thread(target=server.shutdown).start())
+    print(f"Serving {', '.join(ROUTES)} on http://{args.host}:{server.server_port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        runner.shutdown()
+        manager.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,32 @@
+from __future__ import annotations
+
+from datetime import date
+
+import numpy as np
+
+from core.backfill import historical_totals, missing_month_starts, nearest_savings
+from db.repository import Repository
+
+
+def backfill_monthly_snapshots(repo: Repository, through: date) -> int:
+    # Months before the one containing `through`; the current month is left to the monthly_snapshot job.
+    debts = repo.debt_columns()
+    cards = repo.credit_card_columns()
+    payments = repo.payment_columns(
+        include_archived=True, fields=("payment_date", "target_type", "target_id", "applied_principal")
+    )
+    starts = np.concatenate([debts["loan_start_date"], cards["statement_date"], payments["payment_date"]])
+    if len(starts) == 0:
+        return 0
+    last = np.datetime64(through, "M") - 1
+    snapshots = repo.monthly_snapshot_columns()
+    months = missing_month_starts(snapshots["snapshot_date"], starts.min(), last)
+    if len(months) == 0:
+        return 0
+    savings = nearest_savings(
+        months,
+        snapshots["snapshot_date"],
+        snapshots["total_savings_cad"],
+        int(repo.savings_columns()["balance_cad"].sum()),
+    )
+    return repo.add_monthly_snapshot_columns(historical_totals(months, debts, cards, payments, savings))
@@ -0,0 +1,115 @@
+from __future__ import annotations
+
+import shutil
+from dataclasses import dataclass
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, List, Optional
+
+from db.repository import Repository
+
+
+BACKUP_SUFFIX = ".db"
+# Payment archive files are copied into a directory beside each backup file.
+ARCHIVE_SUFFIX = ".archive"
+TIMESTAMP_FORMAT = "%Y%m%dT%H%M%S%f"
+
+
+@dataclass(frozen=True)
+class BackupInfo:
+    path: Path
+    created_at: datetime
+    size_bytes: int
+
+    @property
+    def archive_dir(self) -> Path:
+        return self.path.with_suffix(ARCHIVE_SUFFIX)
+
+
+def _backup_size(path: Path) -> int:
+    archive_dir = path.with_suffix(ARCHIVE_SUFFIX)
+    archived = sum(p.stat().st_size for p in archive_dir.glob("*.db")) if archive_dir.exists() else 0
+    return path.stat().st_size + archived
+
+
+class BackupService:
+    def __init__(
+        self,
+        repo: Repository,
+        backup_dir: Path,
+        keep: int = 14,
+        pages_per_step: int = 256,
+        step_sleep: float = 0.005,
+        clock: Callable[[], datetime] = datetime.now,
+    ) -> None:
+        if keep < 1:
+            raise ValueError("keep must be at least 1")
+        self.repo = repo
+        self.backup_dir = backup_dir
+        self.keep = keep
+        self.pages_per_step = pages_per_step
+        self.step_sleep = step_sleep
+        self._clock = clock
+
+    def create_backup(self, progress: Optional[Callable[[int, int, int], object]] = None) -> BackupInfo:
+        backup = self._write_backup(progress)
+        self.rotate()
+        return backup
+
+    def _write_backup(self, progress: Optional[Callable[[int, int, int], object]] = None) -> BackupInfo:
+        self.backup_dir.mkdir(parents=True, exist_ok=True)
+        created_at = self._clock()
+        path = self.backup_dir / f"{self.repo.db_path.stem}-{created_at.strftime(TIMESTAMP_FORMAT)}{BACKUP_SUFFIX}"
+        partial = path.with_suffix(".partial")
+        partial_archive = path.with_suffix(f"{ARCHIVE_SUFFIX}-partial")
+        try:
+            self.repo.backup_to(
+                partial,
+                pages=self.pages_per_step,
+                sleep=self.step_sleep,
+                progress=progress,
+                archive_dir=partial_archive,
+            )
+            # The archive is moved into place first, so a listed backup file always has its archive beside it.
+            partial_archive.replace(path.with_suffix(ARCHIVE_SUFFIX))
+            partial.replace(path)
+        finally:
+            partial.unlink(missing_ok=True)
+            shutil.rmtree(partial_archive, ignore_errors=True)
+        return BackupInfo(path=path, created_at=created_at, size_bytes=_backup_size(path))
+
+    def list_backups(self) -> List[BackupInfo]:
+        if not self.backup_dir.exists():
+            return []
+        prefix = f"{self.repo.db_path.stem}-"
+        backups = []
+        for path in self.backup_dir.glob(f"{prefix}*{BACKUP_SUFFIX}"):
+            try:
+                created_at = datetime.strptime(path.stem[len(prefix):], TIMESTAMP_FORMAT)
+            except ValueError:
+                continue
+            backups.append(BackupInfo(path=path, created_at=created_at, size_bytes=_backup_size(path)))
+        return sorted(backups, key=lambda b: b.created_at, reverse=True)
+
+    def rotate(self) -> List[BackupInfo]:
+        removed = self.list_backups()[self.keep:]
+        for backup in removed:
+            backup.path.unlink(missing_ok=True)
+            shutil.rmtree(backup.archive_dir, ignore_errors=True)
+        return removed
+
+    def find_backup(self, point_in_time: datetime) -> Optional[BackupInfo]:
+        for backup in self.list_backups():
+            if backup.created_at <= point_in_time:
+                return backup
+        return None
+
+    def restore(self, backup: BackupInfo) -> BackupInfo:
+        if not backup.path.exists():
+            raise ValueError(f"Backup not found: {backup.path}")
+        safety = self._write_backup()
+        # Backups taken before archives were included have no archive directory; the live archive is left as is.
+        archive_dir = backup.archive_dir if backup.archive_dir.exists() else None
+        self.repo.restore_from(backup.path, archive_dir=archive_dir)
+        self.rotate()
+        return safety
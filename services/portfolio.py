@@ -0,0 +1,264 @@
+from __future__ import annotations
+
+import threading
+import weakref
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import date
+from typing import Dict, List, Optional, Tuple
+
+from core.interest import (
+    compute_credit_card_accrual,
+    compute_credit_card_overdue_days,
+    compute_debt_accrual,
+    compute_debt_overdue_days,
+)
+from core.money import from_cents, to_cents
+from core.risk import compute_credit_card_risk, compute_debt_risk
+from db.repository import AccrualRecord, MonthlySnapshot, Repository
+from models.types import CreditCard, Debt
+
+
+PORTFOLIO_TABLES = ("debts", "credit_cards", "savings")
+
+
+@dataclass(frozen=True)
+class DebtSnapshot:
+    debt: Debt
+    interest_cad: float
+    penal_cad: float
+    overdue_days: int
+    risk_score: float
+    risk_reason: str
+
+
+@dataclass(frozen=True)
+class CardSnapshot:
+    card: CreditCard
+    interest_cad: float
+    late_fee_cad: float
+    overdue_days: int
+    risk_score: float
+    risk_reason: str
+
+
+@dataclass(frozen=True)
+class Portfolio:
+    as_of: date
+    debts: Tuple[DebtSnapshot, ...]
+    cards: Tuple[CardSnapshot, ...]
+    total_debt_cad: float
+    total_interest_cad: float
+    total_savings_cad: float
+
+    @property
+    def net_position_cad(self) -> float:
+        return from_cents(to_cents(self.total_savings_cad) - to_cents(self.total_debt_cad))
+
+    def monthly_snapshot(self, snapshot_date: date) -> MonthlySnapshot:
+        return MonthlySnapshot(
+            snapshot_date=snapshot_date,
+            total_debt_cad=self.total_debt_cad,
+            total_interest_cad=self.total_interest_cad,
+            total_savings_cad=self.total_savings_cad,
+            net_position_cad=self.net_position_cad,
+        )
+
+
+def debt_snapshot(debt: Debt, as_of: date) -> DebtSnapshot:
+    last_event = debt.last_payment_date or debt.loan_start_date
+    overdue_days = compute_debt_overdue_days(
+        as_of=as_of,
+        installment_due_day=debt.installment_due_day,
+        last_payment_date=debt.last_payment_date,
+        loan_start_date=debt.loan_start_date,
+    )
+    accrual = compute_debt_accrual(
+        principal_outstanding_cad=debt.principal_outstanding_cad,
+        interest_rate_annual=debt.interest_rate_annual,
+        penal_rate_annual=debt.penal_rate_annual,
+        last_event_date=last_event,
+        as_of=as_of,
+        overdue_days=overdue_days,
+    )
+    risk = compute_debt_risk(
+        interest_rate_annual=debt.interest_rate_annual,
+        overdue_days=overdue_days,
+        has_penal=accrual.penal_cad > 0,
+        original_currency=debt.original_currency,
+    )
+    return DebtSnapshot(
+        debt=debt,
+        interest_cad=accrual.interest_cad,
+        penal_cad=accrual.penal_cad,
+        overdue_days=overdue_days,
+        risk_score=risk.score,
+        risk_reason=risk.reason,
+    )
+
+
+def card_snapshot(card: CreditCard, as_of: date) -> CardSnapshot:
+    last_event = card.last_payment_date or card.statement_date
+    accrual = compute_credit_card_accrual(
+        statement_balance_cad=card.statement_balance_cad,
+        interest_rate_annual=card.interest_rate_annual,
+        last_event_date=last_event,
+        as_of=as_of,
+        due_date=card.due_date,
+        flat_late_fee_cad=card.flat_late_fee_cad,
+    )
+    overdue_days = compute_credit_card_overdue_days(as_of, card.due_date)
+    risk = compute_credit_card_risk(
+        interest_rate_annual=card.interest_rate_annual,
+        overdue_days=overdue_days,
+        utilization=card.utilization,
+        has_late_fee=accrual.late_fee_cad > 0,
+    )
+    return CardSnapshot(
+        card=card,
+        interest_cad=accrual.interest_cad,
+        late_fee_cad=accrual.late_fee_cad,
+        overdue_days=overdue_days,
+        risk_score=risk.score,
+        risk_reason=risk.reason,
+    )
+
+
+def _stored_debt_snapshot(debt: Debt, record: AccrualRecord) -> DebtSnapshot:
+    return DebtSnapshot(
+        debt=debt,
+        interest_cad=record.interest_cad,
+        penal_cad=record.fee_cad,
+        overdue_days=record.overdue_days,
+        risk_score=record.risk_score,
+        risk_reason=record.risk_reason,
+    )
+
+
+def _stored_card_snapshot(card: CreditCard, record: AccrualRecord) -> CardSnapshot:
+    return CardSnapshot(
+        card=card,
+        interest_cad=record.interest_cad,
+        late_fee_cad=record.fee_cad,
+        overdue_days=record.overdue_days,
+        risk_score=record.risk_score,
+        risk_reason=record.risk_reason,
+    )
+
+
+def accrual_records(portfolio: Portfolio) -> List[AccrualRecord]:
+    return [
+        AccrualRecord("loan", d.debt.id, d.interest_cad, d.penal_cad, d.overdue_days, d.risk_score, d.risk_reason)
+        for d in portfolio.debts
+    ] + [
+        AccrualRecord(
+            "credit_card", c.card.id, c.interest_cad, c.late_fee_cad, c.overdue_days, c.risk_score, c.risk_reason
+        )
+        for c in portfolio.cards
+    ]
+
+
+def allocation_items(portfolio: Portfolio) -> List[Dict[str, object]]:
+    return [
+        {
+            "target_type": "loan",
+            "target_id": d.debt.id,
+            "balance_cad": d.debt.principal_outstanding_cad,
+            "interest_rate_annual": d.debt.interest_rate_annual,
+            "risk_score": d.risk_score,
+        }
+        for d in portfolio.debts
+    ] + [
+        {
+            "target_type": "credit_card",
+            "target_id": c.card.id,
+            "balance_cad": c.card.statement_balance_cad,
+            "interest_rate_annual": c.card.interest_rate_annual,
+            "risk_score": c.risk_score,
+        }
+        for c in portfolio.cards
+    ]
+
+
+def build_portfolio(
+    repo: Repository, as_of: date, stored: Optional[Dict[Tuple[str, int], AccrualRecord]] = None
+) -> Portfolio:
+    stored = stored or {}
+    debts = tuple(
+        _stored_debt_snapshot(debt, stored[("loan", debt.id)])
+        if ("loan", debt.id) in stored
+        else debt_snapshot(debt, as_of)
+        for debt in repo.list_debts(status="active")
+    )
+    cards = tuple(
+        _stored_card_snapshot(card, stored[("credit_card", card.id)])
+        if ("credit_card", card.id) in stored
+        else card_snapshot(card, as_of)
+        for card in repo.list_credit_cards(status="active")
+    )
+    debt_cents = sum(
+        to_cents(d.debt.principal_outstanding_cad) + to_cents(d.interest_cad) + to_cents(d.penal_cad) for d in debts
+    ) + sum(
+        to_cents(c.card.statement_balance_cad) + to_cents(c.interest_cad) + to_cents(c.late_fee_cad) for c in cards
+    )
+    interest_cents = sum(to_cents(d.interest_cad) + to_cents(d.penal_cad) for d in debts) + sum(
+        to_cents(c.interest_cad) + to_cents(c.late_fee_cad) for c in cards
+    )
+    savings_cents = sum(to_cents(s.balance_cad) for s in repo.list_savings())
+    return Portfolio(
+        as_of=as_of,
+        debts=debts,
+        cards=cards,
+        total_debt_cad=from_cents(debt_cents),
+        total_interest_cad=from_cents(interest_cents),
+        total_savings_cad=from_cents(savings_cents),
+    )
+
+
+# Portfolios are immutable, so one instance is handed to every session reading the same data.
+class PortfolioService:
+    def __init__(self, repo: Repository, max_entries: int = 4) -> None:
+        if max_entries < 1:
+            raise ValueError("max_entries must be at least 1")
+        # Held weakly, as the registry below is keyed by the repository itself.
+        self._repo = weakref.ref(repo)
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[Tuple[date, Tuple[int, ...]], Portfolio]" = OrderedDict()
+
+    @property
+    def repo(self) -> Repository:
+        repo = self._repo()
+        if repo is None:
+            raise RuntimeError("The portfolio service's repository has been closed")
+        return repo
+
+    def portfolio(self, as_of: date) -> Portfolio:
+        repo = self.repo
+        key = (as_of, repo.table_versions(*PORTFOLIO_TABLES))
+        with self._lock:
+            cached = self._entries.get(key)
+            if cached is not None:
+                self._entries.move_to_end(key)
+                return cached
+
+        # Accruals saved by the background worker are reused while no tracked row has changed since.
+        portfolio = build_portfolio(repo, as_of, repo.load_accruals(as_of, repo.latest_change_seq()))
+        with self._lock:
+            self._entries[key] = portfolio
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return portfolio
+
+
+_services: "weakref.WeakKeyDictionary[Repository, PortfolioService]" = weakref.WeakKeyDictionary()
+_services_lock = threading.Lock()
+
+
+def portfolio_service(repo: Repository) -> PortfolioService:
+    with _services_lock:
+        service = _services.get(repo)
+        if service is None:
+            service = _services[repo] = PortfolioService(repo)
+        return service
@@ -0,0 +1,176 @@
+from __future__ import annotations
+
+import threading
+import time
+import weakref
+from dataclasses import dataclass
+from datetime import date
+from typing import Callable, Dict, List, Optional, Sequence, Set, Tuple
+
+from db.repository import Repository, WorkerHeartbeat
+from services.portfolio import accrual_records, build_portfolio, portfolio_service
+
+
+# A claim whose heartbeat is older than this is treated as abandoned by a crashed process and may be retaken.
+DEFAULT_LEASE_SECONDS = 15 * 60
+# change_log rows kept behind the newest; caches further behind than this simply invalidate every table.
+CHANGE_LOG_KEEP = 10_000
+# A worker that missed this many heartbeats in a row is reported as down.
+MISSED_HEARTBEATS = 3
+
+Progress = Callable[[float], None]
+
+
+def daily_period(as_of: date) -> str:
+    return as_of.isoformat()
+
+
+def monthly_period(as_of: date) -> str:
+    return as_of.strftime("%Y-%m")
+
+
+@dataclass(frozen=True)
+class Job:
+    name: str
+    period: Callable[[date], str]
+    run: Callable[[Repository, date, Progress], None]
+
+
+def run_daily_accrual(repo: Repository, as_of: date, progress: Progress) -> None:
+    # Read the change position first so rows edited during the computation make the saved accruals stale.
+    change_seq = repo.latest_change_seq()
+    portfolio = build_portfolio(repo, as_of)
+    progress(0.8)
+    repo.save_accruals(as_of, change_seq, int(time.time()), accrual_records(portfolio))
+
+
+def run_monthly_snapshot(repo: Repository, as_of: date, progress: Progress) -> None:
+    snapshot_date = as_of.replace(day=1)
+    if repo.get_monthly_snapshot(snapshot_date) is None:
+        portfolio = portfolio_service(repo).portfolio(as_of)
+        progress(0.8)
+        repo.add_monthly_snapshot(portfolio.monthly_snapshot(snapshot_date))
+
+
+def run_change_log_prune(repo: Repository, as_of: date, progress: Progress) -> None:
+    repo.prune_changes(repo.latest_change_seq() - CHANGE_LOG_KEEP)
+
+
+# Snapshot inserts advance the change_log, so they run before accruals are saved against it.
+DEFAULT_JOBS: Tuple[Job, ...] = (
+    Job("monthly_snapshot", monthly_period, run_monthly_snapshot),
+    Job("daily_accrual", daily_period, run_daily_accrual),
+    Job("change_log_prune", daily_period, run_change_log_prune),
+)
+
+
+class Scheduler:
+    def __init__(
+        self,
+        repo: Repository,
+        jobs: Sequence[Job] = DEFAULT_JOBS,
+        lease_seconds: int = DEFAULT_LEASE_SECONDS,
+        clock: Callable[[], float] = time.time,
+    ) -> None:
+        # Held weakly: the registry below is keyed by the repository, and a strong reference from the value
+        # would keep every evicted tenant's repository and connections alive.
+        self._repo = weakref.ref(repo)
+        self.jobs = tuple(jobs)
+        self.lease_seconds = lease_seconds
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._done: Set[Tuple[str, str]] = set()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def repo(self) -> Repository:
+        repo = self._repo()
+        if repo is None:
+            raise RuntimeError("The scheduler's repository has been closed")
+        return repo
+
+    def job(self, name: str) -> Job:
+        for job in self.jobs:
+            if job.name == name:
+                return job
+        raise ValueError(f"Unknown job: {name}")
+
+    def pending(self, as_of: date) -> List[Job]:
+        with self._lock:
+            return [job for job in self.jobs if (job.name, job.period(as_of)) not in self._done]
+
+    def request(self, name: str, as_of: date) -> bool:
+        job = self.job(name)
+        period = job.period(as_of)
+        if not self.repo.request_job_run(name, period, int(self._clock()), self.lease_seconds):
+            return False
+        with self._lock:
+            self._done.discard((name, period))
+        return True
+
+    def run_due(self, as_of: date) -> Dict[str, str]:
+        repo = self.repo
+        requested = {(run.job_name, run.period) for run in repo.requested_job_runs()}
+        with self._lock:
+            due = [
+                job
+                for job in self.jobs
+                if (job.name, job.period(as_of)) not in self._done or (job.name, job.period(as_of)) in requested
+            ]
+        return {job.name: self._run(repo, job, as_of) for job in due}
+
+    def _run(self, repo: Repository, job: Job, as_of: date) -> str:
+        period = job.period(as_of)
+        if not repo.claim_job_run(job.name, period, int(self._clock()), self.lease_seconds):
+            run = repo.get_job_run(job.name, period)
+            if run is not None and run.status == "succeeded":
+                self._mark_done(job.name, period)
+            return run.status if run is not None else "skipped"
+
+        def progress(fraction: float) -> None:
+            repo.update_job_progress(job.name, period, fraction, int(self._clock()))
+
+        try:
+            job.run(repo, as_of, progress)
+        except Exception as exc:
+            repo.finish_job_run(job.name, period, "failed", int(self._clock()), str(exc))
+            return "failed"
+        repo.finish_job_run(job.name, period, "succeeded", int(self._clock()))
+        self._mark_done(job.name, period)
+        return "succeeded"
+
+    def run_in_background(self, as_of: date, force: bool = False) -> bool:
+        if not force and not self.pending(as_of):
+            return False
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return False
+            self._thread = threading.Thread(
+                target=self.run_due, args=(as_of,), name="myfin-scheduler", daemon=True
+            )
+            self._thread.start()
+        return True
+
+    def _mark_done(self, job_name: str, period: str) -> None:
+        with self._lock:
+            self._done.add((job_name, period))
+
+
+def healthy_workers(repo: Repository, now: float) -> List[WorkerHeartbeat]:
+    return [
+        worker
+        for worker in repo.list_worker_heartbeats()
+        if worker.state != "stopped" and now - worker.heartbeat_at <= worker.interval_seconds * MISSED_HEARTBEATS
+    ]
+
+
+_schedulers: "weakref.WeakKeyDictionary[Repository, Scheduler]" = weakref.WeakKeyDictionary()
+_schedulers_lock = threading.Lock()
+
+
+def scheduler_for(repo: Repository) -> Scheduler:
+    with _schedulers_lock:
+        scheduler = _schedulers.get(repo)
+        if scheduler is None:
+            scheduler = _schedulers[repo] = Scheduler(repo)
+        return scheduler
@@ -0,0 +1,189 @@
+from __future__ import annotations
+
+import threading
+from concurrent.futures import CancelledError, Executor, Future, ThreadPoolExecutor
+from dataclasses import dataclass
+from datetime import date
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from core.simulator import SimulationResult, SimulationRow, simulate_payoff
+from models.types import CreditCard, Debt
+
+
+class SimulationCancelled(Exception):
+    pass
+
+
+@dataclass(frozen=True)
+class Scenario:
+    debts: Tuple[Debt, ...]
+    cards: Tuple[CreditCard, ...]
+    start_date: date
+    monthly_payment_cad: float
+    strategy: str
+    max_months: int = 600
+
+
+class SimulationJob:
+    def __init__(self, scenario: Scenario) -> None:
+        self.scenario = scenario
+        self._rows: List[SimulationRow] = []
+        self._cancelled = threading.Event()
+        self._future: Optional[Future] = None
+        self._lock = threading.Lock()
+        self._subscribers = 0
+
+    def start(self, executor: Executor) -> Future:
+        self._future = executor.submit(self._run)
+        return self._future
+
+    def _run(self) -> SimulationResult:
+        scenario = self.scenario
+        return simulate_payoff(
+            debts=list(scenario.debts),
+            cards=list(scenario.cards),
+            start_date=scenario.start_date,
+            monthly_payment_cad=scenario.monthly_payment_cad,
+            strategy=scenario.strategy,
+            max_months=scenario.max_months,
+            on_row=self._on_row,
+        )
+
+    def _on_row(self, row: SimulationRow) -> None:
+        if self._cancelled.is_set():
+            raise SimulationCancelled(self.scenario.strategy)
+        self._rows.append(row)
+
+    def rows(self) -> List[SimulationRow]:
+        # The worker only appends, so a copy taken from any thread is a consistent prefix of the timeline.
+        return self._rows[:]
+
+    def cancel_requested(self) -> bool:
+        return self._cancelled.is_set()
+
+    def subscribe(self) -> bool:
+        with self._lock:
+            if self._cancelled.is_set():
+                return False
+            self._subscribers += 1
+            return True
+
+    def release(self) -> None:
+        # The run is shared by every caller that submitted the same scenario; it stops with the last of them.
+        with self._lock:
+            self._subscribers -= 1
+            if self._subscribers > 0:
+                return
+        self.cancel()
+
+    def cancel(self) -> None:
+        self._cancelled.set()
+        if self._future is not None:
+            self._future.cancel()
+
+    @property
+    def status(self) -> str:
+        if self._future is None or not self._future.done():
+            return "cancelling" if self._cancelled.is_set() else "running"
+        if self._future.cancelled():
+            return "cancelled"
+        error = self._future.exception()
+        if isinstance(error, SimulationCancelled):
+            return "cancelled"
+        return "failed" if error is not None else "succeeded"
+
+    def done(self) -> bool:
+        return self._future is not None and self._future.done()
+
+    def result(self, timeout: Optional[float] = None) -> Optional[SimulationResult]:
+        if self._future is None:
+            return None
+        try:
+            return self._future.result(timeout)
+        except (CancelledError, SimulationCancelled):
+            return None
+
+
+class SimulationHandle:
+    def __init__(self, job: SimulationJob) -> None:
+        self._job = job
+        self._lock = threading.Lock()
+        self._cancelled = False
+
+    @property
+    def scenario(self) -> Scenario:
+        return self._job.scenario
+
+    def rows(self) -> List[SimulationRow]:
+        return self._job.rows()
+
+    def cancel_requested(self) -> bool:
+        return self._cancelled
+
+    def cancel(self) -> None:
+        with self._lock:
+            if self._cancelled:
+                return
+            self._cancelled = True
+        self._job.release()
+
+    @property
+    def status(self) -> str:
+        return "cancelled" if self._cancelled else self._job.status
+
+    def done(self) -> bool:
+        return self._cancelled or self._job.done()
+
+    def result(self, timeout: Optional[float] = None) -> Optional[SimulationResult]:
+        return None if self._cancelled else self._job.result(timeout)
+
+
+class SimulationRunner:
+    def __init__(self, max_workers: int = 2) -> None:
+        if max_workers < 1:
+            raise ValueError("max_workers must be at least 1")
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="myfin-simulation")
+        self._lock = threading.Lock()
+        self._in_flight: Dict[Scenario, SimulationJob] = {}
+
+    def submit(self, scenario: Scenario) -> SimulationHandle:
+        # Identical scenarios share the run already in flight instead of queueing a duplicate; each caller gets
+        # its own handle, so cancelling one only stops the run once no other caller is waiting on it.
+        with self._lock:
+            job = self._in_flight.get(scenario)
+            if job is not None and job.subscribe():
+                return SimulationHandle(job)
+            job = self._in_flight[scenario] = SimulationJob(scenario)
+            job.subscribe()
+            future = job.start(self._executor)
+        future.add_done_callback(lambda _: self._finished(scenario, job))
+        return SimulationHandle(job)
+
+    def submit_all(
+        self,
+        debts: Sequence[Debt],
+        cards: Sequence[CreditCard],
+        start_date: date,
+        monthly_payment_cad: float,
+        strategies: Sequence[str],
+    ) -> Dict[str, SimulationHandle]:
+        return {
+            strategy: self.submit(Scenario(tuple(debts), tuple(cards), start_date, monthly_payment_cad, strategy))
+            for strategy in strategies
+        }
+
+    def in_flight(self) -> int:
+        with self._lock:
+            return len(self._in_flight)
+
+    def _finished(self, scenario: Scenario, job: SimulationJob) -> None:
+        with self._lock:
+            if self._in_flight.get(scenario) is job:
+                del self._in_flight[scenario]
+
+    def shutdown(self) -> None:
+        with self._lock:
+            jobs = list(self._in_flight.values())
+        for job in jobs:
+            job.cancel()
+        self._executor.shutdown(wait=True)
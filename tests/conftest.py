@@ -0,0 +1,32 @@
+from __future__ import annotations
+
+from dataclasses import replace
+from datetime import date
+from pathlib import Path
+from typing import Any, Iterator
+
+import pytest
+
+from db.repository import Repository
+from models.types import CreditCard, Debt
+
+
+def make_debt(**changes: Any) -> Debt:
+    debt = Debt(0, "Lender", "Personal", "CAD", 1000.0, 800.0, 0.05, 0.0, date(2024, 1, 1), 100.0, 5, None, "active")
+    return replace(debt, **changes)
+
+
+def make_card(**changes: Any) -> CreditCard:
+    card = CreditCard(0, "Bank", "Card", 5000.0, 300.0, 0.0, date(2024, 3, 15), date(2024, 4, 5), None, 25.0, "active")
+    return replace(card, **changes)
+
+
+def add_payment(repo: Repository, payment_date: date, target_type: str, target_id: int, principal: float) -> int:
+    return repo.add_payment(payment_date, target_type, target_id, principal, "CAD", principal, 0.0, 0.0, principal)
+
+
+@pytest.fixture
+def repo(tmp_path: Path) -> Iterator[Repository]:
+    repository = Repository(tmp_path / "finance.db")
+    yield repository
+    repository.close()
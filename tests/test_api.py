@@ -0,0 +1,96 @@
+from __future__ import annotations
+
+import json
+from http import HTTPStatus
+from pathlib import Path
+from typing import Iterator
+
+import pytest
+
+from conftest import make_card, make_debt
+from db.tenants import RepositoryManager
+from services import api as api_module
+from services.api import ApiService
+from services.simulations import SimulationRunner
+
+
+@pytest.fixture
+def manager(tmp_path: Path) -> Iterator[RepositoryManager]:
+    manager = RepositoryManager(tmp_path)
+    repo = manager.get("default")
+    repo.add_debt(make_debt())
+    repo.add_credit_card(make_card())
+    yield manager
+    manager.close()
+
+
+@pytest.fixture
+def service(manager: RepositoryManager) -> Iterator[ApiService]:
+    runner = SimulationRunner()
+    yield ApiService(manager, runner)
+    runner.shutdown()
+
+
+@pytest.mark.parametrize(
+    "target",
+    [
+        "/portfolio",
+        "/risk",
+        "/allocations?available_cad=250",
+        "/snapshots",
+        "/simulations?monthly_payment_cad=250&max_months=24",
+    ],
+)
+def test_routes_return_json(service: ApiService, target: str) -> None:
+    status, headers, body = service.handle("default", target)
+    assert status == HTTPStatus.OK
+    assert headers["Content-Type"] == "application/json"
+    json.loads(body)
+
+
+def test_etag_revalidation(service: ApiService, manager: RepositoryManager) -> None:
+    _, headers, _ = service.handle("default", "/portfolio")
+    status, _, body = service.handle("default", "/portfolio", headers["ETag"])
+    assert (status, body) == (HTTPStatus.NOT_MODIFIED, b"")
+
+    manager.get("default").add_debt(make_debt(lender_name="Second"))
+    status, fresh, _ = service.handle("default", "/portfolio", headers["ETag"])
+    assert status == HTTPStatus.OK
+    assert fresh["ETag"] != headers["ETag"]
+
+
+@pytest.mark.parametrize(
+    "tenant_id, target, expected",
+    [
+        ("default", "/nowhere", HTTPStatus.NOT_FOUND),
+        ("someone", "/portfolio", HTTPStatus.NOT_FOUND),
+        ("../escape", "/portfolio", HTTPStatus.BAD_REQUEST),
+        ("default", "/allocations", HTTPStatus.BAD_REQUEST),
+        ("default", "/allocations?available_cad=lots", HTTPStatus.BAD_REQUEST),
+        ("default", "/allocations?available_cad=-5", HTTPStatus.BAD_REQUEST),
+        ("default", "/allocations?available_cad=5&strategy=guess", HTTPStatus.BAD_REQUEST),
+        ("default", "/portfolio?as_of=yesterday", HTTPStatus.BAD_REQUEST),
+        ("default", "/simulations?monthly_payment_cad=250&max_months=100000", HTTPStatus.BAD_REQUEST),
+        ("default", "/simulations?monthly_payment_cad=250&start_date=9990-01-01", HTTPStatus.BAD_REQUEST),
+    ],
+)
+def test_client_errors(service: ApiService, tenant_id: str, target: str, expected: HTTPStatus) -> None:
+    status, _, body = service.handle(tenant_id, target)
+    assert status == expected
+    assert json.loads(body)["error"]
+
+
+def test_unknown_tenant_does_not_create_a_database(service: ApiService, tmp_path: Path) -> None:
+    service.handle("someone", "/portfolio")
+    assert not (tmp_path / "tenants" / "someone.db").exists()
+
+
+def test_server_faults_hide_details(service: ApiService, monkeypatch: pytest.MonkeyPatch) -> None:
+    def broken(api: ApiService, repo: object, params: object) -> object:
+        raise RuntimeError("secret detail")
+
+    route = api_module.ROUTES["/snapshots"]
+    monkeypatch.setitem(api_module.ROUTES, "/snapshots", api_module.Route(route.tables, route.parse, broken))
+    status, _, body = service.handle("default", "/snapshots")
+    assert status == HTTPStatus.INTERNAL_SERVER_ERROR
+    assert json.loads(body) == {"error": "Internal server error"}
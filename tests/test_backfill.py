@@ -0,0 +1,33 @@
+from __future__ import annotations
+
+from datetime import date
+
+import numpy as np
+
+from conftest import make_card, make_debt
+from core.backfill import nearest_savings
+from db.repository import MonthlySnapshot, Repository
+from services.backfill import backfill_monthly_snapshots
+
+
+def test_nearest_savings() -> None:
+    months = np.array(["2024-01-01", "2024-02-01", "2024-05-01", "2024-09-01"], dtype="datetime64[D]")
+    dates = np.array(["2024-06-01", "2024-02-01"], dtype="datetime64[D]")
+    savings = np.array([600, 200], dtype=np.int64)
+    assert nearest_savings(months, dates, savings, 999).tolist() == [200, 200, 600, 600]
+    assert nearest_savings(months, dates[:0], savings[:0], 999).tolist() == [999] * 4
+
+
+def test_backfill_limits_accounts_to_their_lifetime(repo: Repository) -> None:
+    start = date(2024, 1, 10)
+    repo.add_debt(make_debt(principal_outstanding_cad=1000.0, interest_rate_annual=0.0, loan_start_date=start))
+    repo.add_credit_card(make_card(statement_date=date(2024, 3, 15)))
+    repo.add_savings_account("Savings", "CAD", 900.0)
+    repo.add_monthly_snapshot(MonthlySnapshot(date(2024, 5, 1), 1300.0, 0.0, 400.0, -900.0))
+
+    assert backfill_monthly_snapshots(repo, date(2024, 6, 20)) == 4
+    rows = {snapshot.snapshot_date: snapshot for snapshot in repo.list_monthly_snapshots()}
+    # The loan starts mid-January and the card mid-March, so each counts from the following month start.
+    assert [rows[date(2024, month, 1)].total_debt_cad for month in (1, 2, 3, 4)] == [0.0, 1000.0, 1000.0, 1300.0]
+    assert {rows[date(2024, month, 1)].total_savings_cad for month in (1, 2, 3, 4)} == {400.0}
+    assert rows[date(2024, 4, 1)].net_position_cad == -900.0
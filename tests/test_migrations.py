@@ -0,0 +1,202 @@
+from __future__ import annotations
+
+import sqlite3
+from datetime import date
+from pathlib import Path
+from typing import Iterator
+
+import pytest
+
+from core.utils import to_epoch_day
+from db.migrations import MIGRATIONS, SCHEMA_VERSION
+from db.repository import Repository
+
+
+# The tables as the first release created them: ISO date strings, REAL dollars, no row versions.
+BASELINE_SCHEMA = """
+CREATE TABLE debts (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    lender_name TEXT NOT NULL,
+    debt_type TEXT NOT NULL,
+    original_currency TEXT NOT NULL,
+    principal_original REAL NOT NULL,
+    principal_outstanding_cad REAL NOT NULL,
+    interest_rate_annual REAL NOT NULL,
+    penal_rate_annual REAL NOT NULL,
+    loan_start_date TEXT NOT NULL,
+    installment_amount REAL,
+    installment_due_day INTEGER,
+    last_payment_date TEXT,
+    status TEXT NOT NULL
+);
+CREATE TABLE credit_cards (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    bank_name TEXT NOT NULL,
+    card_name TEXT NOT NULL,
+    credit_limit_cad REAL NOT NULL,
+    statement_balance_cad REAL NOT NULL,
+    interest_rate_annual REAL NOT NULL,
+    statement_date TEXT NOT NULL,
+    due_date TEXT NOT NULL,
+    last_payment_date TEXT,
+    flat_late_fee_cad REAL NOT NULL,
+    status TEXT NOT NULL
+);
+CREATE TABLE payments (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    payment_date TEXT NOT NULL,
+    target_type TEXT NOT NULL,
+    target_id INTEGER NOT NULL,
+    payment_amount_original REAL NOT NULL,
+    payment_currency TEXT NOT NULL,
+    payment_amount_cad REAL NOT NULL,
+    applied_penal REAL NOT NULL,
+    applied_interest REAL NOT NULL,
+    applied_principal REAL NOT NULL
+);
+CREATE TABLE savings (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    account_name TEXT NOT NULL,
+    currency TEXT NOT NULL,
+    balance_cad REAL NOT NULL
+);
+CREATE TABLE fx_rates (
+    currency TEXT PRIMARY KEY,
+    rate_to_cad REAL NOT NULL,
+    last_updated TEXT NOT NULL,
+    source TEXT NOT NULL
+);
+CREATE TABLE monthly_snapshots (
+    snapshot_date TEXT PRIMARY KEY,
+    total_debt_cad REAL NOT NULL,
+    total_interest_cad REAL NOT NULL,
+    total_savings_cad REAL NOT NULL,
+    net_position_cad REAL NOT NULL
+);
+
+INSERT INTO debts VALUES (
+    1, 'Northern Credit', 'Auto', 'CAD', 20000.0, 1234.56, 0.07, 0.02, '2023-05-17', 350.1, 15, '2024-01-02', 'active'
+);
+INSERT INTO credit_cards VALUES (
+    1, 'Maple Bank', 'Rewards', 5000.0, 410.99, 0.2, '2024-01-20', '2024-02-10', NULL, 25.0, 'active'
+);
+INSERT INTO payments VALUES (1, '2023-12-02', 'loan', 1, 350.1, 'CAD', 350.1, 0.0, 7.35, 342.75);
+INSERT INTO payments VALUES (2, '2024-01-02', 'loan', 1, 350.1, 'CAD', 350.1, 0.0, 6.99, 343.11);
+INSERT INTO payments VALUES (3, '2024-01-25', 'credit_card', 1, 100.0, 'CAD', 100.0, 0.0, 0.0, 100.0);
+INSERT INTO savings VALUES (1, 'Emergency Fund', 'CAD', 2500.75);
+INSERT INTO fx_rates VALUES ('USD', 1.35, '2024-01-31', 'manual');
+INSERT INTO monthly_snapshots VALUES ('2024-01-01', 1645.55, 0.0, 2500.75, 855.2);
+"""
+
+
+@pytest.fixture
+def baseline(tmp_path: Path) -> Path:
+    db_path = tmp_path / "finance.db"
+    conn = sqlite3.connect(db_path)
+    conn.executescript(BASELINE_SCHEMA)
+    conn.close()
+    return db_path
+
+
+@pytest.fixture
+def conn(baseline: Path) -> Iterator[sqlite3.Connection]:
+    connection = sqlite3.connect(baseline)
+    yield connection
+    connection.close()
+
+
+def run_steps(conn: sqlite3.Connection, up_to: int) -> None:
+    for version, step in MIGRATIONS:
+        if version <= up_to:
+            step(conn)
+
+
+def column_types(conn: sqlite3.Connection, table: str) -> dict:
+    return {row[1]: row[2] for row in conn.execute(f"PRAGMA table_info({table})")}
+
+
+def test_epoch_day_dates(conn: sqlite3.Connection) -> None:
+    run_steps(conn, 1)
+    assert column_types(conn, "debts")["loan_start_date"] == "INTEGER"
+    assert conn.execute("SELECT loan_start_date, last_payment_date FROM debts").fetchone() == (
+        to_epoch_day(date(2023, 5, 17)),
+        to_epoch_day(date(2024, 1, 2)),
+    )
+    assert conn.execute("SELECT due_date FROM credit_cards").fetchone() == (to_epoch_day(date(2024, 2, 10)),)
+    assert conn.execute("SELECT payment_date FROM payments WHERE id = 3").fetchone() == (
+        to_epoch_day(date(2024, 1, 25)),
+    )
+
+
+def test_integer_cents(conn: sqlite3.Connection) -> None:
+    run_steps(conn, 2)
+    assert column_types(conn, "debts")["principal_outstanding_cad"] == "INTEGER"
+    assert conn.execute("SELECT principal_outstanding_cad, installment_amount FROM debts").fetchone() == (123456, 35010)
+    assert conn.execute("SELECT applied_principal FROM payments WHERE id = 2").fetchone() == (34311,)
+    assert conn.execute("SELECT balance_cad FROM savings").fetchone() == (250075,)
+    assert conn.execute("SELECT net_position_cad FROM monthly_snapshots").fetchone() == (85520,)
+    # Rates are fractions, not money, and stay REAL.
+    assert conn.execute("SELECT interest_rate_annual FROM debts").fetchone() == (0.07,)
+
+
+def test_integer_cents_drops_an_unarchived_rollup(conn: sqlite3.Connection) -> None:
+    run_steps(conn, 1)
+    conn.execute(
+        "CREATE TABLE payment_totals (target_type TEXT, target_id INTEGER, payment_month TEXT, payment_count INTEGER, "
+        "payment_amount_cad REAL, applied_penal REAL, applied_interest REAL, applied_principal REAL)"
+    )
+    MIGRATIONS[1][1](conn)
+    assert conn.execute("SELECT name FROM sqlite_master WHERE name = 'payment_totals'").fetchone() is None
+
+
+def test_row_versions(conn: sqlite3.Connection) -> None:
+    run_steps(conn, 3)
+    for table in ("debts", "credit_cards", "savings"):
+        assert conn.execute(f"SELECT version FROM {table}").fetchall() == [(1,)]
+    MIGRATIONS[2][1](conn)
+    assert list(column_types(conn, "debts")).count("version") == 1
+
+
+def test_job_progress(conn: sqlite3.Connection) -> None:
+    run_steps(conn, 3)
+    conn.execute(
+        "CREATE TABLE job_runs (job_name TEXT NOT NULL, period TEXT NOT NULL, status TEXT NOT NULL, "
+        "started_at INTEGER NOT NULL, finished_at INTEGER, detail TEXT, PRIMARY KEY (job_name, period))"
+    )
+    conn.execute("INSERT INTO job_runs VALUES ('fx_refresh', '2024-01-31', 'succeeded', 1, 2, NULL)")
+    conn.execute("INSERT INTO job_runs VALUES ('monthly_snapshot', '2024-01', 'failed', 1, 2, 'boom')")
+    MIGRATIONS[3][1](conn)
+    assert "heartbeat_at" in column_types(conn, "job_runs")
+    assert conn.execute("SELECT job_name, progress FROM job_runs ORDER BY job_name").fetchall() == [
+        ("fx_refresh", 1.0),
+        ("monthly_snapshot", 0.0),
+    ]
+
+
+def test_name_only_search(conn: sqlite3.Connection) -> None:
+    run_steps(conn, 4)
+    for table, columns in (("debts", "lender_name, debt_type"), ("savings", "account_name, currency")):
+        conn.execute(f"CREATE VIRTUAL TABLE {table}_search USING fts5({columns}, content='{table}', content_rowid='id')")
+        conn.execute(f"CREATE TRIGGER trg_{table}_search_delete AFTER DELETE ON {table} BEGIN SELECT 1; END")
+    MIGRATIONS[4][1](conn)
+    leftovers = conn.execute("SELECT name FROM sqlite_master WHERE name LIKE '%search%'").fetchall()
+    assert leftovers == []
+
+
+def test_baseline_database_upgrades(baseline: Path) -> None:
+    repo = Repository(baseline)
+    debt = repo.list_debts()[0]
+    assert (debt.loan_start_date, debt.principal_outstanding_cad, debt.version) == (date(2023, 5, 17), 1234.56, 1)
+    assert repo.list_credit_cards()[0].statement_balance_cad == 410.99
+    totals = repo.get_payment_totals()
+    assert (totals.payment_count, totals.applied_principal) == (3, 785.86)
+    assert repo.get_payment_totals("loan", 1, "2024-01").applied_interest == 6.99
+    assert repo.verify_payment_totals() == []
+    assert [match.name for match in repo.search_accounts("northern")] == ["Northern Credit"]
+    assert repo.search_accounts("auto", tables=["debts"]) == []
+    repo.close()
+
+    conn = sqlite3.connect(baseline)
+    assert conn.execute("PRAGMA user_version").fetchone()[0] == SCHEMA_VERSION
+    conn.close()
+    Repository(baseline).close()
@@ -0,0 +1,75 @@
+from __future__ import annotations
+
+import sqlite3
+from dataclasses import replace
+from datetime import date
+from pathlib import Path
+
+import pytest
+
+from conftest import add_payment, make_card, make_debt
+from db.repository import ConcurrentUpdateError, Repository
+
+
+def test_stale_edit_raises_concurrent_update(repo: Repository) -> None:
+    debt_id = repo.add_debt(make_debt())
+    debt = repo.get_debt(debt_id)
+    assert repo.update_debt(replace(debt, interest_rate_annual=0.04)) == 2
+
+    with pytest.raises(ConcurrentUpdateError) as excinfo:
+        repo.update_debt(replace(debt, interest_rate_annual=0.03))
+    assert (excinfo.value.expected_version, excinfo.value.current_version) == (1, 2)
+    assert repo.get_debt(debt_id).interest_rate_annual == 0.04
+
+
+def test_edit_of_deleted_row_raises_concurrent_update(repo: Repository) -> None:
+    card_id = repo.add_credit_card(make_card())
+    card = repo.get_credit_card(card_id)
+    conn = sqlite3.connect(repo.db_path)
+    conn.execute("DELETE FROM credit_cards WHERE id = ?", (card_id,))
+    conn.commit()
+    conn.close()
+
+    with pytest.raises(ConcurrentUpdateError) as excinfo:
+        repo.update_credit_card(replace(card, card_name="Renamed"))
+    assert excinfo.value.current_version is None
+
+
+def _seed_ledger(repo: Repository) -> None:
+    debt_id = repo.add_debt(make_debt())
+    card_id = repo.add_credit_card(make_card())
+    for year in (2021, 2022, 2023, 2024):
+        for month in (1, 6, 11):
+            add_payment(repo, date(year, month, 5), "loan", debt_id, 10.0 * month)
+            add_payment(repo, date(year, month, 20), "credit_card", card_id, 3.25)
+
+
+def test_archive_payments_keeps_totals(repo: Repository) -> None:
+    _seed_ledger(repo)
+    before = repo.get_payment_totals()
+    by_month = repo.get_payment_totals("loan", 1, "2022-06")
+
+    assert repo.archive_payments(date(2023, 1, 1)) == {2021: 6, 2022: 6}
+    assert repo.archived_payment_years() == [2021, 2022]
+    assert repo.get_payment_totals() == before
+    assert repo.get_payment_totals("loan", 1, "2022-06") == by_month
+    assert repo.verify_payment_totals() == []
+    assert len(repo.list_payments()) == 12
+    assert len(repo.list_payments(include_archived=True)) == 24
+
+
+def test_backup_and_restore_include_the_archive(repo: Repository, tmp_path: Path) -> None:
+    _seed_ledger(repo)
+    repo.archive_payments(date(2023, 1, 1))
+    target = tmp_path / "backup" / "finance.db"
+    target.parent.mkdir()
+    repo.backup_to(target, archive_dir=tmp_path / "backup" / "archive")
+
+    add_payment(repo, date(2024, 12, 1), "loan", 1, 500.0)
+    repo.archive_payments(date(2024, 1, 1))
+    repo.restore_from(target, archive_dir=tmp_path / "backup" / "archive")
+
+    assert repo.archived_payment_years() == [2021, 2022]
+    assert len(repo.list_payments(include_archived=True)) == 24
+    assert repo.get_payment_totals().payment_count == 24
+    assert repo.verify_payment_totals() == []
@@ -0,0 +1,35 @@
+from __future__ import annotations
+
+from dataclasses import replace
+from datetime import date
+
+from conftest import add_payment, make_debt
+from db.repository import SANDBOX_TABLES, Repository
+
+
+def test_sandbox_copies_account_tables_only(repo: Repository) -> None:
+    debt_id = repo.add_debt(make_debt())
+    repo.add_savings_account("Savings", "CAD", 250.0)
+    add_payment(repo, date(2024, 2, 5), "loan", debt_id, 100.0)
+
+    sandbox = repo.sandbox()
+    assert [debt.lender_name for debt in sandbox.list_debts()] == ["Lender"]
+    assert [account.balance_cad for account in sandbox.list_savings()] == [250.0]
+    assert sandbox.get_payment_totals().payment_count == 0
+
+    sandbox.update_debt(replace(sandbox.get_debt(debt_id), interest_rate_annual=0.01))
+    assert repo.get_debt(debt_id).interest_rate_annual == 0.05
+
+    sandbox.copy_from(repo)
+    assert sandbox.get_debt(debt_id).interest_rate_annual == 0.05
+    sandbox.close()
+
+
+def test_sandbox_change_seq_ignores_other_tables(repo: Repository) -> None:
+    debt_id = repo.add_debt(make_debt())
+    seq = repo.latest_change_seq(SANDBOX_TABLES)
+    add_payment(repo, date(2024, 2, 5), "loan", debt_id, 100.0)
+    assert repo.latest_change_seq(SANDBOX_TABLES) == seq
+    assert repo.latest_change_seq() > seq
+    repo.add_savings_account("Savings", "CAD", 250.0)
+    assert repo.latest_change_seq(SANDBOX_TABLES) > seq
@@ -0,0 +1,52 @@
+from __future__ import annotations
+
+import sqlite3
+from datetime import date
+from pathlib import Path
+
+from conftest import add_payment
+from db.connection import init_db
+from db.migrations import SCHEMA_VERSION
+from db.repository import Repository
+
+
+def test_reopening_an_existing_database(tmp_path: Path) -> None:
+    db_path = tmp_path / "finance.db"
+    repo = Repository(db_path)
+    repo.add_payment(date(2024, 3, 5), "loan", 1, 120.0, "CAD", 120.0, 0.0, 20.0, 100.0)
+    repo.close()
+
+    init_db(db_path)
+    reopened = Repository(db_path)
+    totals = reopened.get_payment_totals()
+    assert totals.payment_count == 1
+    assert totals.applied_principal == 100.0
+    assert reopened.verify_payment_totals() == []
+    reopened.close()
+
+
+def test_payment_totals_filters(repo: Repository) -> None:
+    add_payment(repo, date(2024, 3, 5), "loan", 1, 100.0)
+    add_payment(repo, date(2024, 4, 5), "loan", 1, 50.0)
+    add_payment(repo, date(2024, 4, 9), "credit_card", 2, 30.0)
+
+    assert repo.get_payment_totals().payment_count == 3
+    assert repo.get_payment_totals("loan").applied_principal == 150.0
+    assert repo.get_payment_totals(payment_month="2024-04").payment_count == 2
+    assert repo.get_payment_totals("loan", 1, "2024-03").payment_amount_cad == 100.0
+    assert repo.get_payment_totals("credit_card", 1).payment_count == 0
+
+
+def test_schema_reinit_is_idempotent(tmp_path: Path) -> None:
+    db_path = tmp_path / "finance.db"
+    init_db(db_path)
+    conn = sqlite3.connect(db_path)
+    before = conn.execute("SELECT type, name, sql FROM sqlite_master ORDER BY type, name").fetchall()
+    conn.close()
+
+    init_db(db_path)
+    conn = sqlite3.connect(db_path)
+    assert conn.execute("SELECT type, name, sql FROM sqlite_master ORDER BY type, name").fetchall() == before
+    assert conn.execute("PRAGMA user_version").fetchone()[0] == SCHEMA_VERSION
+    assert conn.execute("SELECT COUNT(*) FROM payment_grand_totals").fetchone()[0] == 1
+    conn.close()